@@ -0,0 +1,278 @@
+import threading
+import time
+from functools import cached_property
+
+from django.conf import settings
+
+from .cache import DataVersion
+from .models import Zone, HouseDistrict, SenateDistrict, CommissionerDistrict, \
+    DisinvestedArea, ProjectScore
+
+
+# Bumped by the receivers in signals.py whenever a zone or district boundary
+# changes, e.g., when the import_boundaries command runs, and by the
+# sync_disinvested_areas command.
+boundary_data_version = DataVersion('boundaries')
+
+# Changes made by this process, for cache backends that don't keep the shared
+# version, e.g., the DummyCache used in development.
+_local_generation = 0
+
+_index = {'key': None, 'expires': 0, 'index': None}
+_index_lock = threading.Lock()
+
+
+class EnvelopeIndex:
+    """
+    A static, sort-tile-recursive packed R-tree of bounding boxes, in the style
+    of the GEOS STRtree, which is not exposed by Django's GEOS bindings.
+
+    Each node is an (extent, children) pair, where an extent is an
+    (xmin, ymin, xmax, ymax) tuple, and the children of a leaf are the items
+    that were indexed.
+    """
+    NODE_CAPACITY = 10
+
+    def __init__(self, items):
+        """
+        items is a list of (extent, item) pairs.
+        """
+        self.root = None
+        self.height = 0
+
+        level = list(items)
+
+        while level:
+            level = self.pack(level)
+            self.height += 1
+
+            if len(level) == 1:
+                self.root = level[0]
+                break
+
+    @classmethod
+    def pack(cls, nodes) -> list:
+        """
+        Group the nodes of one level into parents of at most NODE_CAPACITY
+        children, slicing them into vertical strips by x, then packing each
+        strip by y, so that neighboring nodes share a parent.
+        """
+        def center(extent, axis):
+            return (extent[axis] + extent[axis + 2]) / 2
+
+        parent_count = -(-len(nodes) // cls.NODE_CAPACITY)
+        strip_count = max(round(parent_count ** 0.5), 1)
+        strip_size = -(-len(nodes) // strip_count)
+
+        nodes = sorted(nodes, key=lambda node: center(node[0], 0))
+
+        parents = []
+
+        for strip_start in range(0, len(nodes), strip_size):
+            strip = sorted(
+                nodes[strip_start:strip_start + strip_size],
+                key=lambda node: center(node[0], 1)
+            )
+
+            for start in range(0, len(strip), cls.NODE_CAPACITY):
+                children = strip[start:start + cls.NODE_CAPACITY]
+                parents.append((cls.union(child[0] for child in children), children))
+
+        return parents
+
+    @staticmethod
+    def union(extents) -> tuple:
+        xmins, ymins, xmaxs, ymaxs = zip(*extents)
+        return (min(xmins), min(ymins), max(xmaxs), max(ymaxs))
+
+    @staticmethod
+    def overlaps(a, b) -> bool:
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+    def query(self, extent) -> list:
+        """
+        Return the items whose extent overlaps the given one.
+        """
+        if self.root is None:
+            return []
+
+        items = []
+        stack = [(self.root, self.height)]
+
+        while stack:
+            (node_extent, children), depth = stack.pop()
+
+            if not self.overlaps(node_extent, extent):
+                continue
+
+            if depth == 1:
+                items.extend(
+                    item for item_extent, item in children
+                    if self.overlaps(item_extent, extent)
+                )
+            else:
+                stack.extend((child, depth - 1) for child in children)
+
+        return items
+
+
+class BoundaryLayer:
+    """
+    The boundaries of one model, prepared for repeated intersects and
+    intersection-area queries.
+    """
+
+    def __init__(self, boundaries):
+        """
+        boundaries is a list of (id, geometry) pairs.
+        """
+        self.geometries = {}
+        self.prepared = {}
+
+        for boundary_id, geom in boundaries:
+            if geom is None or geom.empty:
+                continue
+
+            self.geometries[boundary_id] = geom
+            self.prepared[boundary_id] = geom.prepared
+
+        self.index = EnvelopeIndex(
+            [(geom.extent, boundary_id) for boundary_id, geom in self.geometries.items()]
+        )
+
+    @classmethod
+    def from_model(cls, model, field='boundary'):
+        return cls(model.objects.values_list('id', field))
+
+    def candidates(self, geom) -> list:
+        if geom.empty:
+            return []
+
+        return self.index.query(geom.extent)
+
+    def intersecting(self, geom) -> list:
+        """
+        IDs of the boundaries that intersect the given geometry.
+        """
+        # GEOS predicates don't accept collections, so test each of their parts
+        parts = list(geom) if geom.geom_type == 'GeometryCollection' else [geom]
+
+        return [
+            boundary_id for boundary_id in self.candidates(geom)
+            if any(self.prepared[boundary_id].intersects(part) for part in parts)
+        ]
+
+    def intersection_area(self, boundary_id, geom) -> float:
+        # Use the geometry's own area when it's entirely within the boundary,
+        # as IncrementalGISProcessor.intersection_area() does
+        if geom.geom_type != 'GeometryCollection' and self.prepared[boundary_id].contains(geom):
+            return geom.area
+
+        return self.geometries[boundary_id].intersection(geom).area
+
+    def intersections(self, geom) -> dict:
+        """
+        Map of ID to whether the boundary intersects the given geometry, and
+        the area of their intersection, for every boundary in the layer, in
+        the same shape as Zone.get_intersections().
+        """
+        intersections = {boundary_id: (False, 0.0) for boundary_id in self.geometries}
+
+        for boundary_id in self.intersecting(geom):
+            intersections[boundary_id] = (True, self.intersection_area(boundary_id, geom))
+
+        return intersections
+
+
+class BoundaryIndex:
+    """
+    In-memory copy of the zone, district and disinvested area boundaries,
+    which change rarely, but are read by every GIS recompute. Each layer is
+    loaded from the database the first time it's used.
+    """
+    DISTRICT_MODELS = {
+        'house_districts': HouseDistrict,
+        'senate_districts': SenateDistrict,
+        'commissioner_districts': CommissionerDistrict,
+    }
+
+    @cached_property
+    def zones(self) -> BoundaryLayer:
+        return BoundaryLayer.from_model(Zone)
+
+    @cached_property
+    def districts(self) -> dict:
+        """
+        Map of Project attribute, e.g., "house_districts", to its layer.
+        """
+        return {
+            attribute: BoundaryLayer.from_model(model)
+            for attribute, model in self.DISTRICT_MODELS.items()
+        }
+
+    def layer(self, attribute) -> BoundaryLayer:
+        """
+        The layer of the boundaries of a Project relation, e.g., "zones".
+        """
+        if attribute == 'zones':
+            return self.zones
+
+        return self.districts[attribute]
+
+    @cached_property
+    def disinvested_areas(self) -> BoundaryLayer:
+        return BoundaryLayer.from_model(DisinvestedArea, field='geom')
+
+    def disinvested_area(self, geoms) -> float:
+        """
+        In-memory equivalent of ProjectScore.calculate_disinvested_area().
+        """
+        if not self.disinvested_areas.geometries:
+            # The area hasn't been synced, so measure it as the database does
+            return ProjectScore.calculate_disinvested_area(geoms)
+
+        disinvested_area = 0
+
+        for geom in geoms:
+            if geom:
+                geometries_with_buffer = geom.buffer(ProjectScore.DISINVESTED_AREA_BUFFER)
+                if geometries_with_buffer:
+                    for boundary_id in self.disinvested_areas.intersecting(geometries_with_buffer):
+                        disinvested_area += self.disinvested_areas.intersection_area(
+                            boundary_id, geometries_with_buffer
+                        )
+
+        return disinvested_area
+
+
+def get_boundary_index():
+    """
+    Return this process' boundary index, or None if BOUNDARY_INDEX is off.
+
+    The index is rebuilt after a boundary changes, and at least every
+    BOUNDARY_INDEX_TIMEOUT seconds, since the disinvested areas are maintained
+    outside of this application.
+    """
+    if not settings.BOUNDARY_INDEX:
+        return None
+
+    key = (boundary_data_version.get(), _local_generation)
+
+    with _index_lock:
+        if _index['key'] != key or time.monotonic() >= _index['expires']:
+            _index.update(
+                key=key,
+                expires=time.monotonic() + settings.BOUNDARY_INDEX_TIMEOUT,
+                index=BoundaryIndex(),
+            )
+
+        return _index['index']
+
+
+def invalidate_boundary_index():
+    global _local_generation
+
+    with _index_lock:
+        _local_generation += 1
+
+    boundary_data_version.bump()
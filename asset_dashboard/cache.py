@@ -0,0 +1,37 @@
+import time
+
+from django.core.cache import cache
+
+
+class DataVersion:
+    """
+    A counter kept in the site cache and bumped whenever the data it describes
+    changes. Values derived from that data can be cached under the current
+    version, so that bumping it invalidates them for every worker at once.
+    """
+
+    def __init__(self, name):
+        self.key = f'data-version:{name}'
+
+    def get(self):
+        """
+        Return the current version, or None if the configured cache backend
+        does not keep values, e.g., the DummyCache used in development.
+        """
+        version = cache.get(self.key)
+
+        if version is None:
+            # Seed the counter with the current time, rather than 1, so that a
+            # counter lost to a cache flush or cull does not repeat a version
+            # that a worker already cached values under.
+            cache.add(self.key, time.time_ns(), timeout=None)
+            version = cache.get(self.key)
+
+        return version
+
+    def bump(self):
+        try:
+            cache.incr(self.key)
+        except ValueError:
+            # The counter does not exist yet, or was flushed
+            cache.set(self.key, time.time_ns(), timeout=None)
@@ -1,75 +1,322 @@
-from django.contrib.auth.models import User
-from django.db.models import Q
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from rest_framework import viewsets
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.utils import OperationalError
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, OuterRef, Subquery, Case, When, Value, IntegerField, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+
+from rest_framework import viewsets, generics
+from rest_framework.decorators import action
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
 from asset_dashboard.models import Phase, Portfolio, PortfolioPhase, Project, \
-    LocalAsset, Buildings, TrailsInfo, PoiInfo, PicnicGroves, FundingStream
+    LocalAsset, Buildings, TrailsInfo, PoiInfo, PicnicGroves, FundingStream, GISJob, \
+    Trails, PointsOfInterest, ParkingLots, AssetSearchIndex
 from asset_dashboard.serializers import PortfolioSerializer, UserSerializer, \
     PortfolioPhaseSerializer, PhaseSerializer, ProjectSerializer, \
-    BuildingsSerializer, TrailsSerializer, LocalAssetWriteSerializer, LocalAssetReadSerializer, \
+    BuildingsSerializer, TrailsSerializer, LocalAssetWriteSerializer, LocalAssetGeoJSONSerializer, \
     PointsOfInterestSerializer, PicnicGrovesSerializer, ParkingLotsSerializer, \
-    PromotePhaseSerializer, CountywideSerializer, FundingStreamSerializer
+    PromotePhaseSerializer, CountywideSerializer, FundingStreamSerializer, GISJobSerializer, \
+    PortfolioScenarioSerializer, OmittedGeometryField
+from asset_dashboard.geometry import as_geojson, zoom_tolerance, zoom_precision, MAX_ZOOM
+from asset_dashboard.pagination import PlannerPhasePagination, KeysetPagination, \
+    FeatureCollectionPagination, PortfolioPhasePagination
+from asset_dashboard.planner import PlannerPayload
+from asset_dashboard.renderers import NDJSONRenderer, GeoJSONRenderer
+from asset_dashboard.signals import recalculate_phases_gis, invalidate_planner
+from asset_dashboard.suggestions import get_suggestion_index
+from asset_dashboard.tiles import LAYERS as TILE_LAYERS, get_tile, is_valid_tile, \
+    invalidate_local_asset_tiles
+from asset_dashboard.totals import PortfolioTotals
+
+
+# Runs the searches of each asset type when every type is searched. Shared by
+# every request, so that searches that time out can't pile up threads, and
+# connections, without bound.
+asset_search_executor = ThreadPoolExecutor(
+    max_workers=settings.ALL_ASSET_SEARCH_WORKERS, thread_name_prefix='asset-search'
+)
+
+
+class FilterLookupsMixin:
+    """
+    Filter list responses by the query parameters in filter_lookups, a map of
+    parameter to the lookup of an ID it filters on, e.g., {'phase': 'phase'}.
+    Each parameter may be given more than once, e.g., ?phase=1&phase=2.
+    """
+    filter_lookups = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        for param, lookup in self.filter_lookups.items():
+            if values := self.request.query_params.getlist(param):
+                if not all(value.isdigit() for value in values):
+                    raise ValidationError({param: 'IDs must be whole numbers.'})
+
+                queryset = queryset.filter(**{f'{lookup}__in': values})
+
+        return queryset
+
+
+class SparseFieldsetMixin:
+    """
+    Limit list and detail responses to the fields named by ?fields=, e.g.,
+    ?fields=id,name, or to all but those named by ?omit=, and select only the
+    columns that those fields read. Omitted geometries are null, since every
+    GeoJSON feature has one.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+
+        if self.action in self.sparse_actions:
+            self.prune_fields(getattr(serializer, 'child', serializer))
+
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        if self.action in self.sparse_actions and self.is_sparse:
+            queryset = queryset.only(*self.selected_columns(queryset.model))
+
+        return queryset
+
+    @property
+    def is_sparse(self):
+        return 'fields' in self.request.query_params or 'omit' in self.request.query_params
+
+    def includes_field(self, name):
+        return self.included_fields([name]) == [name]
+
+    def included_fields(self, names) -> list:
+        fields = self.request.query_params.get('fields')
+        omit = self.request.query_params.get('omit')
+
+        if fields is not None:
+            names = [name for name in names if name in fields.split(',')]
+
+        if omit is not None:
+            names = [name for name in names if name not in omit.split(',')]
+
+        return names
+
+    def prune_fields(self, serializer):
+        fields = serializer.fields
+        requested = set(
+            self.request.query_params.get('fields', '').split(',')
+            + self.request.query_params.get('omit', '').split(',')
+        ) - {''}
+
+        if unknown := requested - set(fields):
+            raise ValidationError(f'Unknown field(s): {", ".join(sorted(unknown))}.')
+
+        included = set(self.included_fields(list(fields)))
+        geo_field = getattr(serializer.Meta, 'geo_field', None)
 
+        # GeoJSON features always have an ID and a geometry
+        for name in [name for name in fields if name not in included]:
+            if name == geo_field:
+                fields[name] = OmittedGeometryField()
+            elif name != getattr(serializer.Meta, 'id_field', None):
+                fields.pop(name)
 
-class PortfolioViewSet(viewsets.ModelViewSet):
+    def selected_columns(self, model) -> set:
+        """
+        The columns that the included fields read. Fields that don't read a
+        column of the model, e.g., nested lists of related rows, annotations,
+        and method fields, which are assumed to read neither, are skipped.
+        """
+        columns = {model._meta.pk.name}
+        serializer = self.get_serializer()
+
+        for field in getattr(serializer, 'child', serializer).fields.values():
+            if field.source == '*':
+                continue
+
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                continue
+
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+
+        return columns
+
+
+class PortfolioViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Portfolio.objects.all()
     serializer_class = PortfolioSerializer
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        # Read the phases of every portfolio at once, with all of each
+        # portfolio's phases, so that they can be numbered in a single pass
+        return super().get_queryset().prefetch_related(
+            Prefetch('phases', queryset=PortfolioPhase.objects.with_whole_sequences())
+        )
+
+    @action(detail=True, methods=['get', 'post'])
+    def totals(self, request, pk=None):
+        """
+        Budget totals of the portfolio, as shown under the planner. Accepts a
+        budget_cap, as a query parameter or in the body of a POST, to also
+        return where the cut line falls. A POST may also list the phases of a
+        hypothetical portfolio, in order, in place of the saved ones.
+        """
+        portfolio = self.get_object()
+
+        data = request.data if request.method == 'POST' else request.query_params
+        serializer = PortfolioScenarioSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        phases = serializer.validated_data.get('phases')
+
+        if phases is None:
+            totals = PortfolioTotals.for_portfolio(portfolio)
+        else:
+            totals = PortfolioTotals(
+                (phase['phase'], phase['phase_funding_stream']) for phase in phases
+            )
+
+        return Response(totals.scenario(budget_cap=serializer.validated_data.get('budget_cap')))
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
 
-class PortfolioPhaseViewSet(viewsets.ModelViewSet):
+class PortfolioPhaseViewSet(FilterLookupsMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PortfolioPhase.objects.all()
     serializer_class = PortfolioPhaseSerializer
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = PortfolioPhasePagination
+    filter_lookups = {'portfolio': 'portfolio', 'phase': 'phase'}
 
 
-class PhaseViewSet(viewsets.ModelViewSet):
+class PhaseViewSet(FilterLookupsMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Phase.objects.all()
     serializer_class = PhaseSerializer
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_lookups = {'project': 'project'}
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
 
-class AssetViewSet(viewsets.ModelViewSet):
+class SimplifiedGeometryMixin:
+    """
+    Encode geometries for the map, simplified to the detail it can show at the
+    requested zoom level, if any, or to the given tolerance, in feet.
+    """
+
+    def geojson(self, field='geom'):
+        zoom = self.request.query_params.get('zoom')
+        tolerance = self.request.query_params.get('tolerance')
+
+        try:
+            zoom = int(zoom) if zoom is not None else None
+            tolerance = float(tolerance) if tolerance is not None else None
+        except ValueError:
+            raise ValidationError('zoom must be an integer, and tolerance a number.')
+
+        if zoom is not None and not 0 <= zoom <= MAX_ZOOM:
+            raise ValidationError(f'zoom must be between 0 and {MAX_ZOOM}.')
+
+        if tolerance is not None and (not math.isfinite(tolerance) or tolerance < 0):
+            raise ValidationError('tolerance must be a finite number, and not negative.')
+
+        if zoom is None:
+            return as_geojson(field, tolerance=tolerance)
+
+        return as_geojson(
+            field,
+            tolerance=zoom_tolerance(zoom) if tolerance is None else tolerance,
+            precision=zoom_precision(zoom)
+        )
+
+
+class AssetViewSet(SparseFieldsetMixin, SimplifiedGeometryMixin, viewsets.ModelViewSet):
     queryset = Buildings.objects.all()
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = [GeoJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = FeatureCollectionPagination
+
+    ASSET_TYPES = ('buildings', 'trails', 'points_of_interest', 'picnic_groves', 'parking_lots')
+
+    SUGGESTION_LIMIT = 10
+    MAX_SUGGESTION_LIMIT = 50
+
+    # Results of each asset type in a search of every asset type
+    ALL_ASSET_TYPES_LIMIT = 20
+    MAX_ALL_ASSET_TYPES_LIMIT = 100
+
+    # Set on the copies of the view that search each asset type, when every
+    # asset type is searched
+    selected_asset_type = None
 
     @property
     def asset_type(self):
-        return self.request.query_params.get('asset_type', 'buildings')
+        return self.selected_asset_type or self.request.query_params.get('asset_type', 'buildings')
 
     @property
     def model_cls(self):
+        """
+        The model searched for each asset type, the relations its serializer
+        reads, and, for assets whose geometry lives in another table, the
+        rows to read it from, so that a search is a single query.
+        """
         return {
             'buildings': {'model': Buildings},
-            'trails': {'model': TrailsInfo},
-            'points_of_interest': {'model': PoiInfo},
-            'picnic_groves': {'model': PicnicGroves},
-            'parking_lots': {'model': PoiInfo}
-        }.get(self.asset_type, Buildings)
+            'trails': {
+                'model': TrailsInfo,
+                'geom': Trails.objects.filter(trail_info=OuterRef('pk')),
+            },
+            'points_of_interest': {
+                'model': PoiInfo,
+                'select_related': ('nameid',),
+                'geom': PointsOfInterest.objects.filter(id=OuterRef('pointsofinterest_id')),
+            },
+            'picnic_groves': {
+                'model': PicnicGroves,
+                'select_related': ('poi_info__nameid',),
+            },
+            'parking_lots': {
+                'model': PoiInfo,
+                'select_related': ('nameid',),
+                'geom': ParkingLots.objects.filter(id=OuterRef('parking_info__lot_id')),
+            },
+        }.get(self.asset_type, {'model': Buildings})
 
     @property
     def serializer_cls(self):
@@ -85,6 +332,9 @@ class AssetViewSet(viewsets.ModelViewSet):
         return self.serializer_cls
 
     def get_queryset(self, *args, **kwargs):
+        return self.asset_queryset().filter(self.search_filter())
+
+    def search_filter(self):
         search_filter = Q()
 
         if query := self.request.query_params.get('q', False):
@@ -103,19 +353,301 @@ class AssetViewSet(viewsets.ModelViewSet):
                 # model.Search doesn't have 'and_fields' attribute
                 pass
 
-        return self.model_cls.get('model').objects.filter(search_filter)
+        return search_filter
+
+    def asset_queryset(self):
+        queryset = self.model_cls.get('model').objects\
+            .select_related(*self.model_cls.get('select_related', ()))
+
+        geoms = self.model_cls.get('geom')
+
+        if geoms is None:
+            queryset = queryset.defer('geom')
+
+        if not self.includes_field('geom'):
+            return queryset
+
+        if geoms is not None:
+            return queryset.annotate(
+                geojson=Subquery(geoms.annotate(geojson=self.geojson()).values('geojson')[:1])
+            )
+
+        return queryset.annotate(geojson=self.geojson())
+
+    @action(detail=False)
+    def suggest(self, request):
+        """
+        Names of assets starting with the given prefix, or with a word
+        starting with it, with their asset types and identifiers, for
+        suggesting searches as they are typed. Geometries are only read once
+        a search is run.
+        """
+        prefix = request.query_params.get('prefix', '')
+        asset_type = request.query_params.get('asset_type')
+
+        if asset_type == 'all':
+            asset_type = None
+        limit = request.query_params.get('limit', str(self.SUGGESTION_LIMIT))
+
+        if not limit.isdigit() or not 0 < int(limit) <= self.MAX_SUGGESTION_LIMIT:
+            raise ValidationError({'limit': f'Must be a whole number from 1 to {self.MAX_SUGGESTION_LIMIT}.'})
+
+        suggestions = get_suggestion_index().suggest(prefix, limit=int(limit), asset_type=asset_type)
+
+        return Response({
+            'suggestions': [
+                {'identifier': identifier, 'asset_type': asset_type, 'name': name}
+                for name, asset_type, identifier in suggestions
+            ]
+        })
+
+    def list(self, request, *args, **kwargs):
+        """
+        Search the local index of the model's assets, when it has been synced,
+        then read the assets of the returned page from the GIS database.
+        """
+        query = request.query_params.get('q')
+        model = self.model_cls.get('model')
+
+        if self.asset_type == 'all':
+            return self.search_all(query or '')
+
+        if not query or not AssetSearchIndex.is_synced(model):
+            return super().list(request, *args, **kwargs)
+
+        matches = self.paginate_queryset(AssetSearchIndex.search(model, query).only('asset_id'))
+        serializer = self.get_serializer(self.indexed_assets(matches), many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    def indexed_assets(self, matches) -> list:
+        """
+        The assets of the given AssetSearchIndex rows, in the same order.
+        Assets removed from the GIS database since the index was synced are
+        skipped.
+        """
+        asset_ids = [match.asset_id for match in matches]
+        assets = self.filter_queryset(self.asset_queryset()).in_bulk(asset_ids)
+
+        return [assets[asset_id] for asset_id in asset_ids if asset_id in assets]
+
+    def search_all(self, query):
+        """
+        Search every asset type at once, in parallel, returning up to ?limit=
+        assets of each type, ranked by how closely their names match. Types
+        whose search doesn't finish within ALL_ASSET_SEARCH_TIMEOUT seconds
+        are listed in timed_out, and the results are flagged as partial.
+        """
+        limit = self.request.query_params.get('limit', str(self.ALL_ASSET_TYPES_LIMIT))
+
+        if not limit.isdigit() or not 0 < int(limit) <= self.MAX_ALL_ASSET_TYPES_LIMIT:
+            raise ValidationError({'limit': f'Must be a whole number from 1 to {self.MAX_ALL_ASSET_TYPES_LIMIT}.'})
+
+        timeout = settings.ALL_ASSET_SEARCH_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        futures = {
+            asset_search_executor.submit(self.search_in_thread, asset_type, query, int(limit), deadline): asset_type
+            for asset_type in self.ASSET_TYPES
+        }
+        done, not_done = wait(futures, timeout=timeout)
+
+        # The executor is shared, so rather than shut it down, cancel the
+        # searches that haven't started. Those that are still running are
+        # cancelled by their statement timeout.
+        for future in not_done:
+            future.cancel()
 
+        features = []
+        timed_out = []
 
-class LocalAssetViewSet(viewsets.ModelViewSet):
+        for future, asset_type in futures.items():
+            try:
+                if future not in done:
+                    raise TimeoutError
+                features += future.result()
+            except (TimeoutError, OperationalError):
+                timed_out.append(asset_type)
+
+        return Response(OrderedDict([
+            ('type', 'FeatureCollection'),
+            ('partial', bool(timed_out)),
+            ('timed_out', timed_out),
+            ('features', sorted(features, key=lambda feature: self.rank(query, feature))),
+        ]))
+
+    def search_in_thread(self, asset_type, query, limit, deadline) -> list:
+        try:
+            # The search may have waited for a free thread
+            timeout = deadline - time.monotonic()
+
+            if timeout <= 0:
+                raise TimeoutError
+
+            # Both the asset search index and the GIS database may be read
+            for alias in ('default', 'fp_postgis'):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SET statement_timeout = %s', [max(int(timeout * 1000), 1)])
+
+            return self.search_asset_type(asset_type, query, limit)
+        finally:
+            # Django only closes the connections of the thread that served
+            # the request, and the executor's threads outlive it, so each
+            # search closes the ones it opened
+            connections.close_all()
+
+    def search_asset_type(self, asset_type, query, limit) -> list:
+        """
+        The features of the first assets of the type matching the search, each
+        with its asset type.
+        """
+        view = type(self)(
+            request=self.request,
+            args=self.args,
+            kwargs=self.kwargs,
+            format_kwarg=self.format_kwarg,
+            action=self.action,
+            selected_asset_type=asset_type,
+        )
+
+        model = view.model_cls.get('model')
+
+        # Rank the matches before taking the first of them, so that the best
+        # matches of each type aren't cut off by ones that come before them
+        if AssetSearchIndex.is_synced(model):
+            matches = AssetSearchIndex.search(model, query)\
+                .annotate(match_rank=self.rank_expression('name', query))\
+                .order_by('match_rank', 'pk')[:limit]
+
+            assets = view.indexed_assets(matches)
+        else:
+            assets = view.filter_queryset(view.get_queryset())\
+                .annotate(match_rank=self.rank_expression(model.Search.name_field, query))\
+                .order_by('match_rank', 'pk')[:limit]
+
+        return [
+            OrderedDict(feature, properties=OrderedDict(feature['properties'], asset_type=asset_type))
+            for feature in view.get_serializer(assets, many=True).data['features']
+        ]
+
+    @staticmethod
+    def rank(query, feature) -> int:
+        """
+        How closely the name of an asset matches the search, from exact
+        matches, to matches of the start of its name or of one of its words,
+        to matches anywhere else, e.g., of its identifier.
+        """
+        query = AssetSearchIndex.normalize(query)
+        name = AssetSearchIndex.normalize(feature['properties'].get('name') or '')
+
+        if name == query:
+            return 0
+        elif name.startswith(query):
+            return 1
+        elif f' {query}' in name:
+            return 2
+        elif query in name:
+            return 3
+
+        return 4
+
+    @staticmethod
+    def rank_expression(field, query) -> Case:
+        """
+        The rank() of the name in the given field, computed by the database.
+        """
+        query = AssetSearchIndex.normalize(query)
+        return Case(
+            When(Q(**{f'{field}__iexact': query}), then=Value(0)),
+            When(Q(**{f'{field}__istartswith': query}), then=Value(1)),
+            When(Q(**{f'{field}__icontains': f' {query}'}), then=Value(2)),
+            When(Q(**{f'{field}__icontains': query}), then=Value(3)),
+            default=Value(4),
+            output_field=IntegerField(),
+        )
+
+
+class LocalAssetViewSet(FilterLookupsMixin, SparseFieldsetMixin, SimplifiedGeometryMixin, viewsets.ModelViewSet):
     queryset = LocalAsset.objects.all()
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = [GeoJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = FeatureCollectionPagination
+    filter_lookups = {'phase': 'phase', 'project': 'phase__project'}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.defer('geom')
+
+            if self.includes_field('geom'):
+                queryset = queryset.annotate(geojson=self.geojson())
+
+        return queryset
 
     def get_serializer(self, *args, **kwargs):
         if isinstance(kwargs.get('data', {}), list):
             kwargs['many'] = True
         return super().get_serializer(*args, **kwargs)
 
+    def create(self, request, *args, **kwargs):
+        self.gis_recompute_time = None
+
+        response = super().create(request, *args, **kwargs)
+
+        if self.gis_recompute_time is not None:
+            response['Server-Timing'] = server_timing(self.gis_recompute_time)
+
+        return response
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+        # Set when a list of assets is created at once
+        self.gis_recompute_time = getattr(serializer, 'gis_recompute_time', None)
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """
+        Delete the assets with the given IDs, then recompute the GIS
+        measurements once per affected phase.
+        """
+        ids = request.data.get('ids')
+
+        # bool is a subclass of int, so check the exact type
+        if not isinstance(ids, list) or not all(type(asset_id) is int for asset_id in ids):
+            return Response(
+                {'ids': ['A list of asset IDs is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            assets = LocalAsset.objects.filter(id__in=ids)
+            phases = list(Phase.objects.filter(localasset__in=assets).distinct())
+
+            # Nothing references assets, so delete them in a single statement,
+            # rather than loading each one to send post_delete, whose receivers
+            # would recompute the GIS measurements and bump the tile and
+            # planner versions once per asset
+            deleted = assets._raw_delete(assets.db)
+
+            start = time.perf_counter()
+            recalculate_phases_gis(phases)
+            gis_recompute_time = time.perf_counter() - start
+
+        # The raw delete doesn't send post_delete
+        invalidate_planner()
+        invalidate_local_asset_tiles()
+
+        response = Response({
+            'deleted': deleted,
+            'gis_recompute_ms': round(gis_recompute_time * 1000, 1),
+        })
+        response['Server-Timing'] = server_timing(gis_recompute_time)
+
+        return response
+
     def get_serializer_class(self):
         """
         Get the appropriate serializer class depending on request type.
@@ -123,7 +655,11 @@ class LocalAssetViewSet(viewsets.ModelViewSet):
         """
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return LocalAssetWriteSerializer
-        return LocalAssetReadSerializer
+        return LocalAssetGeoJSONSerializer
+
+
+def server_timing(gis_recompute_time):
+    return f'gis;desc="GIS recompute";dur={gis_recompute_time * 1000:.1f}'
 
 
 class PromotePhaseView(APIView):
@@ -165,3 +701,101 @@ class FundingStreamView(APIView):
             funding_stream = serializer.save()
             return Response(funding_stream, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class GISJobStatusView(APIView):
+    """
+    Status of the latest GIS recompute job for a phase, so that the UI can
+    tell the user its measurements are being recalculated. Responds with
+    null if no job was ever queued for the phase.
+    """
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, format=None):
+        job = GISJob.latest_for_phase(pk)
+
+        if job is None:
+            return Response(None)
+
+        return Response(GISJobSerializer(job).data)
+
+
+class TileView(APIView):
+    """
+    Mapbox Vector Tiles of the GIS asset layers and of the saved assets, so
+    that maps can show the full inventory without loading it as GeoJSON.
+    """
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, layer, z, x, y, format=None):
+        if layer not in TILE_LAYERS or not is_valid_tile(z, x, y):
+            raise NotFound('No such tile.')
+
+        return HttpResponse(get_tile(layer, z, x, y), content_type='application/vnd.mapbox-vector-tile')
+
+
+class PlannerPhaseView(generics.ListAPIView):
+    """
+    Planner rows for the CIP planner, either in cursor-paginated pages or, with
+    ?format=ndjson, streamed as newline-delimited JSON.
+    """
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = PlannerPhasePagination
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, NDJSONRenderer]
+
+    # Map of query parameter to the Phase lookup it filters on. Each parameter
+    # may be given more than once, e.g., ?zone=North&zone=South.
+    filter_lookups = {
+        'year': 'year',
+        'section': 'project__section_owner__name',
+        'category': 'project__category__name',
+        'status': 'status',
+        'zone': 'project__zones__name',
+    }
+
+    # Number of phases serialized at a time when streaming
+    stream_chunk_size = 500
+
+    def get_queryset(self):
+        queryset = Phase.objects.all()
+
+        for param, lookup in self.filter_lookups.items():
+            if values := self.request.query_params.getlist(param):
+                queryset = queryset.filter(**{f'{lookup}__in': values})
+
+        if 'zone' in self.request.query_params:
+            # Projects can be in more than one zone
+            queryset = queryset.distinct()
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if not all(year.isdigit() for year in request.query_params.getlist('year')):
+            raise ValidationError({'year': 'Year must be a whole number.'})
+
+        queryset = self.get_queryset()
+
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return StreamingHttpResponse(
+                self.stream_rows(queryset),
+                content_type=NDJSONRenderer.media_type
+            )
+
+        page = self.paginate_queryset(queryset.only('id'))
+        rows = self.build_rows([phase.id for phase in page])
+
+        return self.get_paginated_response(rows)
+
+    def stream_rows(self, queryset):
+        phase_ids = list(queryset.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(phase_ids), self.stream_chunk_size):
+            for row in self.build_rows(phase_ids[start:start + self.stream_chunk_size]):
+                yield NDJSONRenderer.encode_line(row)
+
+    def build_rows(self, phase_ids):
+        phases = Phase.objects.filter(id__in=phase_ids).order_by('id')
+        return PlannerPayload(phases).build()
@@ -0,0 +1,56 @@
+import math
+
+from django.contrib.gis.db.models.functions import AsGeoJSON, GeomOutputGeoFunc, Transform
+
+
+# Web Mercator tiles are 256 pixels across, and the equator is this many
+# meters around
+TILE_SIZE = 256
+EARTH_CIRCUMFERENCE = 40075016.686
+
+# Cook County's latitude, where the map is centered
+MAP_LATITUDE = 41.8
+
+FEET_PER_METER = 3.28084
+
+MAX_ZOOM = 22
+MAX_PRECISION = 8
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    """
+    Simplify a geometry, keeping it valid, e.g., without collapsing polygons
+    or making their rings cross.
+    """
+    function = 'ST_SimplifyPreserveTopology'
+
+
+def zoom_tolerance(zoom) -> float:
+    """
+    The width of a pixel at the given Leaflet zoom level, in the feet of the
+    3435 projection. Detail smaller than that can't be seen on the map.
+    """
+    meters_per_pixel = EARTH_CIRCUMFERENCE * math.cos(math.radians(MAP_LATITUDE)) / (TILE_SIZE * 2 ** zoom)
+
+    return meters_per_pixel * FEET_PER_METER
+
+
+def zoom_precision(zoom) -> int:
+    """
+    The number of decimal places of longitude and latitude needed to place a
+    point within a pixel at the given zoom level.
+    """
+    degrees_per_pixel = 360 / (TILE_SIZE * 2 ** zoom)
+
+    return min(math.ceil(-math.log10(degrees_per_pixel)), MAX_PRECISION)
+
+
+def as_geojson(field='geom', tolerance=None, precision=MAX_PRECISION):
+    """
+    Encode a geometry as GeoJSON, in the coordinates Leaflet expects, in the
+    query, rather than transforming and encoding it in Python. Given a
+    tolerance, in feet, the geometry is simplified first.
+    """
+    geom = SimplifyPreserveTopology(field, tolerance) if tolerance else field
+
+    return AsGeoJSON(Transform(geom, 4326), precision=precision)
@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from asset_dashboard.boundaries import invalidate_boundary_index
+from asset_dashboard.models import Phase
+from asset_dashboard.signals import ProjectGISProcessor
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time full GIS recomputes of a phase with and without the in-memory "
+        "boundary index. Nothing is saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--phase',
+            type=int,
+            help='ID of the phase to recompute. Defaults to the phase with the most assets.'
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=10,
+            help='Number of times to recompute the phase in each mode.'
+        )
+
+    def handle(self, *args, **options):
+        phase = self.get_phase(options['phase'])
+
+        self.stdout.write(
+            f'Recomputing phase {phase.id} ({phase.project}), '
+            f'{phase.localasset_set.count()} asset(s), {options["runs"]} time(s) per mode.'
+        )
+
+        with override_settings(BOUNDARY_INDEX=False):
+            database = self.time_rebuilds(phase, options['runs'])
+
+        with override_settings(BOUNDARY_INDEX=True):
+            invalidate_boundary_index()
+            (cold,) = self.time_rebuilds(phase, 1)
+            indexed = self.time_rebuilds(phase, options['runs'])
+
+        self.report('Database', database)
+        self.report('Boundary index', indexed)
+        self.stdout.write(f'First recompute with the index, including loading it: {cold * 1000:.1f} ms')
+        self.stdout.write(
+            f'Speedup: {statistics.median(database) / statistics.median(indexed):.1f}x'
+        )
+
+    def get_phase(self, phase_id):
+        phases = Phase.objects.select_related('project')
+
+        if phase_id:
+            phase = phases.filter(id=phase_id).first()
+        else:
+            phase = phases.annotate(asset_count=Count('localasset'))\
+                          .filter(asset_count__gt=0)\
+                          .order_by('-asset_count')\
+                          .first()
+
+        if phase is None:
+            raise CommandError('No phase with assets to recompute.')
+
+        return phase
+
+    def time_rebuilds(self, phase, runs) -> list:
+        timings = []
+
+        for _ in range(runs):
+            start = time.perf_counter()
+
+            try:
+                with transaction.atomic():
+                    ProjectGISProcessor(phase=phase).rebuild()
+                    timings.append(time.perf_counter() - start)
+                    raise Rollback
+            except Rollback:
+                pass
+
+        return timings
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f'{label}: median {statistics.median(timings) * 1000:.1f} ms, '
+            f'min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms'
+        )
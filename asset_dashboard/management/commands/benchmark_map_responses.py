@@ -0,0 +1,79 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from asset_dashboard.endpoints import AssetViewSet, LocalAssetViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the size and render time of asset search and local asset "
+        "responses at full precision and at the given map zoom levels."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--query',
+            action='append',
+            default=[],
+            help='Search to run against each asset type. May be given more than once. Defaults to "trail".'
+        )
+        parser.add_argument(
+            '--asset-type',
+            action='append',
+            default=[],
+            help='Asset type to search. May be given more than once. Defaults to every type.'
+        )
+        parser.add_argument(
+            '--zoom',
+            type=int,
+            action='append',
+            default=[],
+            help='Zoom level to simplify to. May be given more than once. Defaults to 10, 13 and 16.'
+        )
+
+    def handle(self, *args, **options):
+        queries = options['query'] or ['trail']
+        asset_types = options['asset_type'] or AssetViewSet.ASSET_TYPES
+        zooms = options['zoom'] or [10, 13, 16]
+
+        # Requests are authenticated, but never saved
+        self.user = User(username='benchmark')
+
+        for query in queries:
+            for asset_type in asset_types:
+                self.benchmark(
+                    f'Search for "{query}" in {asset_type}',
+                    AssetViewSet,
+                    '/assets/',
+                    {'q': query, 'asset_type': asset_type},
+                    zooms
+                )
+
+        self.benchmark('Local assets', LocalAssetViewSet, '/local-assets/', {}, zooms)
+
+    def benchmark(self, label, viewset, path, params, zooms):
+        full_size, full_time = self.render(viewset, path, params)
+
+        self.stdout.write(f'{label}: {full_size / 1024:.1f} KB in {full_time * 1000:.1f} ms at full precision')
+
+        for zoom in zooms:
+            size, elapsed = self.render(viewset, path, {**params, 'zoom': zoom})
+            reduction = 1 - size / full_size if full_size else 0
+
+            self.stdout.write(
+                f'  zoom {zoom}: {size / 1024:.1f} KB ({reduction:.0%} smaller) in {elapsed * 1000:.1f} ms'
+            )
+
+    def render(self, viewset, path, params):
+        request = APIRequestFactory().get(path, params, format='json')
+        force_authenticate(request, user=self.user)
+
+        start = time.perf_counter()
+        response = viewset.as_view({'get': 'list'})(request)
+        response.render()
+        elapsed = time.perf_counter() - start
+
+        return len(response.content), elapsed
@@ -0,0 +1,143 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import RequestFactory
+
+from asset_dashboard.models import Project
+from asset_dashboard.views import ProjectListJson
+
+
+WORDS = [
+    'trail', 'bridge', 'parking', 'lot', 'culvert', 'shelter', 'grove', 'restroom',
+    'boardwalk', 'erosion', 'reconstruction', 'resurfacing', 'repair', 'replacement',
+    'drainage', 'signage', 'fence', 'roof', 'woods', 'prairie', 'savanna', 'lake',
+    'creek', 'forest', 'preserve', 'habitat', 'restoration', 'accessibility', 'lighting',
+]
+
+MANAGERS = ['Sylvia Manager', 'Ramon Ortiz', 'Dana Whitfield', 'Priya Natarajan', 'Lee Chen']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time project list searches against the indexed search and the table "
+        "scan it replaced, with the given numbers of synthetic projects. "
+        "Nothing is saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--projects',
+            type=int,
+            action='append',
+            default=[],
+            help='Number of synthetic projects to search. May be given more than once. Defaults to 10000 and 100000.'
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            default=[],
+            help='Search to run. May be given more than once. Defaults to "recon", "trail bridge" and "struct".'
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=10,
+            help='Number of times to run each search.'
+        )
+
+    def handle(self, *args, **options):
+        sizes = options['projects'] or [10000, 100000]
+        queries = options['query'] or ['recon', 'trail bridge', 'struct']
+
+        # Requests are authenticated, but never saved
+        self.user = User(username='benchmark')
+
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    self.create_projects(size)
+
+                    self.stdout.write(f'{Project.objects.count()} projects:')
+
+                    for query in queries:
+                        self.report(f'  "{query}", indexed', self.time_searches(query, options['runs']))
+                        self.report(f'  "{query}", table scan', self.time_scans(query, options['runs']))
+
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def create_projects(self, count):
+        random.seed(count)
+
+        def words(count):
+            return ' '.join(random.choice(WORDS) for _ in range(count)).capitalize()
+
+        Project.objects.bulk_create(
+            (
+                Project(
+                    name=words(3),
+                    description=words(60),
+                    project_manager=random.choice(MANAGERS),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Project._meta.db_table}')
+
+    def time_searches(self, query, runs) -> list:
+        """
+        Time the first page of the project list, as the datatable requests
+        it, including both of its counts.
+        """
+        view = ProjectListJson.as_view()
+        timings = []
+
+        for _ in range(runs):
+            request = RequestFactory().get('/projects/json/', {'draw': 1, 'search[value]': query})
+            request.user = self.user
+
+            start = time.perf_counter()
+            view(request)
+            timings.append(time.perf_counter() - start)
+
+        return timings
+
+    def time_scans(self, query, runs) -> list:
+        """
+        Time the filtered count and first page of the search that the project
+        list ran before it was indexed.
+        """
+        scan = Project.objects.filter(
+            Q(id__startswith=query)
+            | Q(name__icontains=query)
+            | Q(description__icontains=query)
+            | Q(project_manager__icontains=query)
+        )
+        timings = []
+
+        for _ in range(runs):
+            start = time.perf_counter()
+            scan.count()
+            list(scan.order_by('id')[:10])
+            timings.append(time.perf_counter() - start)
+
+        return timings
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f'{label}: median {statistics.median(timings) * 1000:.1f} ms, '
+            f'min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms'
+        )
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from asset_dashboard.models import Phase
+from asset_dashboard.signals import ProjectGISProcessor
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the GIS measurements stored for each phase with assets, e.g., "
+        "by incremental updates, with a full recompute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--phase',
+            type=int,
+            action='append',
+            help='ID of a phase to check. Can be given more than once. Defaults to every phase with assets.'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Recompute the measurements of inconsistent phases in full.'
+        )
+
+    def handle(self, *args, **options):
+        phases = Phase.objects.filter(localasset__isnull=False).distinct().order_by('id')
+
+        if options['phase']:
+            phases = phases.filter(id__in=options['phase'])
+
+        inconsistent = 0
+
+        for phase in phases.select_related('project'):
+            processor = ProjectGISProcessor(phase=phase)
+            inconsistencies = processor.find_inconsistencies()
+
+            if not inconsistencies:
+                continue
+
+            inconsistent += 1
+
+            self.stdout.write(f'Phase {phase.id} ({phase.project}):')
+
+            for inconsistency in inconsistencies:
+                self.stdout.write(f'  {inconsistency}')
+
+            if options['fix']:
+                with transaction.atomic():
+                    processor.rebuild()
+
+                self.stdout.write(f'  Recomputed phase {phase.id}.')
+
+        if inconsistent and not options['fix']:
+            raise CommandError(f'Found {inconsistent} inconsistent phase(s).')
+
+        self.stdout.write(f'Checked {phases.count()} phase(s), {inconsistent} inconsistent.')
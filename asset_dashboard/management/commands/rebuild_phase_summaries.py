@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from asset_dashboard.models import Phase, PhaseSummary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the summary of every phase from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of phases to summarize at a time.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        phase_ids = list(Phase.objects.order_by('id').values_list('id', flat=True))
+
+        with transaction.atomic():
+            PhaseSummary.objects.all().delete()
+
+            for start in range(0, len(phase_ids), batch_size):
+                PhaseSummary.objects.bulk_create(
+                    PhaseSummary.summarize(phase_ids[start:start + batch_size])
+                )
+
+        self.stdout.write(f'Successfully rebuilt {len(phase_ids)} phase summaries.')
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from asset_dashboard.models import Project
+from asset_dashboard.signals import invalidate_planner
+
+
+class Command(BaseCommand):
+    help = "Recompute the zones and districts of every project from its assets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of projects to recompute at a time.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        project_ids = list(Project.objects.order_by('id').values_list('id', flat=True))
+
+        start = time.perf_counter()
+        changes = 0
+
+        for batch_start in range(0, len(project_ids), batch_size):
+            batch = project_ids[batch_start:batch_start + batch_size]
+
+            with transaction.atomic():
+                changes += Project.assign_boundaries(batch)
+
+            self.stdout.write(
+                f'Recomputed {batch_start + len(batch)} of {len(project_ids)} projects.'
+            )
+
+        if changes:
+            invalidate_planner()
+
+        elapsed = time.perf_counter() - start
+        rate = len(project_ids) / elapsed if elapsed else 0
+
+        self.stdout.write(
+            f'Successfully recomputed {len(project_ids)} projects in {elapsed:.2f} seconds '
+            f'({rate:.0f} projects per second), changing {changes} zone and district assignments.'
+        )
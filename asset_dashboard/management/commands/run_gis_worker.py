@@ -0,0 +1,64 @@
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from asset_dashboard.models import GISJob, Phase
+from asset_dashboard.signals import ProjectGISProcessor
+
+
+class Command(BaseCommand):
+    help = 'Work off the queue of GIS recompute jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once there are no jobs due, rather than waiting for more.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2,
+            help='Seconds to wait between checks for new jobs.'
+        )
+
+    def handle(self, *args, **options):
+        timeout = timedelta(seconds=settings.GIS_JOB_TIMEOUT)
+
+        while True:
+            GISJob.requeue_stale(timeout)
+
+            job = GISJob.claim()
+
+            if job:
+                self.run(job)
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
+
+    def run(self, job):
+        phase = Phase.objects.filter(id=job.phase_id).select_related('project').first()
+
+        if phase is None:
+            # The phase was deleted after the job was queued
+            job.complete()
+            return
+
+        start = time.perf_counter()
+
+        try:
+            with transaction.atomic():
+                ProjectGISProcessor(phase=phase).rebuild()
+        except Exception:
+            job.fail(traceback.format_exc())
+            self.stderr.write(f'Job {job.id} for phase {phase.id} failed:\n{job.error}')
+        else:
+            job.complete()
+            self.stdout.write(
+                f'Recomputed phase {phase.id} in {time.perf_counter() - start:.2f} seconds.'
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from asset_dashboard.models import AssetSearchIndex
+from asset_dashboard.suggestions import invalidate_suggestion_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the searchable names and identifiers of the GIS assets into the asset search '
+        'index, and rebuild the index of asset names that searches are suggested from.'
+    )
+
+    def handle(self, *args, **options):
+        for model in AssetSearchIndex.sources():
+            rows = AssetSearchIndex.sync(model)
+
+            self.stdout.write(f'Successfully indexed {rows} {model.__name__} rows.')
+
+        invalidate_suggestion_index()
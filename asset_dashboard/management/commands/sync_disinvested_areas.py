@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from asset_dashboard.boundaries import invalidate_boundary_index
+from asset_dashboard.models import DisinvestedArea
+
+
+class Command(BaseCommand):
+    help = 'Copy the disinvested area from the GIS database, subdivided into small pieces.'
+
+    def handle(self, *args, **options):
+        try:
+            pieces = DisinvestedArea.sync()
+        except DatabaseError as e:
+            raise CommandError(f'Could not copy the disinvested area: {e}')
+
+        if pieces is None:
+            # Don't fail the release, which runs this command, over it
+            self.stderr.write(self.style.WARNING(
+                "No 'Both' area in SocioEconomicZones. Kept the disinvested area copied before."
+            ))
+            return
+
+        invalidate_boundary_index()
+
+        self.stdout.write(f'Successfully copied the disinvested area in {pieces} pieces.')
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.19 on 2026-10-18 12:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0049_auto_20250515_2004'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhaseSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_budget', models.DecimalField(decimal_places=0, default=0, max_digits=15)),
+                ('total_funded_amount', models.DecimalField(decimal_places=0, default=0, max_digits=15)),
+                ('funded_by_year', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('cost_by_zone', models.JSONField(default=dict)),
+                ('funded_by_zone', models.JSONField(default=dict)),
+                ('project_name', models.TextField(blank=True, default='')),
+                ('section_name', models.TextField(blank=True, default='')),
+                ('category_name', models.TextField(blank=True, default='')),
+                ('phase', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='asset_dashboard.phase')),
+            ],
+        ),
+    ]
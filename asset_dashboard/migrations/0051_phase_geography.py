@@ -0,0 +1,28 @@
+# Generated by Django 3.2.19 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0050_phasesummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phasezonedistribution',
+            name='zone_distribution_area',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PhaseGeography',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.FloatField(default=0)),
+                ('disinvested_area', models.FloatField(default=0)),
+                ('phase', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='geography', to='asset_dashboard.phase')),
+            ],
+        ),
+    ]
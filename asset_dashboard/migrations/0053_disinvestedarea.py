@@ -0,0 +1,24 @@
+# Generated by Django 3.2.19 on 2026-10-18 14:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0052_gisjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisinvestedArea',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geom', django.contrib.gis.db.models.fields.PolygonField(srid=3435)),
+            ],
+            options={
+                'verbose_name_plural': 'Disinvested Areas',
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.19 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0053_disinvestedarea'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfoliophase',
+            name='rank',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='portfoliophase',
+            name='sequence',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE asset_dashboard_portfoliophase AS portfoliophase
+                SET rank = ranked.position * 65536
+                FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY portfolio_id ORDER BY sequence, id) AS position
+                    FROM asset_dashboard_portfoliophase
+                ) AS ranked
+                WHERE portfoliophase.id = ranked.id
+            """,
+            reverse_sql="""
+                UPDATE asset_dashboard_portfoliophase AS portfoliophase
+                SET sequence = ranked.position
+                FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY portfolio_id ORDER BY rank, id) AS position
+                    FROM asset_dashboard_portfoliophase
+                ) AS ranked
+                WHERE portfoliophase.id = ranked.id
+            """,
+        ),
+        migrations.AlterField(
+            model_name='portfoliophase',
+            name='rank',
+            field=models.BigIntegerField(),
+        ),
+        migrations.RemoveField(
+            model_name='portfoliophase',
+            name='sequence',
+        ),
+        migrations.AddIndex(
+            model_name='portfoliophase',
+            index=models.Index(fields=['portfolio', 'rank'], name='portfoliophase_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.19 on 2026-10-18 15:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0054_portfoliophase_rank'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='portfoliophase',
+            options={'ordering': ['rank']},
+        ),
+    ]
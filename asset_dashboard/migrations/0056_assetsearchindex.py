@@ -0,0 +1,40 @@
+# Generated by Django 3.2.19 on 2026-10-18 16:00
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0055_alter_portfoliophase_options'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='AssetSearchIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_model', models.CharField(max_length=50)),
+                ('asset_id', models.IntegerField()),
+                ('name', models.TextField(null=True)),
+                ('identifier', models.TextField(null=True)),
+                ('search_text', models.TextField()),
+                ('bbox', django.contrib.gis.db.models.fields.GeometryField(null=True, srid=3435)),
+            ],
+            options={
+                'verbose_name_plural': 'Asset Search Index',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='assetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='asset_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='assetsearchindex',
+            constraint=models.UniqueConstraint(fields=('asset_model', 'asset_id'), name='unique_asset_search_index_asset'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.19 on 2026-10-18 17:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Keep each project's search vector up to date on every insert, and on every
+# update that sets one of its words' columns. Django saves set every column.
+SEARCH_VECTOR_TRIGGER = """
+    CREATE FUNCTION asset_dashboard_project_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.project_manager, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER asset_dashboard_project_search_vector
+    BEFORE INSERT OR UPDATE OF name, project_manager, description
+    ON asset_dashboard_project
+    FOR EACH ROW EXECUTE PROCEDURE asset_dashboard_project_search_vector();
+
+    UPDATE asset_dashboard_project SET name = name;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+    DROP TRIGGER asset_dashboard_project_search_vector ON asset_dashboard_project;
+    DROP FUNCTION asset_dashboard_project_search_vector();
+"""
+
+# Indexes of the expressions that ProjectQuerySet.search() filters on, which
+# need operator classes that Django 3.2 can't declare for expressions:
+# LOWER(name) LIKE '%text%', and id::text LIKE 'text%'
+SEARCH_EXPRESSION_INDEXES = """
+    CREATE INDEX project_name_lower_trgm
+    ON asset_dashboard_project USING gin (LOWER(name) gin_trgm_ops);
+
+    CREATE INDEX project_id_text_pattern
+    ON asset_dashboard_project ((id::text) text_pattern_ops);
+"""
+
+DROP_SEARCH_EXPRESSION_INDEXES = """
+    DROP INDEX project_name_lower_trgm;
+    DROP INDEX project_id_text_pattern;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0056_assetsearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='project_search_vector'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.RunSQL(SEARCH_EXPRESSION_INDEXES, DROP_SEARCH_EXPRESSION_INDEXES),
+    ]
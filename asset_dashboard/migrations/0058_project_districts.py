@@ -0,0 +1,96 @@
+# Generated by Django 3.2.19 on 2026-10-18 18:00
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+DISTRICT_RELATIONS = {
+    'house_districts': ('house_district_ids', 'house_district_label'),
+    'senate_districts': ('senate_district_ids', 'senate_district_label'),
+    'commissioner_districts': ('commissioner_district_ids', 'commissioner_district_label'),
+}
+
+
+def copy_districts(apps, schema_editor):
+    """
+    Fill in the district columns of every project, as
+    Project.refresh_districts() does.
+    """
+    Project = apps.get_model('asset_dashboard', 'Project')
+
+    for relation, (ids_column, label_column) in DISTRICT_RELATIONS.items():
+        field = Project._meta.get_field(relation)
+        through = field.remote_field.through._meta.db_table
+        district = field.related_model._meta.db_table
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {Project._meta.db_table} AS project
+                SET {ids_column} = districts.ids, {label_column} = districts.label
+                FROM (
+                    SELECT
+                        t.{source} AS project_id,
+                        array_agg(d.id ORDER BY d.id) AS ids,
+                        string_agg(regexp_replace(d.name, '[^0-9, ]', '', 'g'), ', ' ORDER BY d.id) AS label
+                    FROM {through} AS t
+                    JOIN {district} AS d ON d.id = t.{target}
+                    GROUP BY t.{source}
+                ) AS districts
+                WHERE project.id = districts.project_id
+            """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0057_project_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='commissioner_district_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='commissioner_district_label',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='house_district_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='house_district_label',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='senate_district_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='senate_district_label',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['house_district_ids'], name='project_house_ids'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['senate_district_ids'], name='project_senate_ids'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['commissioner_district_ids'], name='project_commissioner_ids'),
+        ),
+        migrations.RunPython(copy_districts, migrations.RunPython.noop),
+    ]
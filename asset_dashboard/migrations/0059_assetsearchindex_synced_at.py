@@ -0,0 +1,19 @@
+# Generated by Django 3.2.19 on 2026-10-18 20:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asset_dashboard', '0058_project_districts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetsearchindex',
+            name='synced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
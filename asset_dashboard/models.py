@@ -1,15 +1,35 @@
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
 from typing import Union
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.gis.db import models
-from django.db.models import Max, Sum, QuerySet
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max, Sum, Count, QuerySet, F, Q, Value, OuterRef, Subquery, \
+    FloatField, IntegerField, BooleanField, ExpressionWrapper, Func, Case, When, Window
+from django.db.models.functions import Cast, Coalesce, Lower, NullIf, RowNumber
+from django.contrib.gis.db.models import Collect
+from django.contrib.gis.db.models.functions import Envelope, Intersection
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.gis.geos import GEOSGeometry, GeometryCollection
+from django.core.serializers.json import DjangoJSONEncoder
 from django.conf import settings
+from django.utils import timezone
 
 from djmoney.models.fields import MoneyField
 
+from .cache import DataVersion
+
+
+score_weights_data_version = DataVersion('score-weights')
+
 
 class SequencedModel(models.Model):
     class Meta:
@@ -71,6 +91,278 @@ class SequencedModel(models.Model):
             super().save(*args, **kwargs)
 
 
+class RankedSequenceQuerySet(QuerySet):
+    def with_sequence(self):
+        """
+        Annotate each instance with its contiguous, one-indexed position in its
+        sequence, counting the instances ranked before it.
+
+        The count is a subquery per instance, so that the position is right
+        however the queryset is filtered, e.g., to one phase, or to a page
+        after a cursor. Use with_whole_sequences() to read whole sequences.
+        """
+        partition = self.model.sequence_partition
+
+        preceding = self.model._base_manager.filter(
+            Q(rank__lt=OuterRef("rank")) | Q(rank=OuterRef("rank"), pk__lte=OuterRef("pk")),
+            **{partition: OuterRef(partition)},
+        ).order_by().values(partition).annotate(count=Count("pk")).values("count")
+
+        return self.annotate(sequence=Subquery(preceding, output_field=IntegerField()))
+
+    def with_whole_sequences(self):
+        """
+        Annotate each instance with its position, as with_sequence() does, by
+        numbering the instances of each sequence in a single pass. This is
+        only right when the queryset holds every instance of the sequences it
+        reads, e.g., all of the phases of the portfolios on a page, since the
+        instances it filters out aren't counted.
+        """
+        partition = self.model.sequence_partition
+
+        return self.annotate(sequence=Window(
+            RowNumber(),
+            partition_by=[F(partition)],
+            order_by=[F("rank").asc(), F("pk").asc()],
+        ))
+
+
+class RankedSequenceManager(models.Manager.from_queryset(RankedSequenceQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().with_sequence()
+
+
+class RankedSequencedModel(models.Model):
+    """
+    An alternative to SequencedModel for long sequences. Rather than storing
+    each instance's position, and rewriting the position of every instance
+    after it on insert, instances store a sparse rank, with room between
+    neighbors. Inserting or moving an instance only writes that instance,
+    until two neighbors have no room left between them, at which point the
+    sequence is renumbered.
+
+    As with SequencedModel, instances are positioned by setting a one-indexed
+    sequence, and read with a contiguous sequence, which the default manager
+    annotates.
+    """
+    class Meta:
+        abstract = True
+
+    RANK_GAP = 2 ** 16
+
+    # Name of the foreign key that instances are sequenced within
+    sequence_partition = None
+
+    rank = models.BigIntegerField()
+
+    objects = RankedSequenceManager()
+
+    _sequence = None
+
+    @property
+    def sequence(self):
+        if self._sequence is None and self.rank is not None:
+            self._sequence = self.current_sequence()
+
+        return self._sequence
+
+    @sequence.setter
+    def sequence(self, value):
+        self._sequence = value
+
+    @property
+    def sequenced_instances(self):
+        """
+        Queryset of instances belonging to the same sequence.
+        """
+        return type(self)._base_manager.filter(
+            **{self.sequence_partition: getattr(self, f"{self.sequence_partition}_id")}
+        )
+
+    @property
+    def other_sequenced_instances(self):
+        return self.sequenced_instances.exclude(pk=self.pk)
+
+    def current_sequence(self) -> int:
+        return self.other_sequenced_instances.filter(
+            Q(rank__lt=self.rank) | Q(rank=self.rank, pk__lt=self.pk)
+        ).count() + 1
+
+    def refresh_from_db(self, *args, **kwargs):
+        self._sequence = None
+        super().refresh_from_db(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        """
+        Rank a new instance, or an instance whose sequence changed, between
+        the instances that will come before and after it. Order new instances
+        without a specified sequence last.
+        """
+        if self.rank is None or (
+            self._sequence is not None and self._sequence != self.current_sequence()
+        ):
+            self.rank = self.rank_for(self._sequence)
+
+        super().save(*args, **kwargs)
+
+    def rank_for(self, sequence) -> int:
+        others = self.other_sequenced_instances
+
+        if sequence is None:
+            last = others.aggregate(Max("rank"))["rank__max"]
+            return self.RANK_GAP if last is None else last + self.RANK_GAP
+
+        # Number of other instances that will come before this one
+        index = max(sequence - 1, 0)
+
+        neighbors = list(
+            others.order_by("rank", "pk").values_list("rank", flat=True)[max(index - 1, 0):index + 1]
+        )
+
+        if index == 0:
+            before, after = None, neighbors[0] if neighbors else None
+        elif neighbors:
+            before, after = neighbors[0], neighbors[1] if len(neighbors) > 1 else None
+        else:
+            # The sequence is past the end
+            return self.rank_for(None)
+
+        if before is None and after is None:
+            return self.RANK_GAP
+        elif before is None:
+            return after - self.RANK_GAP
+        elif after is None:
+            return before + self.RANK_GAP
+        elif after - before > 1:
+            return (before + after) // 2
+
+        # There's no room between the neighbors, so spread out the sequence
+        # and try again
+        self.compact(others)
+        return self.rank_for(sequence)
+
+    @classmethod
+    def rerank(cls, instances) -> list:
+        """
+        Rank the given instances, e.g., a whole sequence after it was
+        reordered, in the given order. The longest run of instances that are
+        already ranked in order keep their rank, and the others are ranked
+        between them, so that moving one instance only changes its rank.
+        Nothing is saved. Returns the saved instances whose rank changed.
+        """
+        original_ranks = {id(instance): instance.rank for instance in instances}
+
+        kept = cls.longest_ranked_run(instances)
+
+        # Rank each stretch of instances between two kept instances
+        stretch = []
+        previous_rank = None
+
+        for index, instance in enumerate(instances + [None]):
+            if instance is not None and index not in kept:
+                stretch.append(instance)
+                continue
+
+            next_rank = instance.rank if instance is not None else None
+
+            if not cls.rank_between(stretch, previous_rank, next_rank):
+                # There's no room, so rank the whole sequence from scratch
+                for position, each in enumerate(instances, start=1):
+                    each.rank = position * cls.RANK_GAP
+                break
+
+            stretch = []
+            previous_rank = next_rank
+
+        return [
+            instance for instance in instances
+            if instance.pk is not None and instance.rank != original_ranks[id(instance)]
+        ]
+
+    @staticmethod
+    def longest_ranked_run(instances) -> set:
+        """
+        Indexes of the longest subsequence of the given instances whose
+        existing ranks are strictly increasing.
+        """
+        # Patience sorting: tails[length - 1] is the index of the instance that
+        # ends the run of that length with the lowest rank found so far
+        tails = []
+        predecessors = {}
+
+        for index, instance in enumerate(instances):
+            if instance.rank is None:
+                continue
+
+            low, high = 0, len(tails)
+
+            while low < high:
+                middle = (low + high) // 2
+
+                if instances[tails[middle]].rank < instance.rank:
+                    low = middle + 1
+                else:
+                    high = middle
+
+            predecessors[index] = tails[low - 1] if low else None
+
+            if low == len(tails):
+                tails.append(index)
+            else:
+                tails[low] = index
+
+        run = set()
+        index = tails[-1] if tails else None
+
+        while index is not None:
+            run.add(index)
+            index = predecessors[index]
+
+        return run
+
+    @classmethod
+    def rank_between(cls, instances, lower, upper) -> bool:
+        """
+        Rank the given instances, in order, between the lower and upper ranks,
+        either of which may be None. Returns False if there isn't room.
+        """
+        count = len(instances)
+
+        if not count:
+            return True
+
+        if lower is None and upper is None:
+            ranks = [position * cls.RANK_GAP for position in range(1, count + 1)]
+        elif upper is None:
+            ranks = [lower + position * cls.RANK_GAP for position in range(1, count + 1)]
+        elif lower is None:
+            ranks = [upper - position * cls.RANK_GAP for position in range(count, 0, -1)]
+        else:
+            step = (upper - lower) // (count + 1)
+
+            if step < 1:
+                return False
+
+            ranks = [lower + position * step for position in range(1, count + 1)]
+
+        for instance, rank in zip(instances, ranks):
+            instance.rank = rank
+
+        return True
+
+    @classmethod
+    def compact(cls, instances):
+        """
+        Renumber the given instances, in order, RANK_GAP apart.
+        """
+        instances = list(instances.order_by("rank", "pk"))
+
+        for position, instance in enumerate(instances, start=1):
+            instance.rank = position * cls.RANK_GAP
+
+        cls._base_manager.bulk_update(instances, ["rank"])
+
+
 class Section(models.Model):
     name = models.TextField()
 
@@ -94,7 +386,8 @@ class Portfolio(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
-class PortfolioPhase(SequencedModel):
+class PortfolioPhase(RankedSequencedModel):
+    sequence_partition = "portfolio"
 
     portfolio = models.ForeignKey(
         "Portfolio", related_name="phases", on_delete=models.CASCADE
@@ -110,9 +403,39 @@ class PortfolioPhase(SequencedModel):
         null=True
     )
 
-    @property
-    def sequenced_instances(self):
-        return self.portfolio.phases
+    class Meta:
+        ordering = ["rank"]
+        indexes = [
+            models.Index(fields=["portfolio", "rank"], name="portfoliophase_rank_idx"),
+        ]
+
+
+class ProjectQuerySet(QuerySet):
+    def search(self, text):
+        """
+        Projects whose name, project manager or description has words starting
+        with each word of the text, whose name contains the text, or whose ID
+        starts with it. Each condition is answered by an index (see migration
+        0057), so the combined filter doesn't scan the table.
+        """
+        search_filter = Q(name_lower__contains=text.lower())
+
+        if query := Project.search_query(text):
+            search_filter |= Q(search_vector=query)
+
+        if text.isdigit():
+            search_filter |= Q(id__startswith=text)
+
+        return self.alias(name_lower=Lower("name")).filter(search_filter)
+
+    def ranked(self, text):
+        """
+        Order the projects by how well they match the search, weighing matches
+        of their name over their project manager over their description.
+        """
+        rank = SearchRank(F("search_vector"), Project.search_query(text) or SearchQuery(""))
+
+        return self.annotate(search_rank=rank).order_by("-search_rank", "id")
 
 
 class Project(models.Model):
@@ -154,42 +477,191 @@ class Project(models.Model):
     requester = models.CharField(choices=REQUESTER_CHOICES, max_length=30, null=True, blank=True)
     status = models.CharField(choices=STATUS_CHOICES, max_length=30, null=True, blank=True)
 
+    # The IDs of the project's districts, and their numbers as listed on the
+    # projects by district page, copied from the relations above by
+    # refresh_districts(), so that the page filters on indexed columns
+    # rather than joining each relation
+    house_district_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    senate_district_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    commissioner_district_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    house_district_label = models.TextField(default="", blank=True, editable=False)
+    senate_district_label = models.TextField(default="", blank=True, editable=False)
+    commissioner_district_label = models.TextField(default="", blank=True, editable=False)
+
+    # The words of the name, project manager and description, weighted in that
+    # order, kept up to date by a database trigger (see migration 0057), so
+    # that bulk creates and queryset updates are indexed too
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProjectQuerySet.as_manager()
+
+    SEARCH_CONFIG = "english"
+
+    class Meta:
+        indexes = [
+            GinIndex(name="project_search_vector", fields=["search_vector"]),
+            GinIndex(name="project_house_ids", fields=["house_district_ids"]),
+            GinIndex(name="project_senate_ids", fields=["senate_district_ids"]),
+            GinIndex(name="project_commissioner_ids", fields=["commissioner_district_ids"]),
+        ]
+
     def __str__(self):
         return self.name or ""
 
-    def update_project_zones(self, phase_geoms):
-        zones = Zone.objects.filter(boundary__intersects=phase_geoms)
+    @classmethod
+    def search_query(cls, text):
+        """
+        A full text query matching words that start with each word of the text,
+        e.g., "trail recon" matches "Trail Reconstruction", or None if the
+        text has no words.
+        """
+        words = re.findall(r"[^\W_]+", text)
 
-        # Delete existing relationships so we can have a fresh start.
-        self.zones.clear()
+        if not words:
+            return None
 
-        for zone in zones:
-            self.zones.add(zone)
-            self.save()
+        return SearchQuery(
+            " & ".join(f"{word}:*" for word in words), config=cls.SEARCH_CONFIG, search_type="raw"
+        )
 
-    def update_project_districts(self, phase_geoms):
-        district_models = [
-            ("commissioner_districts", CommissionerDistrict),
-            ("senate_districts", SenateDistrict),
-            ("house_districts", HouseDistrict),
-        ]
+    # Relations to the boundaries that the project's assets fall within
+    BOUNDARY_RELATIONS = (
+        "zones",
+        "house_districts",
+        "senate_districts",
+        "commissioner_districts",
+    )
 
-        for attribute, model in district_models:
-            districts = model.objects.filter(boundary__intersects=phase_geoms)
+    # Relations to districts, and the columns that refresh_districts() copies
+    # them to
+    DISTRICT_RELATIONS = {
+        "house_districts": ("house_district_ids", "house_district_label"),
+        "senate_districts": ("senate_district_ids", "senate_district_label"),
+        "commissioner_districts": ("commissioner_district_ids", "commissioner_district_label"),
+    }
 
-            project_district = getattr(self, attribute)
-            project_district.clear()
+    @classmethod
+    def refresh_districts(cls, project_ids=None):
+        """
+        Copy the IDs of each of the given projects' districts, and a label of
+        their numbers, e.g., "5, 12", to its district columns, with one update
+        per relation. Refreshes every project if no IDs are given. Projects
+        aren't saved, so no signals are sent.
+        """
+        if project_ids is None:
+            where, params = "", []
+        else:
+            where, params = "WHERE p.id = ANY(%s)", [list(project_ids)]
+
+        for relation, (ids_column, label_column) in cls.DISTRICT_RELATIONS.items():
+            field = cls._meta.get_field(relation)
+            through = field.remote_field.through._meta.db_table
+            district = field.related_model._meta.db_table
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+
+            sql = f"""
+                UPDATE {cls._meta.db_table} AS project
+                SET {ids_column} = districts.ids, {label_column} = districts.label
+                FROM (
+                    SELECT
+                        p.id AS project_id,
+                        COALESCE(
+                            array_agg(d.id ORDER BY d.id) FILTER (WHERE d.id IS NOT NULL),
+                            '{{}}'
+                        ) AS ids,
+                        COALESCE(
+                            string_agg(regexp_replace(d.name, '[^0-9, ]', '', 'g'), ', ' ORDER BY d.id),
+                            ''
+                        ) AS label
+                    FROM {cls._meta.db_table} AS p
+                    LEFT JOIN {through} AS t ON t.{source} = p.id
+                    LEFT JOIN {district} AS d ON d.id = t.{target}
+                    {where}
+                    GROUP BY p.id
+                ) AS districts
+                WHERE project.id = districts.project_id
+            """
+
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
 
-            for district in districts:
-                project_district.add(district)
+    @classmethod
+    def find_boundaries(cls, relation, project_ids) -> set:
+        """
+        (project ID, boundary ID) pairs for each boundary of the given relation,
+        e.g., "zones", that one of the projects' assets falls within, from a
+        single spatial join of the assets and the boundary table.
+        """
+        boundary_model = cls._meta.get_field(relation).related_model
+
+        # Lines and points are measured with a GEOM_BUFFER buffer (see
+        # LocalAsset.aggregate_linestrings), so count boundaries within that
+        # distance of an asset.
+        sql = f"""
+            SELECT DISTINCT phase.project_id, boundary.id
+            FROM {LocalAsset._meta.db_table} AS asset
+            JOIN {Phase._meta.db_table} AS phase
+              ON phase.id = asset.phase_id
+            JOIN {boundary_model._meta.db_table} AS boundary
+              ON ST_DWithin(boundary.boundary, asset.geom, %s)
+            WHERE phase.project_id = ANY(%s)
+        """
 
-            self.save()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [settings.GEOM_BUFFER, list(project_ids)])
+            return set(cursor.fetchall())
+
+    @classmethod
+    def assign_boundaries(cls, project_ids) -> int:
+        """
+        Set the zones and districts of each of the given projects to the ones
+        that its assets, in any phase, fall within. Only the through table rows
+        that change are written, and the projects aren't saved, so no signals
+        are sent. Returns the number of rows added or removed.
+        """
+        project_ids = list(project_ids)
+        changes = 0
+
+        for relation in cls.BOUNDARY_RELATIONS:
+            field = cls._meta.get_field(relation)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+
+            assigned = cls.find_boundaries(relation, project_ids)
+
+            rows = through.objects.filter(**{f"{source}__in": project_ids})\
+                                  .values_list("id", source, target)
+            existing = {(project_id, boundary_id): row_id for row_id, project_id, boundary_id in rows}
+
+            removed = [row_id for pair, row_id in existing.items() if pair not in assigned]
+            added = [
+                through(**{source: project_id, target: boundary_id})
+                for project_id, boundary_id in assigned
+                if (project_id, boundary_id) not in existing
+            ]
+
+            if removed:
+                through.objects.filter(id__in=removed).delete()
+
+            through.objects.bulk_create(added)
+
+            changes += len(removed) + len(added)
+
+        if changes:
+            cls.refresh_districts(project_ids)
+
+        return changes
 
 
 class PhaseZoneDistribution(models.Model):
     phase = models.ForeignKey("Phase", on_delete=models.CASCADE, related_name="phase")
     zone = models.ForeignKey("Zone", on_delete=models.CASCADE, related_name="zone")
     zone_distribution_proportion = models.FloatField(null=True, blank=True)
+    # Area of the phase's assets within the zone, kept so that the proportion
+    # can be updated incrementally when a single asset is added or removed.
+    zone_distribution_area = models.FloatField(null=True, blank=True)
 
     @classmethod
     def calculate_zone_proportion(cls, distributions_by_zone, total_distribution_area):
@@ -205,6 +677,19 @@ class PhaseZoneDistribution(models.Model):
         return proportions_by_zone
 
 
+class PhaseGeography(models.Model):
+    """
+    Total area of a phase's assets, and how much of it falls within
+    disinvested areas. Together with PhaseZoneDistribution.zone_distribution_area,
+    this is the state that incremental GIS updates build on.
+    """
+    phase = models.OneToOneField(
+        "Phase", on_delete=models.CASCADE, related_name="geography"
+    )
+    area = models.FloatField(default=0)
+    disinvested_area = models.FloatField(default=0)
+
+
 class Phase(SequencedModel):
     """
     A sub-project unit of work.
@@ -325,6 +810,163 @@ class Phase(SequencedModel):
         return f"{self.phase_type} - {self.year} -  {self.status}"
 
 
+class PhaseSummary(models.Model):
+    """
+    Denormalized budget totals and names for a Phase, so that listings can
+    read one row per phase rather than aggregating its funding streams and
+    zone distributions on the fly. Kept up to date by the receivers in
+    signals.py, and rebuilt from scratch by the rebuild_phase_summaries
+    management command.
+    """
+    phase = models.OneToOneField(
+        Phase, on_delete=models.CASCADE, related_name="summary"
+    )
+    total_budget = models.DecimalField(max_digits=15, decimal_places=0, default=0)
+    total_funded_amount = models.DecimalField(max_digits=15, decimal_places=0, default=0)
+
+    # Funded amounts are stored as [year, amount] pairs, rather than a map, so
+    # that integer (and null) years survive the round trip through JSON.
+    funded_by_year = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    cost_by_zone = models.JSONField(default=dict)
+    funded_by_zone = models.JSONField(default=dict)
+
+    project_name = models.TextField(blank=True, default="")
+    section_name = models.TextField(blank=True, default="")
+    category_name = models.TextField(blank=True, default="")
+
+    SUMMARY_FIELDS = [
+        "total_budget",
+        "total_funded_amount",
+        "funded_by_year",
+        "cost_by_zone",
+        "funded_by_zone",
+        "project_name",
+        "section_name",
+        "category_name",
+    ]
+
+    NAME_FIELDS = {
+        "project_name": "phase__project__name",
+        "section_name": "phase__project__section_owner__name",
+        "category_name": "phase__project__category__name",
+    }
+
+    @property
+    def funded_amount_by_year(self):
+        return {year: Decimal(amount) for year, amount in self.funded_by_year}
+
+    @classmethod
+    def summarize(cls, phase_ids) -> list:
+        """
+        Build unsaved summaries for the given phases, in a fixed number of
+        queries.
+        """
+        phases = Phase.objects.filter(id__in=phase_ids).values(
+            "id",
+            "project__name",
+            "project__section_owner__name",
+            "project__category__name",
+        )
+
+        funding_streams = defaultdict(list)
+
+        stream_rows = Phase.funding_streams.through.objects\
+            .filter(phase_id__in=phase_ids)\
+            .order_by("fundingstream_id")\
+            .values_list(
+                "phase_id",
+                "fundingstream__budget",
+                "fundingstream__year",
+                "fundingstream__funding_secured",
+            )
+
+        for phase_id, budget, year, funding_secured in stream_rows:
+            funding_streams[phase_id].append((budget, year, funding_secured))
+
+        zone_proportions = defaultdict(list)
+
+        distribution_rows = PhaseZoneDistribution.objects\
+            .filter(phase_id__in=phase_ids)\
+            .values_list("phase_id", "zone__name", "zone_distribution_proportion")
+
+        for phase_id, zone_name, proportion in distribution_rows:
+            zone_proportions[phase_id].append((zone_name, proportion))
+
+        summaries = []
+
+        for phase in phases:
+            streams = funding_streams[phase["id"]]
+
+            total_budget = sum(budget for budget, _, _ in streams)
+            total_funded_amount = sum(budget for budget, _, funded in streams if funded)
+
+            funded_by_year = {}
+            for budget, year, funded in streams:
+                if funded:
+                    funded_by_year[year] = funded_by_year.get(year, 0) + budget
+
+            summaries.append(cls(
+                phase_id=phase["id"],
+                total_budget=total_budget,
+                total_funded_amount=total_funded_amount,
+                funded_by_year=list(funded_by_year.items()),
+                cost_by_zone={
+                    zone_name: float(total_budget) * proportion
+                    for zone_name, proportion in zone_proportions[phase["id"]]
+                },
+                funded_by_zone={
+                    zone_name: float(total_funded_amount) * proportion
+                    for zone_name, proportion in zone_proportions[phase["id"]]
+                },
+                project_name=phase["project__name"] or "",
+                section_name=phase["project__section_owner__name"] or "",
+                category_name=phase["project__category__name"] or "",
+            ))
+
+        return summaries
+
+    @classmethod
+    def refresh(cls, phase_ids):
+        """
+        Recompute and save the summaries for the given phases.
+        """
+        summaries = cls.summarize(phase_ids)
+
+        existing = dict(
+            cls.objects.filter(phase_id__in=phase_ids).values_list("phase_id", "id")
+        )
+
+        for summary in summaries:
+            summary.id = existing.get(summary.phase_id)
+
+        cls.objects.bulk_update(
+            [summary for summary in summaries if summary.id], cls.SUMMARY_FIELDS
+        )
+
+        # A summary created concurrently is as fresh as ours
+        cls.objects.bulk_create(
+            [summary for summary in summaries if not summary.id], ignore_conflicts=True
+        )
+
+    @classmethod
+    def refresh_names(cls, project_ids):
+        """
+        Copy the current project, section and category names onto the
+        summaries of the given projects' phases.
+        """
+        rows = cls.objects.filter(phase__project_id__in=project_ids)\
+                          .values("id", *cls.NAME_FIELDS.values())
+
+        summaries = [
+            cls(id=row["id"], **{
+                field: row[lookup] or "" for field, lookup in cls.NAME_FIELDS.items()
+            })
+            for row in rows
+        ]
+
+        cls.objects.bulk_update(summaries, list(cls.NAME_FIELDS))
+
+
 class ScoreField(models.IntegerField):
     def __init__(self, *args, **kwargs):
 
@@ -338,6 +980,15 @@ class ScoreField(models.IntegerField):
         super().__init__(*args, **kwargs)
 
 
+class ProjectScoreQuerySet(QuerySet):
+    def with_total_score(self):
+        """
+        Annotate each score with its weighted total, as weighted_total_score,
+        so that scores can be sorted and filtered in the database.
+        """
+        return self.annotate(weighted_total_score=ProjectScore.total_score_expression())
+
+
 class ProjectScore(models.Model):
 
     project = models.OneToOneField(Project, on_delete=models.CASCADE)
@@ -348,13 +999,57 @@ class ProjectScore(models.Model):
     geographic_distance_score = ScoreField()
     social_equity_score = ScoreField()
 
+    objects = ProjectScoreQuerySet.as_manager()
+
+    # Buffer around a phase's geometries when intersecting them with the
+    # disinvested areas
+    DISINVESTED_AREA_BUFFER = 0.00001
+
     @property
     def total_score(self):
-        score_fields = [f for f in self._meta.get_fields() if type(f) == ScoreField]
+        return self.calculate_total_score(ScoreWeights.load())
+
+    @classmethod
+    def score_fields(cls):
+        return [f for f in cls._meta.get_fields() if type(f) == ScoreField]
+
+    @classmethod
+    def total_score_expression(cls, prefix=""):
+        """
+        The weighted total score as a database expression, with the weights
+        read from the ScoreWeights row. Use a prefix to score a related model,
+        e.g., Phase.objects.annotate(score=ProjectScore.total_score_expression(
+        "project__projectscore__")).
+
+        Unlike total_score, this is null, rather than an error, if there is no
+        ScoreWeights row or the weights sum to zero.
+        """
+        weights = ScoreWeights.objects.order_by("id")
+
+        def weight(field_name):
+            return Subquery(weights.values(field_name)[:1], output_field=FloatField())
+
+        weighted_sum = Value(0.0)
+        weights_sum = Value(0.0)
+
+        for field in cls.score_fields():
+            # missing scores count as 0
+            score = Cast(Coalesce(F(f"{prefix}{field.name}"), 0), FloatField())
+
+            weighted_sum += score * weight(field.name)
+            weights_sum += weight(field.name)
+
+        return ExpressionWrapper(
+            weighted_sum / NullIf(weights_sum, 0.0), output_field=FloatField()
+        )
+
+    def calculate_total_score(self, score_weights):
+        """
+        Weighted average of the score fields, given a ScoreWeights instance.
+        Callers scoring many projects can fetch the weights once and pass them in.
+        """
+        score_fields = self.score_fields()
 
-        # there should be one, and only one row in score weights.
-        # this tuple unpacking will throw an error if that's not so
-        (score_weights,) = ScoreWeights.objects.all()
         total_score = 0
         weights_sum = 0
 
@@ -394,26 +1089,56 @@ class ProjectScore(models.Model):
 
     @classmethod
     def save_social_equity_score(cls, total_phase_geoms, project, geoms):
-        project_score, _ = cls.objects.get_or_create(project=project)
-
         if total_phase_geoms.area == 0.0:
-            disinvested_proportion = 0
+            disinvested_area = 0
         else:
-            disinvested_areas = SocioEconomicZones.objects.filter(
-                displaygro="Both"
-            ).first()
+            disinvested_area = cls.calculate_disinvested_area(geoms)
 
-            buffer = 0.00001
-            disinvested_area = 0
+        cls.save_disinvested_proportion(disinvested_area, total_phase_geoms.area, project)
+
+    @classmethod
+    def calculate_disinvested_area(cls, geoms) -> float:
+        geoms = [geom for geom in geoms if geom]
+
+        disinvested_area = DisinvestedArea.intersection_area(
+            geoms, buffer=cls.DISINVESTED_AREA_BUFFER
+        )
+
+        if disinvested_area is None:
+            # sync_disinvested_areas hasn't copied the area yet, e.g., right
+            # after migrating, so measure against the GIS database's copy
+            disinvested_area = cls.calculate_source_disinvested_area(geoms)
+
+        return disinvested_area
+
+    @classmethod
+    def calculate_source_disinvested_area(cls, geoms) -> float:
+        disinvested_areas = SocioEconomicZones.objects.filter(
+            displaygro="Both"
+        ).first()
+
+        if disinvested_areas is None:
+            # Rather than save a social equity score of 0
+            raise SocioEconomicZones.DoesNotExist("No 'Both' area in SocioEconomicZones")
+
+        disinvested_area = 0
+
+        for geom in geoms:
+            geometries_with_buffer = geom.buffer(cls.DISINVESTED_AREA_BUFFER)
+            if geometries_with_buffer:
+                intersection = disinvested_areas.geom.intersection(geometries_with_buffer)
+                disinvested_area += intersection.area
+
+        return disinvested_area
 
-            for geom in geoms:
-                if geom:
-                    geometries_with_buffer = geom.buffer(buffer)
-                    if geometries_with_buffer:
-                        intersection = disinvested_areas.geom.intersection(geometries_with_buffer)
-                        disinvested_area += intersection.area
+    @classmethod
+    def save_disinvested_proportion(cls, disinvested_area, total_area, project):
+        project_score, _ = cls.objects.get_or_create(project=project)
 
-            disinvested_proportion = disinvested_area / total_phase_geoms.area
+        if total_area == 0.0:
+            disinvested_proportion = 0
+        else:
+            disinvested_proportion = disinvested_area / total_area
 
         project_score.social_equity_score = disinvested_proportion * 5
         project_score.save()
@@ -482,17 +1207,6 @@ class LocalAsset(models.Model):
 
         return grouped_assets
 
-    @classmethod
-    def get_distribution_by_zone(cls, phase_geoms: GEOSGeometry) -> dict:
-        distributions_by_zone = {}
-
-        for zone in Zone.objects.all():
-            if zone.boundary:
-                intersection = zone.boundary.intersection(phase_geoms)
-                distributions_by_zone[zone] = intersection.area
-
-        return distributions_by_zone
-
     @classmethod
     def get_aggregated_assets_by_phase(cls, phase: Phase) -> GeometryCollection:
         phase_assets = LocalAsset.objects.filter(phase=phase)
@@ -570,6 +1284,127 @@ class LocalAsset(models.Model):
         return None
 
 
+class GISJob(models.Model):
+    """
+    A request to recompute the GIS measurements of a phase, worked off by the
+    run_gis_worker management command when GIS_JOB_QUEUE is on.
+
+    There is at most one pending job per phase, so requests made while a job
+    is waiting collapse into it. A new job can still be queued while one is
+    running, since the running job may have read the phase's assets before
+    the latest change.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("complete", "Complete"),
+        ("failed", "Failed"),
+    ]
+
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = timedelta(seconds=30)
+
+    # Not a foreign key, so that deleting a phase doesn't have to wait for, or
+    # cascade into, the jobs that are queued for it
+    phase_id = models.IntegerField(db_index=True)
+    status = models.CharField(choices=STATUS_CHOICES, max_length=20, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["phase_id"],
+                condition=Q(status="pending"),
+                name="unique_pending_gis_job",
+            )
+        ]
+
+    def __str__(self):
+        return f"Phase {self.phase_id} - {self.status}"
+
+    @property
+    def in_progress(self):
+        return self.status in ("pending", "running")
+
+    @classmethod
+    def enqueue(cls, phase_id):
+        # A conflict means the phase already has a pending job
+        cls.objects.bulk_create([cls(phase_id=phase_id)], ignore_conflicts=True)
+
+    @classmethod
+    def claim(cls):
+        """
+        Mark the next job that's due as running and return it, or return None.
+        Jobs locked by other workers, and jobs for phases that another worker
+        is recomputing, are skipped.
+        """
+        with transaction.atomic():
+            running = cls.objects.filter(status="running").values("phase_id")
+
+            job = cls.objects.select_for_update(skip_locked=True)\
+                             .filter(status="pending", run_after__lte=timezone.now())\
+                             .exclude(phase_id__in=running)\
+                             .order_by("run_after", "id")\
+                             .first()
+
+            if job:
+                job.status = "running"
+                job.attempts += 1
+                job.save()
+
+        return job
+
+    def complete(self):
+        self.status = "complete"
+        self.error = ""
+        self.save()
+
+    def fail(self, error):
+        """
+        Queue the job to run again after a delay, unless it's out of attempts
+        or another job is already pending for the phase.
+        """
+        self.error = error
+
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = "failed"
+            self.save()
+            return
+
+        self.status = "pending"
+        self.run_after = timezone.now() + self.RETRY_DELAY * self.attempts
+
+        try:
+            with transaction.atomic():
+                self.save()
+        except IntegrityError:
+            # The pending job will recompute the phase anyway
+            self.status = "failed"
+            self.save()
+
+    @classmethod
+    def requeue_stale(cls, timeout):
+        """
+        Fail the running jobs that haven't finished within the timeout, e.g.,
+        because their worker was killed, so that they're retried.
+        """
+        stale = cls.objects.filter(
+            status="running", updated_at__lt=timezone.now() - timeout
+        )
+
+        for job in stale:
+            job.fail("Timed out")
+
+    @classmethod
+    def latest_for_phase(cls, phase_id):
+        return cls.objects.filter(phase_id=phase_id).order_by("-id").first()
+
+
 class ProjectCategory(models.Model):
     name = models.TextField(null=False)
 
@@ -620,6 +1455,225 @@ class Zone(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def get_intersections(cls, geoms: GEOSGeometry) -> dict:
+        """
+        Map of zone ID to whether the zone intersects the given geometries, and
+        the area of their intersection, for every zone with a boundary. This is
+        a single query, and only computes the intersection of the zones that
+        the spatial index finds intersect.
+        """
+        srid = geoms.srid or cls._meta.get_field("boundary").srid
+        geoms_value = Value(geoms, output_field=models.GeometryField(srid=srid))
+
+        intersection_area = Func(
+            Intersection("boundary", geoms_value),
+            function="ST_Area",
+            output_field=FloatField(),
+        )
+
+        rows = cls.objects.filter(boundary__isnull=False).annotate(
+            intersects=ExpressionWrapper(
+                Q(boundary__intersects=geoms), output_field=BooleanField()
+            ),
+            intersection_area=Case(
+                When(boundary__intersects=geoms, then=intersection_area),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        ).values_list("id", "intersects", "intersection_area")
+
+        return {zone_id: (intersects, area) for zone_id, intersects, area in rows}
+
+
+class DisinvestedArea(models.Model):
+    """
+    A piece of the economically disadvantaged area that social equity scores
+    are measured against, copied from SocioEconomicZones in the GIS database.
+    The area is subdivided into pieces of at most MAX_VERTICES vertices, so
+    that the spatial index narrows an intersection down to a few small
+    polygons, rather than one very large multipolygon.
+    """
+    MAX_VERTICES = 256
+
+    geom = models.PolygonField(srid=3435, spatial_index=True)
+
+    class Meta:
+        verbose_name_plural = "Disinvested Areas"
+
+    @classmethod
+    def sync(cls) -> Union[int, None]:
+        """
+        Replace the local pieces with a fresh copy of the "Both" area from the
+        GIS database. Returns the number of pieces, or None, leaving the
+        existing pieces in place, if the GIS database has no "Both" area.
+        """
+        # calculate_disinvested_area() has always used the first "Both" area
+        source = SocioEconomicZones.objects.filter(displaygro="Both").first()
+
+        if source is None:
+            return None
+
+        sql = f"""
+            INSERT INTO {cls._meta.db_table} (geom)
+            SELECT ST_Subdivide(ST_GeomFromEWKB(%s), %s)
+        """
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [bytes(source.geom.ewkb), cls.MAX_VERTICES])
+
+        return cls.objects.count()
+
+    @classmethod
+    def intersection_area(cls, geoms, buffer=0) -> Union[float, None]:
+        """
+        Total area of the intersection of each of the given geometries, after
+        buffering it, with the disinvested area, in a single query. Returns
+        None if the area hasn't been synced, i.e., there are no pieces.
+        """
+        geoms = [bytes(geom.ewkb) for geom in geoms]
+
+        if not geoms:
+            return 0
+
+        sql = f"""
+            WITH buffered AS (
+                SELECT ST_Buffer(ST_GeomFromEWKB(geom), %s) AS geom
+                FROM unnest(%s::bytea[]) AS geom
+            )
+            SELECT CASE WHEN EXISTS (SELECT 1 FROM {cls._meta.db_table}) THEN (
+                SELECT COALESCE(SUM(ST_Area(ST_Intersection(area.geom, buffered.geom))), 0)
+                FROM buffered
+                JOIN {cls._meta.db_table} AS area
+                  ON ST_Intersects(area.geom, buffered.geom)
+            ) END
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [buffer, geoms])
+            (area,) = cursor.fetchone()
+
+        return area
+
+
+class AssetSearchIndex(models.Model):
+    """
+    A searchable copy of the name and identifiers of an asset in the GIS
+    database, where tables can't be indexed. The text searched, i.e., the
+    Search.or_fields of the asset's model, is normalized and indexed with
+    trigrams, so that substring searches don't scan the GIS tables.
+    """
+    asset_model = models.CharField(max_length=50)
+    asset_id = models.IntegerField()
+    name = models.TextField(null=True)
+    identifier = models.TextField(null=True)
+    search_text = models.TextField()
+    bbox = models.GeometryField(srid=3435, null=True)
+    synced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Asset Search Index"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['asset_model', 'asset_id'], name='unique_asset_search_index_asset'
+            ),
+        ]
+        indexes = [
+            GinIndex(name='asset_search_text_trgm', fields=['search_text'], opclasses=['gin_trgm_ops']),
+        ]
+
+    @staticmethod
+    def normalize(value) -> str:
+        return ' '.join(str(value).lower().split())
+
+    @classmethod
+    def sources(cls) -> dict:
+        """
+        The GIS models that are searched, and the bounding box of each of
+        their rows, from the table holding the geometry.
+        """
+        return {
+            Buildings: Envelope('geom'),
+            TrailsInfo: Subquery(
+                Trails.objects.filter(trail_info=OuterRef('pk'))
+                .values('trail_info')
+                .annotate(bbox=Envelope(Collect('geom')))
+                .values('bbox')
+            ),
+            PoiInfo: Subquery(
+                PointsOfInterest.objects.filter(id=OuterRef('pointsofinterest_id'))
+                .values(bbox=Envelope('geom'))[:1]
+            ),
+            PicnicGroves: Envelope('geom'),
+        }
+
+    @classmethod
+    def sync(cls, model) -> int:
+        """
+        Replace the indexed rows of a GIS model with a fresh copy of the rows
+        its search returns. Returns the number of rows.
+        """
+        search = model.Search
+        search_fields = [field for field, _ in search.or_fields]
+        fields = list(dict.fromkeys([search.name_field, search.identifier_field, *search_fields]))
+
+        synced_at = timezone.now()
+
+        rows = model.objects\
+            .filter(**dict(getattr(search, 'and_fields', ())))\
+            .annotate(search_bbox=cls.sources()[model])\
+            .order_by('pk')\
+            .values('pk', 'search_bbox', *fields)
+
+        entries = (
+            cls(
+                asset_model=model.__name__,
+                asset_id=row['pk'],
+                name=row[search.name_field],
+                identifier=row[search.identifier_field],
+                search_text='\n'.join(
+                    cls.normalize(row[field]) for field in search_fields if row[field] is not None
+                ),
+                bbox=row['search_bbox'],
+                synced_at=synced_at,
+            )
+            for row in rows.iterator()
+        )
+
+        with transaction.atomic():
+            cls.objects.filter(asset_model=model.__name__).delete()
+            cls.objects.bulk_create(entries, batch_size=1000)
+
+        return cls.objects.filter(asset_model=model.__name__).count()
+
+    @classmethod
+    def is_synced(cls, model) -> bool:
+        """
+        Whether the model's rows were synced within the last
+        ASSET_SEARCH_INDEX_MAX_AGE seconds. Older copies may be missing assets
+        added to the GIS database since, so they aren't searched.
+        """
+        max_age = timedelta(seconds=settings.ASSET_SEARCH_INDEX_MAX_AGE)
+
+        return cls.objects.filter(
+            asset_model=model.__name__,
+            synced_at__gte=timezone.now() - max_age
+        ).exists()
+
+    @classmethod
+    def search(cls, model, query) -> QuerySet:
+        """
+        Rows of the model whose searched fields contain the query, ignoring
+        case and repeated whitespace.
+        """
+        return cls.objects.filter(
+            asset_model=model.__name__,
+            search_text__contains=cls.normalize(query)
+        )
+
 
 class ScoreWeights(models.Model):
 
@@ -642,9 +1696,45 @@ class ScoreWeights(models.Model):
         default=1.0, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)]
     )
 
+    # This process' copy of the weights, the data version it was read under,
+    # and when it expires
+    _cached = (None, None, 0)
+
     class Meta:
         verbose_name_plural = "Score Weights"
 
+    @classmethod
+    def load(cls):
+        """
+        Return the score weights, reading them from the database at most once
+        every SCORE_WEIGHTS_CACHE_TIMEOUT seconds, or after they change. Saving
+        or deleting weights bumps score_weights_data_version (see signals.py),
+        which invalidates the copy kept by every process.
+        """
+        version = score_weights_data_version.get()
+        score_weights, cached_version, expires = cls._cached
+
+        if score_weights is None or cached_version != version or time.monotonic() >= expires:
+            # there should be one, and only one row in score weights.
+            # this tuple unpacking will throw an error if that's not so
+            (score_weights,) = cls.objects.all()
+
+            cls._cached = (
+                score_weights,
+                version,
+                time.monotonic() + settings.SCORE_WEIGHTS_CACHE_TIMEOUT,
+            )
+
+        return score_weights
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Drop this process' copy of the weights, e.g., when the cache backend
+        does not keep the data version.
+        """
+        cls._cached = (None, None, 0)
+
 
 class DummyProject(models.Model):
     """A Project model, based on the columns from ~/raw/simplified.csv. This is for testing."""
@@ -686,6 +1776,9 @@ class Buildings(GISModel):
     class Search:
         or_fields = (("fpd_uid", int), ("building_name", str), ("complex", str))
 
+        name_field = "building_name"
+        identifier_field = "fpd_uid"
+
         and_fields = (("ownership", "fpdcc"), ("demolished", "no"))
 
     id = models.AutoField(primary_key=True, db_column="buildings_id")
@@ -1033,6 +2126,9 @@ class PicnicGroves(GISModel):
     class Search:
         or_fields = (("fpd_uid", int), ("poi_info__nameid__name", str), ("grove", int))
 
+        name_field = "poi_info__nameid__name"
+        identifier_field = "fpd_uid"
+
     id = models.AutoField(primary_key=True, db_column="picnicgrove_id")
 
     poi_info = models.ForeignKey("PoiInfo", on_delete=models.SET_NULL)
@@ -1189,6 +2285,9 @@ class PoiInfo(GISModel):
             ("pointsofinterest_id__isnull", False)
         )
 
+        name_field = "nameid__name"
+        identifier_field = "fpd_uid"
+
     id = models.AutoField(primary_key=True, db_column="poi_info_id")
 
     parking_info = models.ForeignKey(ParkingEntranceInfo, on_delete=models.RESTRICT)
@@ -1391,6 +2490,9 @@ class TrailsInfo(GISModel):
             ("regional_trail_name", str)
         )
 
+        name_field = "trail_subsystem"
+        identifier_field = "id"
+
     id = models.AutoField(primary_key=True, db_column="trail_info_id")
 
     trail_system = models.CharField(max_length=100)
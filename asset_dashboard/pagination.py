@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class PlannerPhasePagination(CursorPagination):
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on the primary key, so that every page is read with an
+    index range scan, no matter how deep into the list it is.
+    """
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class PortfolioPhasePagination(KeysetPagination):
+    """
+    Keyset pagination of portfolio phases in the order they are ranked, which
+    the index on their portfolio and rank answers, rather than by when they
+    were added.
+    """
+    ordering = ('rank', 'pk')
+
+
+class FeatureCollectionPagination(KeysetPagination):
+    """
+    Keyset pagination of a GeoJSON feature collection, which keeps its shape,
+    with the links to the next and previous pages alongside its features.
+    """
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('type', 'FeatureCollection'),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('features', data['features']),
+        ]))
@@ -0,0 +1,294 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import cached_property
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cache import DataVersion
+from .models import Phase, Project, FundingStream, PhaseZoneDistribution, \
+    PhaseSummary, LocalAsset, ScoreWeights
+
+
+# Bumped by the receivers in signals.py whenever a row that appears in the
+# planner payload changes.
+planner_data_version = DataVersion('planner')
+
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+REBUILD_LOCK_TIMEOUT = 60
+REBUILD_POLL_INTERVAL = 0.25
+
+# In-process copy of the most recently serialized payload, so that a request
+# against an unchanged version doesn't have to read the payload out of the
+# database cache at all.
+_local_payload = {'version': None, 'payload': None}
+_local_lock = threading.Lock()
+
+
+class PlannerPayload:
+    """
+    Builds the list of phases rendered by the CIP planner.
+
+    Rather than asking each Phase for its budget totals, zone distributions,
+    districts and assets (several queries per phase), each relation is read
+    once for every phase in the payload and grouped in Python. The number of
+    queries is therefore fixed, no matter how many phases are planned.
+
+    Budget totals come from each phase's PhaseSummary, and are only computed
+    here for phases that don't have one yet.
+    """
+    PROJECT_RELATIONS = (
+        'zones',
+        'house_districts',
+        'senate_districts',
+        'commissioner_districts',
+    )
+
+    def __init__(self, phases=None):
+        if phases is None:
+            phases = Phase.objects.all()
+
+        self.phases = phases
+
+    @cached_property
+    def phase_list(self):
+        return list(
+            self.phases.select_related(
+                'project__section_owner',
+                'project__category',
+                'project__projectscore',
+            )
+        )
+
+    @cached_property
+    def phase_ids(self):
+        return [phase.id for phase in self.phase_list]
+
+    @cached_property
+    def project_ids(self):
+        return list({phase.project_id for phase in self.phase_list})
+
+    @cached_property
+    def score_weights(self):
+        return ScoreWeights.load()
+
+    @cached_property
+    def funding_streams(self) -> dict:
+        """
+        Map of phase ID to the list of its funding streams, in the same shape
+        as FundingStream.objects.values().
+        """
+        through = Phase.funding_streams.through
+        fields = [field.attname for field in FundingStream._meta.concrete_fields]
+
+        rows = through.objects.filter(phase_id__in=self.phase_ids)\
+                              .order_by('fundingstream_id')\
+                              .values('phase_id', *(f'fundingstream__{field}' for field in fields))
+
+        funding_streams = defaultdict(list)
+
+        for row in rows:
+            funding_streams[row['phase_id']].append(
+                {field: row[f'fundingstream__{field}'] for field in fields}
+            )
+
+        return funding_streams
+
+    @cached_property
+    def summaries(self) -> dict:
+        return {
+            summary.phase_id: summary
+            for summary in PhaseSummary.objects.filter(phase_id__in=self.phase_ids)
+        }
+
+    @cached_property
+    def zone_distributions(self) -> dict:
+        distributions = defaultdict(list)
+
+        rows = PhaseZoneDistribution.objects.filter(phase_id__in=self.phase_ids)\
+                                            .values('phase_id', 'zone__name', 'zone_distribution_proportion')
+
+        for row in rows:
+            distributions[row['phase_id']].append(row)
+
+        return distributions
+
+    @cached_property
+    def assets(self) -> dict:
+        assets = defaultdict(list)
+
+        rows = LocalAsset.objects.filter(phase_id__in=self.phase_ids)\
+                                 .values('phase_id', 'asset_id', 'asset_model')
+
+        for row in rows:
+            assets[row['phase_id']].append(row)
+
+        return assets
+
+    @cached_property
+    def project_relations(self) -> dict:
+        """
+        Map of relation name, e.g., "zones", to a map of project ID to a list of
+        {'name': ...} dicts for the related objects.
+        """
+        relations = {}
+
+        for relation in self.PROJECT_RELATIONS:
+            field = Project._meta.get_field(relation)
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+
+            rows = field.remote_field.through.objects\
+                .filter(**{f'{source}_id__in': self.project_ids})\
+                .order_by(f'{target}_id')\
+                .values_list(f'{source}_id', f'{target}__name')
+
+            names_by_project = defaultdict(list)
+
+            for project_id, name in rows:
+                names_by_project[project_id].append({'name': name})
+
+            relations[relation] = names_by_project
+
+        return relations
+
+    def build(self) -> list:
+        return [self.serialize_phase(phase) for phase in self.phase_list]
+
+    def serialize_phase(self, phase) -> dict:
+        project = phase.project
+
+        funding_streams = self.funding_streams[phase.id]
+
+        if summary := self.summaries.get(phase.id):
+            total_budget = summary.total_budget if summary.total_budget else 0
+            total_funded_amount = summary.total_funded_amount if summary.total_funded_amount else 0
+            funded_amount_by_year = summary.funded_amount_by_year
+            cost_by_zone = summary.cost_by_zone
+        else:
+            total_budget, total_funded_amount, funded_amount_by_year, cost_by_zone = \
+                self.calculate_budget(phase, funding_streams)
+
+        section = project.section_owner.name if project.section_owner else ''
+        category = project.category.name if project.category else ''
+
+        return {
+            'pk': phase.id,
+            'phase': phase.get_phase_type_display(),
+            'total_budget': total_budget,
+            'funded_amount': total_funded_amount,
+            'funded_amount_by_year': funded_amount_by_year,
+            'funding_streams': funding_streams,
+            'phase_year': phase.year,
+            'estimated_bid_quarter': phase.estimated_bid_quarter,
+            'phase_status': phase.status,
+            'phase_type': phase.get_phase_type_display(),
+            'name': project.name,
+            'description': project.description,
+            'notes': project.notes,
+            'section': section,
+            'category': category,
+            'total_score': project.projectscore.calculate_total_score(self.score_weights),
+            'project_manager': project.project_manager,
+            'countywide': project.countywide,
+            'zones': self.project_relations['zones'][project.id],
+            'cost_by_zone': cost_by_zone,
+            'house_districts': self.project_relations['house_districts'][project.id],
+            'senate_districts': self.project_relations['senate_districts'][project.id],
+            'commissioner_districts': self.project_relations['commissioner_districts'][project.id],
+            'assets': LocalAsset.group_assets_by_type(self.assets[phase.id]),
+            'project_id': project.id,
+            'project_status': project.get_status_display(),
+            'project_requester': project.get_requester_display(),
+        }
+
+    def calculate_budget(self, phase, funding_streams):
+        total_budget = sum(stream['budget'] for stream in funding_streams)
+        total_budget = total_budget if total_budget else 0
+
+        funded_streams = [stream for stream in funding_streams if stream['funding_secured']]
+
+        total_funded_amount = sum(stream['budget'] for stream in funded_streams)
+        total_funded_amount = total_funded_amount if total_funded_amount else 0
+
+        funded_amount_by_year = {}
+        for stream in funded_streams:
+            funded_amount_by_year[stream['year']] = (
+                funded_amount_by_year.get(stream['year'], 0) + stream['budget']
+            )
+
+        cost_by_zone = {}
+        for distribution in self.zone_distributions[phase.id]:
+            cost_by_zone[distribution['zone__name']] = (
+                float(total_budget) * distribution['zone_distribution_proportion']
+            )
+
+        return total_budget, total_funded_amount, funded_amount_by_year, cost_by_zone
+
+
+def serialize_planner_payload() -> str:
+    return json.dumps(PlannerPayload().build(), cls=DjangoJSONEncoder)
+
+
+def get_planner_payload() -> str:
+    """
+    Return the serialized planner payload for the current data version.
+
+    Lookups go to the in-process copy first, then the site cache. On a miss,
+    only one worker rebuilds the payload; the others wait for it to land in the
+    cache rather than all rebuilding it at once.
+    """
+    version = planner_data_version.get()
+
+    if version is None:
+        # The cache backend doesn't keep values, so there's nothing to share.
+        return serialize_planner_payload()
+
+    if _local_payload['version'] == version:
+        return _local_payload['payload']
+
+    with _local_lock:
+        # Another thread may have refreshed the local copy while we waited
+        if _local_payload['version'] == version:
+            return _local_payload['payload']
+
+        payload = _get_or_build_cached_payload(version)
+
+        _local_payload.update(version=version, payload=payload)
+
+    return payload
+
+
+def _get_or_build_cached_payload(version) -> str:
+    key = f'planner:payload:{version}'
+    lock_key = f'{key}:lock'
+
+    payload = cache.get(key)
+
+    if payload is not None:
+        return payload
+
+    if cache.add(lock_key, True, timeout=REBUILD_LOCK_TIMEOUT):
+        try:
+            payload = serialize_planner_payload()
+            cache.set(key, payload, timeout=PAYLOAD_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+
+        return payload
+
+    # Another worker holds the lock and is rebuilding the payload.
+    deadline = time.monotonic() + REBUILD_LOCK_TIMEOUT
+
+    while time.monotonic() < deadline:
+        time.sleep(REBUILD_POLL_INTERVAL)
+
+        payload = cache.get(key)
+
+        if payload is not None:
+            return payload
+
+    # The other worker didn't finish in time, so build it ourselves.
+    return serialize_planner_payload()
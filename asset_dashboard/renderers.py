@@ -0,0 +1,70 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders a list of objects as newline-delimited JSON, one object per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if isinstance(data, dict):
+            data = [data]
+
+        return ''.join(self.encode_line(row) for row in data).encode(self.charset)
+
+    @staticmethod
+    def encode_line(row) -> str:
+        return json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+class EncodedGeometry(str):
+    """
+    A GeoJSON geometry that was encoded by the database, e.g., with
+    ST_AsGeoJSON, for GeoJSONRenderer to write out as is.
+    """
+
+
+class GeoJSONRenderer(JSONRenderer):
+    """
+    Renders JSON, e.g., a GeoJSON feature collection, splicing in any
+    EncodedGeometry as it is, rather than parsing and re-encoding it.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return self.encode_value(data).encode(self.charset)
+
+    def encode_value(self, value) -> str:
+        if isinstance(value, EncodedGeometry):
+            return value
+
+        if isinstance(value, dict):
+            return '{' + ','.join(
+                f'{self.encode_key(key)}:{self.encode_value(member)}' for key, member in value.items()
+            ) + '}'
+
+        if isinstance(value, (list, tuple)):
+            return '[' + ','.join(self.encode_value(item) for item in value) + ']'
+
+        return self.encode(value)
+
+    def encode_key(self, key) -> str:
+        # As json.dumps() does, e.g., the year 2023 becomes "2023"
+        return self.encode(key if isinstance(key, str) else json.dumps(key))
+
+    def encode(self, value) -> str:
+        return json.dumps(
+            value, cls=self.encoder_class, ensure_ascii=self.ensure_ascii, allow_nan=not self.strict
+        )
@@ -1,11 +1,17 @@
+import time
+
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework_gis.serializers import GeoFeatureModelSerializer, \
-    GeometrySerializerMethodField, GeometryField
+    GeometrySerializerMethodField, GeometryField, GeoFeatureModelListSerializer
 
 from asset_dashboard.models import Phase, Portfolio, PortfolioPhase, Project, \
-    LocalAsset, Buildings, TrailsInfo, PoiInfo, PointsOfInterest, PicnicGroves, \
-    ParkingLots, PhaseZoneDistribution, Trails, FundingStream
+    LocalAsset, Buildings, TrailsInfo, PoiInfo, PicnicGroves, PhaseZoneDistribution, \
+    FundingStream, GISJob
+from asset_dashboard.renderers import EncodedGeometry
+from asset_dashboard.signals import recalculate_phases_gis, invalidate_planner
+from asset_dashboard.tiles import invalidate_local_asset_tiles
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -32,26 +38,60 @@ class PortfolioPhaseSerializer(serializers.ModelSerializer):
         model = PortfolioPhase
         fields = ('phase', 'sequence', 'phase_funding_stream')
 
+    # Annotated by the PortfolioPhase manager, and stored as a sparse rank
+    sequence = serializers.IntegerField(min_value=1)
+
 
 class PortfolioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Portfolio
-        fields = ('id', 'name', 'user', 'created_at', 'updated_at', 'phases',)
+        fields = ('id', 'name', 'user', 'created_at', 'updated_at', 'phases', 'moved_phases',)
 
     phases = PortfolioPhaseSerializer(many=True, read_only=False)
 
+    # Alternative to phases for updates, with only the phases that were added
+    # or moved, in their new positions. The other phases keep their order.
+    moved_phases = PortfolioPhaseSerializer(many=True, write_only=True, required=False)
+
+    def validate_phases(self, phases):
+        self.check_unique(phases)
+
+        return phases
+
+    def validate_moved_phases(self, moved_phases):
+        # Nested fields aren't required in a partial update
+        for phase in moved_phases:
+            if 'phase' not in phase or 'sequence' not in phase:
+                raise serializers.ValidationError('Each moved phase needs a phase and a sequence.')
+
+        self.check_unique(moved_phases)
+
+        return moved_phases
+
+    def check_unique(self, phases):
+        """
+        Each phase and funding stream is a single portfolio phase, so it can
+        only be given once.
+        """
+        keys = [self.key(phase) for phase in phases if 'phase' in phase]
+
+        if len(set(keys)) != len(keys):
+            raise serializers.ValidationError('Each phase and funding stream can only be listed once.')
+
     def create(self, validated_data):
         phase_data = validated_data.pop('phases')
+        validated_data.pop('moved_phases', None)
 
-        portfolio = Portfolio.objects.create(**validated_data)
+        with transaction.atomic():
+            portfolio = Portfolio.objects.create(**validated_data)
 
-        for phase in phase_data:
-            PortfolioPhase.objects.create(
-                portfolio=portfolio,
-                phase_funding_stream=phase['phase_funding_stream'],
-                phase=phase['phase'],
-                sequence=phase['sequence']
-            )
+            portfolio_phases = [
+                self.build_portfolio_phase(portfolio, phase)
+                for phase in sorted(phase_data, key=lambda phase: phase['sequence'])
+            ]
+
+            PortfolioPhase.rerank(portfolio_phases)
+            PortfolioPhase.objects.bulk_create(portfolio_phases)
 
         return portfolio
 
@@ -60,43 +100,122 @@ class PortfolioSerializer(serializers.ModelSerializer):
         instance.save()
 
         phase_data = validated_data.get('phases', [])
-
-        if phase_data:
-            for_create = []
-            for_update = []
-
-            # TODO: This could be made more efficient by getting all existing
-            # PortfolioPhase instances in a single query, updating the sequence
-            # from phase data, then performing a bulk update. Will revisit if
-            # performance is a concern.
-            for phase in phase_data:
-                try:
-                    portfolio_phase = PortfolioPhase.objects.get(
-                        portfolio=instance,
-                        phase=phase['phase'],
-                        phase_funding_stream=phase['phase_funding_stream']
-                    )
-                except PortfolioPhase.DoesNotExist:
-                    portfolio_phase = PortfolioPhase(
-                        portfolio=instance,
-                        phase_funding_stream=phase['phase_funding_stream'],
-                        phase=phase['phase'],
-                        sequence=phase['sequence']
-                    )
-                    for_create.append(portfolio_phase)
-                else:
-                    portfolio_phase.sequence = phase['sequence']
-                    for_update.append(portfolio_phase)
+        moved_phase_data = validated_data.get('moved_phases', [])
+
+        if not phase_data and not moved_phase_data:
+            return instance
+
+        with transaction.atomic():
+            existing = {
+                self.key(portfolio_phase): portfolio_phase
+                for portfolio_phase in PortfolioPhase._base_manager.filter(portfolio=instance)
+                                                                   .order_by('rank', 'pk')
+            }
+
+            if phase_data:
+                # The whole sequence is given, so drop the phases that are missing
+                ordered_phases = sorted(phase_data, key=lambda phase: phase['sequence'])
+                keys = [self.key(phase) for phase in ordered_phases]
+
+                portfolio_phases = [
+                    existing.get(key) or self.build_portfolio_phase(instance, phase)
+                    for key, phase in zip(keys, ordered_phases)
+                ]
+                kept_keys = set(keys)
+                for_delete = [
+                    portfolio_phase.id for key, portfolio_phase in existing.items()
+                    if key not in kept_keys
+                ]
+            else:
+                moved_phases = sorted(moved_phase_data, key=lambda phase: phase['sequence'])
+                moved_keys = {self.key(phase) for phase in moved_phases}
+
+                portfolio_phases = [
+                    portfolio_phase for key, portfolio_phase in existing.items()
+                    if key not in moved_keys
+                ]
+
+                # Insert in order of sequence, so that earlier insertions don't
+                # shift later ones
+                for phase in moved_phases:
+                    portfolio_phase = existing.get(self.key(phase)) \
+                        or self.build_portfolio_phase(instance, phase)
+                    portfolio_phases.insert(phase['sequence'] - 1, portfolio_phase)
+
+                for_delete = []
+
+            for_update = PortfolioPhase.rerank(portfolio_phases)
+            for_create = [
+                portfolio_phase for portfolio_phase in portfolio_phases
+                if portfolio_phase.pk is None
+            ]
 
             PortfolioPhase.objects.bulk_create(for_create)
-            PortfolioPhase.objects.bulk_update(for_update, ['sequence'])
+            PortfolioPhase.objects.bulk_update(for_update, ['rank'])
 
-            PortfolioPhase.objects.filter(portfolio=instance)\
-                                  .exclude(phase__in=tuple(phase['phase'] for phase in phase_data))\
-                                  .delete()
+            if for_delete:
+                PortfolioPhase._base_manager.filter(id__in=for_delete).delete()
 
         return instance
 
+    @staticmethod
+    def key(phase):
+        """
+        Identify a portfolio phase, or the validated data for one, by its
+        phase and funding stream.
+        """
+        if isinstance(phase, PortfolioPhase):
+            return (phase.phase_id, phase.phase_funding_stream_id)
+
+        funding_stream = phase.get('phase_funding_stream')
+
+        return (phase['phase'].id, funding_stream.id if funding_stream else None)
+
+    @staticmethod
+    def build_portfolio_phase(portfolio, phase):
+        return PortfolioPhase(
+            portfolio=portfolio,
+            phase=phase['phase'],
+            phase_funding_stream=phase.get('phase_funding_stream'),
+        )
+
+
+class ScenarioPhaseSerializer(serializers.Serializer):
+    # IDs, rather than related fields, so that a long scenario is checked in
+    # one query, rather than one per phase
+    phase = serializers.IntegerField(required=True)
+    phase_funding_stream = serializers.IntegerField(required=False, allow_null=True, default=None)
+
+
+class PortfolioScenarioSerializer(serializers.Serializer):
+    """
+    A hypothetical ordering of a portfolio's phases, e.g., one that hasn't
+    been saved yet, and/or a budget cap, for the portfolio totals endpoint.
+    """
+    phases = ScenarioPhaseSerializer(many=True, required=False)
+    budget_cap = serializers.DecimalField(
+        max_digits=15, decimal_places=0, min_value=0, required=False
+    )
+
+    def validate_phases(self, phases):
+        phase_ids = {phase['phase'] for phase in phases}
+        missing = phase_ids - set(Phase.objects.filter(id__in=phase_ids).values_list('id', flat=True))
+
+        if missing:
+            raise serializers.ValidationError(
+                f'Unknown phase ID(s): {", ".join(str(phase_id) for phase_id in sorted(missing))}'
+            )
+
+        return phases
+
+
+class GISJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GISJob
+        fields = ('id', 'phase_id', 'status', 'in_progress', 'attempts', 'error', 'created_at', 'updated_at')
+
+    in_progress = serializers.BooleanField(read_only=True)
+
 
 class NullableIntegerField(serializers.IntegerField):
 
@@ -121,6 +240,32 @@ class NullableCharField(serializers.CharField):
         return super().to_representation(value)
 
 
+class EncodedGeometryField(serializers.ReadOnlyField):
+    """
+    A geometry that the query encoded as GeoJSON, e.g., with AsGeoJSON(), for
+    GeoJSONRenderer to write out as is.
+    """
+
+    def to_representation(self, value):
+        if value is None:
+            return None
+
+        return EncodedGeometry(value)
+
+
+class OmittedGeometryField(serializers.ReadOnlyField):
+    """
+    Stands in for a geometry left out of a response, e.g., with ?omit=geom,
+    since every GeoJSON feature has a geometry, if only a null one.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', **kwargs)
+
+    def to_representation(self, value):
+        return None
+
+
 class BaseLocalAssetSerializer(GeoFeatureModelSerializer):
     """
     A base serializer for the LocalAssets because we need
@@ -142,7 +287,35 @@ class BaseLocalAssetSerializer(GeoFeatureModelSerializer):
         return obj.geom.transform(4326, clone=True)
 
 
+class LocalAssetListSerializer(GeoFeatureModelListSerializer):
+    """
+    Creates a list of assets with a single insert, then recomputes the GIS
+    measurements once per phase, rather than once per asset. The time the
+    recompute took is kept as gis_recompute_time, in seconds.
+    """
+    gis_recompute_time = None
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            assets = LocalAsset.objects.bulk_create(
+                [LocalAsset(**item) for item in validated_data]
+            )
+
+            start = time.perf_counter()
+            recalculate_phases_gis({asset.phase for asset in assets})
+            self.gis_recompute_time = time.perf_counter() - start
+
+        # bulk_create doesn't send post_save
+        invalidate_planner()
+        invalidate_local_asset_tiles()
+
+        return assets
+
+
 class LocalAssetWriteSerializer(BaseLocalAssetSerializer):
+    class Meta(BaseLocalAssetSerializer.Meta):
+        list_serializer_class = LocalAssetListSerializer
+
     geom = GeometryField()
 
 
@@ -150,11 +323,24 @@ class LocalAssetReadSerializer(BaseLocalAssetSerializer):
     geom = GeometrySerializerMethodField()
 
 
+class LocalAssetGeoJSONSerializer(BaseLocalAssetSerializer):
+    """
+    Reads assets whose geometry was encoded by LocalAssetViewSet.get_queryset().
+    """
+    geom = EncodedGeometryField(source='geojson')
+
+
 class SourceAssetSerializer(GeoFeatureModelSerializer):
+    """
+    Base serializer for search results, whose geometry, including that of
+    assets whose geometry lives in another table, e.g., trails, is encoded by
+    AssetViewSet.get_queryset().
+    """
     class Meta:
         fields = ('source')
 
     source = serializers.SerializerMethodField()
+    geom = EncodedGeometryField(source='geojson')
 
     def get_source(self, obj):
         return 'search'
@@ -168,12 +354,8 @@ class BuildingsSerializer(SourceAssetSerializer):
 
     identifier = NullableIntegerField(source='fpd_uid', allow_null=True)
     name = serializers.CharField(source='building_name')
-    geom = GeometrySerializerMethodField()
     complex = serializers.CharField()
 
-    def get_geom(self, obj):
-        return obj.geom.transform(4326, clone=True)
-
 
 class TrailsSerializer(SourceAssetSerializer):
     class Meta:
@@ -183,14 +365,6 @@ class TrailsSerializer(SourceAssetSerializer):
 
     identifier = serializers.IntegerField(source='id')
     name = serializers.CharField(source='trail_subsystem')
-    geom = GeometrySerializerMethodField()
-
-    def get_geom(self, obj):
-        '''
-        This is heavy, might want to consider pre-fetching related Trails obj
-        in viewset -> get_queryset
-        '''
-        return Trails.objects.get(trail_info=obj).geom.transform(4326, clone=True)
 
 
 class PointsOfInterestSerializer(SourceAssetSerializer):
@@ -200,16 +374,7 @@ class PointsOfInterestSerializer(SourceAssetSerializer):
         geo_field = 'geom'
 
     identifier = serializers.IntegerField(source='fpd_uid')
-    name = serializers.SerializerMethodField(source='nameid')
-    geom = GeometrySerializerMethodField()
-
-    def get_geom(self, obj):
-        return PointsOfInterest.objects.get(
-            id=obj.pointsofinterest_id
-        ).geom.transform(4326, clone=True)
-
-    def get_name(self, obj):
-        return obj.nameid.name
+    name = serializers.CharField(source='nameid.name')
 
 
 class PicnicGrovesSerializer(SourceAssetSerializer):
@@ -219,15 +384,8 @@ class PicnicGrovesSerializer(SourceAssetSerializer):
         geo_field = 'geom'
 
     identifier = serializers.CharField(source='fpd_uid')
-    name = serializers.SerializerMethodField(source='poi_info__nameid')
+    name = serializers.CharField(source='poi_info.nameid.name', default=None)
     grove_number = serializers.IntegerField(source='grove')
-    geom = GeometrySerializerMethodField()
-
-    def get_geom(self, obj):
-        return obj.geom.transform(4326, clone=True)
-
-    def get_name(self, obj):
-        return obj.poi_info.nameid.name
 
 
 class ParkingLotsSerializer(SourceAssetSerializer):
@@ -236,21 +394,8 @@ class ParkingLotsSerializer(SourceAssetSerializer):
         fields = ('identifier', 'name', 'geom', 'source')
         geo_field = 'geom'
 
-    identifier = serializers.SerializerMethodField()
-    name = serializers.SerializerMethodField()
-    geom = GeometrySerializerMethodField()
-
-    def get_geom(self, obj):
-        try:
-            return ParkingLots.objects.get(id=obj.parking_info.lot_id).geom.transform(4326, clone=True)
-        except ParkingLots.DoesNotExist:
-            return None
-
-    def get_name(self, obj):
-        return obj.nameid.name
-
-    def get_identifier(self, obj):
-        return obj.fpd_uid
+    identifier = serializers.IntegerField(source='fpd_uid')
+    name = serializers.CharField(source='nameid.name')
 
 
 class PromotePhaseSerializer(serializers.Serializer):
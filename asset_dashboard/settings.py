@@ -218,6 +218,49 @@ REST_FRAMEWORK = {
 
 GEOM_BUFFER = .000005
 
+# Apply the change from a single added or removed asset to the stored GIS
+# measurements of its phase, rather than recomputing them, where it's safe
+INCREMENTAL_GIS = os.getenv('INCREMENTAL_GIS', 'True') == 'True'
+
+# Queue full GIS recomputes for the run_gis_worker management command, rather
+# than running them in the request that changed the phase's assets
+GIS_JOB_QUEUE = os.getenv('GIS_JOB_QUEUE', 'False') == 'True'
+
+# Seconds after which a running GIS job is assumed to be dead and retried
+GIS_JOB_TIMEOUT = int(os.getenv('GIS_JOB_TIMEOUT', 60 * 30))
+
+# Answer GIS recomputes' zone, district and disinvested area queries from an
+# in-memory index of the boundaries, rather than from the database
+BOUNDARY_INDEX = os.getenv('BOUNDARY_INDEX', 'True') == 'True'
+
+# Seconds after which each process reloads its boundary index, to pick up
+# boundary changes made by other processes when the cache isn't shared
+BOUNDARY_INDEX_TIMEOUT = int(os.getenv('BOUNDARY_INDEX_TIMEOUT', 60 * 60))
+
+# Seconds that vector tiles are cached. Tiles of saved assets are also
+# invalidated whenever an asset changes, but tiles of the GIS layers, which
+# are maintained outside of this application, only expire.
+TILE_CACHE_TIMEOUT = int(os.getenv('TILE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Seconds after which each process rebuilds its index of asset names for
+# search suggestions, to pick up changes made in the GIS database
+SUGGESTION_INDEX_TIMEOUT = int(os.getenv('SUGGESTION_INDEX_TIMEOUT', 60 * 60))
+
+# Seconds after a sync of the asset search index that searches stop reading
+# it and search the GIS database instead, until the index is synced again
+ASSET_SEARCH_INDEX_MAX_AGE = int(os.getenv('ASSET_SEARCH_INDEX_MAX_AGE', 60 * 60 * 24))
+
+# Seconds that a search of every asset type waits for the searches of each
+# type, which run in parallel, before returning the results it has
+ALL_ASSET_SEARCH_TIMEOUT = float(os.getenv('ALL_ASSET_SEARCH_TIMEOUT', 5))
+
+# Threads that run the searches of each asset type, shared by every search of
+# all asset types in a process. Searches wait for a free thread.
+ALL_ASSET_SEARCH_WORKERS = int(os.getenv('ALL_ASSET_SEARCH_WORKERS', 10))
+
+# Seconds that each process keeps its copy of the score weights
+SCORE_WEIGHTS_CACHE_TIMEOUT = int(os.getenv('SCORE_WEIGHTS_CACHE_TIMEOUT', 60))
+
 # remove decimal places for djmoney
 CURRENCY_DECIMAL_PLACES = 0
 
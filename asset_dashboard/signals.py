@@ -1,9 +1,19 @@
+import math
+import threading
+from contextlib import contextmanager
 from functools import cached_property
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.gis.geos import GeometryCollection
 
-from .models import LocalAsset, PhaseZoneDistribution, ProjectScore
+from .models import LocalAsset, PhaseZoneDistribution, ProjectScore, Phase, Project, \
+    PhaseSummary, ScoreWeights, PhaseGeography, Zone, HouseDistrict, SenateDistrict, \
+    CommissionerDistrict, GISJob, score_weights_data_version
+from .planner import planner_data_version
+from .boundaries import get_boundary_index, invalidate_boundary_index
+from .tiles import invalidate_local_asset_tiles
 
 
 class ProjectGISProcessor:
@@ -45,11 +55,27 @@ class ProjectGISProcessor:
         # filter out None
         filtered_geoms = tuple([geom for geom in filter(None, geoms)])
 
-        return GeometryCollection(filtered_geoms)
+        return GeometryCollection(
+            filtered_geoms, srid=LocalAsset._meta.get_field('geom').srid
+        )
+
+    @cached_property
+    def boundary_index(self):
+        return get_boundary_index()
+
+    @cached_property
+    def zone_intersections(self) -> dict:
+        if self.boundary_index:
+            return self.boundary_index.zones.intersections(self.phase_geometries)
+
+        return Zone.get_intersections(self.phase_geometries)
 
     @cached_property
     def zone_distributions(self) -> dict:
-        return LocalAsset.get_distribution_by_zone(self.phase_geometries)
+        """
+        Map of zone ID to the area of the phase's assets within the zone.
+        """
+        return {zone_id: area for zone_id, (_, area) in self.zone_intersections.items()}
 
     @cached_property
     def zone_proportions(self) -> dict:
@@ -57,39 +83,99 @@ class ProjectGISProcessor:
             self.zone_distributions, self.phase_geometries.area
         )
 
+    @cached_property
+    def disinvested_area(self) -> float:
+        if self.phase_geometries.area == 0.0:
+            return 0
+
+        geoms = [self.phase_linestrings, self.phase_points, self.phase_polygons]
+
+        if self.boundary_index:
+            return self.boundary_index.disinvested_area(geoms)
+
+        return ProjectScore.calculate_disinvested_area(geoms)
+
+    def rebuild(self):
+        """
+        Recompute all of the phase's measurements from all of its assets.
+        """
+        if not self.phase_assets.exists():
+            self.clear()
+            return
+
+        self.save_phase_zone_distributions()
+        self.save_phase_geography()
+        self.save_project_boundaries()
+        self.save_project_scores()
+
     def save_phase_zone_distributions(self):
-        for zone, proportion in self.zone_proportions.items():
-            zone_distribution, _ = PhaseZoneDistribution.objects.get_or_create(
-                phase=self.phase, zone=zone
-            )
+        existing = {
+            distribution.zone_id: distribution
+            for distribution in PhaseZoneDistribution.objects.filter(phase=self.phase)
+        }
+
+        for_create = []
+        for_update = []
+
+        for zone_id, proportion in self.zone_proportions.items():
+            if zone_id in existing:
+                zone_distribution = existing[zone_id]
+                for_update.append(zone_distribution)
+            else:
+                zone_distribution = PhaseZoneDistribution(phase=self.phase, zone_id=zone_id)
+                for_create.append(zone_distribution)
 
             zone_distribution.zone_distribution_proportion = proportion
-            zone_distribution.save()
+            zone_distribution.zone_distribution_area = self.zone_distributions[zone_id]
+
+        PhaseZoneDistribution.objects.bulk_create(for_create)
+        PhaseZoneDistribution.objects.bulk_update(
+            for_update, ['zone_distribution_proportion', 'zone_distribution_area']
+        )
+
+        # The bulk operations don't send the signals that keep these up to date
+        refresh_phase_summaries([self.phase.id])
+        invalidate_planner()
+
+    def save_phase_geography(self):
+        PhaseGeography.objects.update_or_create(
+            phase=self.phase,
+            defaults={
+                'area': self.phase_geometries.area,
+                'disinvested_area': self.disinvested_area,
+            }
+        )
 
     def save_project_scores(self):
         ProjectScore.save_geographic_distance_scores(self.zone_proportions, self.project)
-        ProjectScore.save_social_equity_score(
-            self.phase_geometries,
-            self.project,
-            geoms=[self.phase_linestrings, self.phase_points, self.phase_polygons]
+        ProjectScore.save_disinvested_proportion(
+            self.disinvested_area, self.phase_geometries.area, self.project
         )
 
-    def save_project_zones(self):
-        self.project.update_project_zones(self.phase_geometries)
+    def save_project_boundaries(self):
+        """
+        Set the project's zones and districts from the assets of all of its
+        phases.
+        """
+        if Project.assign_boundaries([self.project.id]):
+            # The through table writes don't send m2m_changed
+            invalidate_planner()
 
-    def save_project_districts(self):
-        self.project.update_project_districts(self.phase_geometries)
+    def clear(self):
+        """
+        Delete all of the phase's measurements, e.g., once its last asset is gone.
+        """
+        self.delete_zone_distributions()
+        self.delete_phase_geography()
+        # The project's other phases may still have assets
+        self.save_project_boundaries()
+        self.reset_project_geo_scores()
 
     def delete_zone_distributions(self):
         return PhaseZoneDistribution.objects.filter(phase=self.phase).delete()
 
-    def delete_project_zones(self):
-        return self.project.zones.all().delete()
-
-    def delete_project_districts(self):
-        self.project.house_districts.all().delete()
-        self.project.senate_districts.all().delete()
-        self.project.commissioner_districts.all().delete()
+    def delete_phase_geography(self):
+        return PhaseGeography.objects.filter(phase=self.phase).delete()
 
     def reset_project_geo_scores(self):
         try:
@@ -100,6 +186,297 @@ class ProjectGISProcessor:
         except ProjectScore.DoesNotExist:
             pass
 
+    def find_inconsistencies(self) -> list:
+        """
+        Compare the measurements stored for the phase, e.g., by incremental
+        updates, with a full recompute from its assets, without saving anything.
+        Returns a description of each difference.
+        """
+        inconsistencies = []
+
+        def compare(label, stored, computed):
+            if stored is None or not math.isclose(stored, computed, rel_tol=1e-6, abs_tol=1e-9):
+                inconsistencies.append(f'{label}: stored {stored}, computed {computed}')
+
+        distributions = {
+            distribution.zone_id: distribution
+            for distribution in PhaseZoneDistribution.objects.filter(phase=self.phase)
+        }
+
+        zones = Zone.objects.in_bulk(self.zone_distributions)
+
+        for zone_id, area in self.zone_distributions.items():
+            zone = zones[zone_id]
+            distribution = distributions.get(zone_id)
+
+            if distribution is None:
+                inconsistencies.append(f'{zone} distribution: missing')
+                continue
+
+            compare(f'{zone} area', distribution.zone_distribution_area, area)
+            compare(
+                f'{zone} proportion',
+                distribution.zone_distribution_proportion,
+                self.zone_proportions[zone_id]
+            )
+
+        geography = PhaseGeography.objects.filter(phase=self.phase).first()
+
+        if geography is None:
+            inconsistencies.append('Phase geography: missing')
+        else:
+            compare('Phase area', geography.area, self.phase_geometries.area)
+            compare('Disinvested area', geography.disinvested_area, self.disinvested_area)
+
+        for attribute in Project.BOUNDARY_RELATIONS:
+            stored = set(getattr(self.project, attribute).values_list('id', flat=True))
+            computed = {
+                boundary_id for _, boundary_id in
+                Project.find_boundaries(attribute, [self.project.id])
+            }
+
+            if stored != computed:
+                inconsistencies.append(
+                    f'Project {attribute}: stored {sorted(stored)}, computed {sorted(computed)}'
+                )
+
+        project_score = ProjectScore.objects.filter(project=self.project).first()
+
+        if project_score is None:
+            inconsistencies.append('Project score: missing')
+        else:
+            geographic_distance_score = len(
+                [proportion for proportion in self.zone_proportions.values() if proportion > 0]
+            )
+
+            if project_score.geographic_distance_score != geographic_distance_score:
+                inconsistencies.append(
+                    f'Geographic distance score: stored {project_score.geographic_distance_score}, '
+                    f'computed {geographic_distance_score}'
+                )
+
+            # The score is saved to an integer field, which truncates it
+            if self.phase_geometries.area == 0.0:
+                social_equity_score = 0
+            else:
+                social_equity_score = int(self.disinvested_area / self.phase_geometries.area * 5)
+
+            if project_score.social_equity_score != social_equity_score:
+                inconsistencies.append(
+                    f'Social equity score: stored {project_score.social_equity_score}, '
+                    f'computed {social_equity_score}'
+                )
+
+        return inconsistencies
+
+
+class IncrementalGISProcessor(ProjectGISProcessor):
+    """
+    Applies the difference made by adding or removing a single LocalAsset to
+    the measurements stored for its phase, instead of recomputing them from
+    all of the phase's assets.
+
+    This is only safe when the asset is far enough from the phase's other
+    assets that their (buffered) geometries don't overlap, so that areas simply
+    add up, and when no other phase of the project has assets. The project's
+    zones and districts are those of the assets of all of its phases, but
+    removing an asset only checks whether this phase's other assets still
+    reach a boundary before dropping it. can_apply() checks both, along with
+    the stored measurements it builds on.
+    """
+    # Assets closer than this to each other may overlap once buffered
+    SEPARATION = 2 * (settings.GEOM_BUFFER + ProjectScore.DISINVESTED_AREA_BUFFER)
+
+    DISTRICT_RELATIONS = [
+        ('house_districts', HouseDistrict),
+        ('senate_districts', SenateDistrict),
+        ('commissioner_districts', CommissionerDistrict),
+    ]
+
+    def __init__(self, asset, removed=False):
+        super().__init__(phase=asset.phase)
+        self.asset = asset
+        self.removed = removed
+        self.sign = -1 if removed else 1
+
+    @cached_property
+    def other_assets(self):
+        return LocalAsset.objects.filter(phase=self.phase).exclude(pk=self.asset.pk)
+
+    @cached_property
+    def delta_geometry(self):
+        """
+        The asset's geometry as it contributes to the phase geometries, or None
+        if it isn't one of the geometry types that they're built from.
+        """
+        geom_type = self.asset.geom.geom_type
+
+        if geom_type in ('Polygon', 'MultiPolygon'):
+            return self.asset.geom
+
+        if geom_type in ('LineString', 'MultiLineString', 'Point'):
+            return self.asset.geom.buffer(settings.GEOM_BUFFER)
+
+        return None
+
+    @cached_property
+    def geography(self):
+        return PhaseGeography.objects.filter(phase=self.phase).first()
+
+    @cached_property
+    def stored_zone_distributions(self) -> list:
+        return list(
+            PhaseZoneDistribution.objects.filter(phase=self.phase).select_related('zone')
+        )
+
+    def can_apply(self) -> bool:
+        if self.delta_geometry is None or self.geography is None:
+            return False
+
+        stored_zone_ids = {
+            distribution.zone_id for distribution in self.stored_zone_distributions
+            if distribution.zone_distribution_area is not None
+        }
+        zone_ids = set(Zone.objects.filter(boundary__isnull=False).values_list('id', flat=True))
+
+        if stored_zone_ids != zone_ids:
+            return False
+
+        other_phase_assets = LocalAsset.objects.filter(phase__project=self.project)\
+                                               .exclude(phase=self.phase)
+
+        if other_phase_assets.exists():
+            return False
+
+        return not self.other_assets.filter(
+            geom__dwithin=(self.asset.geom, self.SEPARATION)
+        ).exists()
+
+    def other_assets_reach(self, boundary) -> bool:
+        return self.other_assets.filter(
+            geom__dwithin=(boundary, settings.GEOM_BUFFER)
+        ).exists()
+
+    @staticmethod
+    def intersection_area(boundary, geom) -> float:
+        # Use the geometry's own area when it's entirely within the boundary,
+        # so that, e.g., the proportion of a phase in a single zone is exactly 1
+        if boundary.contains(geom):
+            return geom.area
+
+        return boundary.intersection(geom).area
+
+    def apply(self):
+        delta = self.delta_geometry
+        geography = self.geography
+
+        geography.area = max(geography.area + self.sign * delta.area, 0)
+        geography.disinvested_area = max(
+            geography.disinvested_area
+            + self.sign * ProjectScore.calculate_disinvested_area([delta]),
+            0
+        )
+        geography.save()
+
+        proportions_by_zone = {}
+
+        for distribution in self.stored_zone_distributions:
+            zone = distribution.zone
+
+            if zone.boundary.intersects(delta):
+                if self.removed and not self.other_assets_reach(zone.boundary):
+                    # Don't leave a rounding error behind
+                    distribution.zone_distribution_area = 0.0
+                else:
+                    distribution.zone_distribution_area = max(
+                        distribution.zone_distribution_area
+                        + self.sign * self.intersection_area(zone.boundary, delta),
+                        0.0
+                    )
+
+            if geography.area == 0.0:
+                distribution.zone_distribution_proportion = distribution.zone_distribution_area
+            else:
+                distribution.zone_distribution_proportion = (
+                    distribution.zone_distribution_area / geography.area
+                )
+
+            distribution.save()
+
+            proportions_by_zone[zone] = distribution.zone_distribution_proportion
+
+        self.apply_to_relation('zones', Zone)
+
+        for attribute, model in self.DISTRICT_RELATIONS:
+            self.apply_to_relation(attribute, model)
+
+        ProjectScore.save_geographic_distance_scores(proportions_by_zone, self.project)
+        ProjectScore.save_disinvested_proportion(
+            geography.disinvested_area, geography.area, self.project
+        )
+
+    def apply_to_relation(self, attribute, model):
+        related = getattr(self.project, attribute)
+
+        if self.boundary_index:
+            layer = self.boundary_index.layer(attribute)
+            touched = {
+                boundary_id: layer.geometries[boundary_id]
+                for boundary_id in layer.intersecting(self.delta_geometry)
+            }
+        else:
+            touched = dict(
+                model.objects.filter(boundary__intersects=self.delta_geometry)
+                             .values_list('id', 'boundary')
+            )
+
+        if not self.removed:
+            related.add(*touched)
+            return
+
+        related.remove(*[
+            boundary_id for boundary_id, boundary in touched.items()
+            if not self.other_assets_reach(boundary)
+        ])
+
+
+_suspended = threading.local()
+
+
+@contextmanager
+def suspend_gis_signals():
+    """
+    Skip calculate_gis for LocalAsset changes made by this thread within the
+    block, e.g., to change many assets at once. The caller is responsible for
+    recomputing the affected phases with recalculate_phases_gis() afterwards.
+    """
+    previous = getattr(_suspended, "gis", False)
+    _suspended.gis = True
+
+    try:
+        yield
+    finally:
+        _suspended.gis = previous
+
+
+def recalculate_phases_gis(phases):
+    """
+    Recompute the GIS measurements of each phase once, from its current assets.
+    """
+    for phase in phases:
+        rebuild_phase_gis(phase)
+
+
+def rebuild_phase_gis(phase):
+    """
+    Recompute all of the phase's GIS measurements, or, with GIS_JOB_QUEUE on,
+    queue a job for the run_gis_worker command to do it.
+    """
+    if settings.GIS_JOB_QUEUE:
+        GISJob.enqueue(phase.id)
+    else:
+        ProjectGISProcessor(phase=phase).rebuild()
+
 
 @receiver([post_save, post_delete], sender="asset_dashboard.LocalAsset")
 def calculate_gis(sender, instance, **kwargs):
@@ -114,6 +491,16 @@ def calculate_gis(sender, instance, **kwargs):
         but only if there will be existing LocalAssets in the Phase.
     3. Delete all of the measurements when all of the LocalAssets are deleted.
     """
+    if getattr(_suspended, "gis", False):
+        return
+
+    if settings.GIS_JOB_QUEUE and instance.phase_id not in phases_being_deleted():
+        # Queue every change, including incremental ones and the removal of
+        # the last asset, rather than writing measurements here that a job
+        # running for the phase would overwrite with ones built from the
+        # assets it read before this change
+        rebuild_phase_gis(instance.phase)
+        return
 
     gis_processor = ProjectGISProcessor(phase=instance.phase)
 
@@ -128,15 +515,238 @@ def calculate_gis(sender, instance, **kwargs):
             #
             # This also prevents an IntegrityError that happens in the deletion of the Phase,
             # when the last asset is deleted.
-            gis_processor.delete_zone_distributions()
-            gis_processor.delete_project_zones()
-            gis_processor.delete_project_districts()
-            gis_processor.reset_project_geo_scores()
+            gis_processor.clear()
+            return
+
+    # Apply just the added or removed asset, when it's safe to. An asset whose
+    # geometry was edited is always recomputed in full, since its previous
+    # geometry isn't known here.
+    if settings.INCREMENTAL_GIS and (kwargs["signal"] == post_delete or kwargs.get("created")):
+        incremental_processor = IncrementalGISProcessor(
+            instance, removed=kwargs["signal"] == post_delete
+        )
+
+        if incremental_processor.can_apply():
+            incremental_processor.apply()
             return
 
     # this logic will occur if it's a post_save signal, or if
     # it's a post_delete signal and there are still assets in the phase
-    gis_processor.save_phase_zone_distributions()
-    gis_processor.save_project_zones()
-    gis_processor.save_project_districts()
-    gis_processor.save_project_scores()
+    rebuild_phase_gis(instance.phase)
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.Phase")
+@receiver([post_save, post_delete], sender="asset_dashboard.FundingStream")
+@receiver([post_save, post_delete], sender="asset_dashboard.Project")
+@receiver([post_save, post_delete], sender="asset_dashboard.ProjectScore")
+@receiver([post_save, post_delete], sender="asset_dashboard.PhaseZoneDistribution")
+@receiver([post_save, post_delete], sender="asset_dashboard.LocalAsset")
+@receiver([post_save, post_delete], sender="asset_dashboard.ScoreWeights")
+@receiver([post_save, post_delete], sender="asset_dashboard.Section")
+@receiver([post_save, post_delete], sender="asset_dashboard.ProjectCategory")
+@receiver([post_save, post_delete], sender="asset_dashboard.Zone")
+@receiver([post_save, post_delete], sender="asset_dashboard.HouseDistrict")
+@receiver([post_save, post_delete], sender="asset_dashboard.SenateDistrict")
+@receiver([post_save, post_delete], sender="asset_dashboard.CommissionerDistrict")
+@receiver(m2m_changed, sender=Phase.funding_streams.through)
+@receiver(m2m_changed, sender=Project.zones.through)
+@receiver(m2m_changed, sender=Project.house_districts.through)
+@receiver(m2m_changed, sender=Project.senate_districts.through)
+@receiver(m2m_changed, sender=Project.commissioner_districts.through)
+def invalidate_planner_payload(sender, **kwargs):
+    """
+    Bump the planner data version whenever a row that appears in the cached
+    planner payload changes.
+    """
+    if kwargs["signal"] == m2m_changed and not kwargs["action"].startswith("post_"):
+        return
+
+    invalidate_planner()
+
+
+@receiver(m2m_changed, sender=Project.house_districts.through)
+@receiver(m2m_changed, sender=Project.senate_districts.through)
+@receiver(m2m_changed, sender=Project.commissioner_districts.through)
+def refresh_districts_for_project(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Handle changes to a project's districts from either side of the relation.
+    When it's changed from a district, i.e., reverse is True, pk_set holds
+    project IDs, except when the relation is cleared, which refreshes every
+    project.
+    """
+    if not action.startswith("post_"):
+        return
+
+    if not reverse:
+        Project.refresh_districts([instance.pk])
+    elif action == "post_clear":
+        Project.refresh_districts()
+    elif pk_set:
+        Project.refresh_districts(pk_set)
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.HouseDistrict")
+@receiver([post_save, post_delete], sender="asset_dashboard.SenateDistrict")
+@receiver([post_save, post_delete], sender="asset_dashboard.CommissionerDistrict")
+def refresh_districts_for_district(sender, instance, **kwargs):
+    """
+    Relabel the projects in a district after it's renamed, and drop it from
+    their district IDs after it's deleted, which deletes its links to them
+    without sending m2m_changed.
+    """
+    relation = {
+        HouseDistrict: "house_districts",
+        SenateDistrict: "senate_districts",
+        CommissionerDistrict: "commissioner_districts",
+    }[sender]
+    ids_column, _ = Project.DISTRICT_RELATIONS[relation]
+
+    project_ids = Project.objects.filter(**{f"{ids_column}__contains": [instance.pk]})\
+                                 .values_list("id", flat=True)
+
+    if project_ids := list(project_ids):
+        Project.refresh_districts(project_ids)
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.Zone")
+@receiver([post_save, post_delete], sender="asset_dashboard.HouseDistrict")
+@receiver([post_save, post_delete], sender="asset_dashboard.SenateDistrict")
+@receiver([post_save, post_delete], sender="asset_dashboard.CommissionerDistrict")
+def invalidate_boundaries(sender, **kwargs):
+    """
+    Rebuild the boundary index after a boundary changes, e.g., when the
+    import_boundaries command runs.
+    """
+    invalidate_boundary_index()
+    transaction.on_commit(invalidate_boundary_index)
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.LocalAsset")
+def invalidate_tiles(sender, **kwargs):
+    invalidate_local_asset_tiles()
+
+
+def invalidate_planner():
+    """
+    Bump the planner data version, e.g., after a bulk change that doesn't send
+    the signals that invalidate_planner_payload() receives.
+    """
+    # Bump right away, so that this process sees its own change, and again on
+    # commit, in case another worker rebuilt the payload from the previously
+    # committed data in the meantime.
+    planner_data_version.bump()
+    transaction.on_commit(planner_data_version.bump)
+
+
+# IDs of the phases that are being deleted by this thread. Deleting a phase
+# cascades to its zone distributions first, and their receivers shouldn't
+# recreate the summary that is about to be deleted along with the phase.
+_deleting = threading.local()
+
+
+def phases_being_deleted() -> set:
+    if not hasattr(_deleting, "phase_ids"):
+        _deleting.phase_ids = set()
+
+    return _deleting.phase_ids
+
+
+def refresh_phase_summaries(phase_ids):
+    phase_ids = set(phase_ids) - phases_being_deleted()
+
+    if phase_ids:
+        with transaction.atomic():
+            PhaseSummary.refresh(phase_ids)
+
+
+@receiver(pre_delete, sender="asset_dashboard.Phase")
+def mark_phase_deleted(sender, instance, **kwargs):
+    phases_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender="asset_dashboard.Phase")
+def unmark_phase_deleted(sender, instance, **kwargs):
+    phases_being_deleted().discard(instance.pk)
+
+
+@receiver(post_save, sender="asset_dashboard.Phase")
+def refresh_summary_for_phase(sender, instance, **kwargs):
+    refresh_phase_summaries([instance.pk])
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.PhaseZoneDistribution")
+def refresh_summary_for_zone_distribution(sender, instance, **kwargs):
+    refresh_phase_summaries([instance.phase_id])
+
+
+@receiver(pre_delete, sender="asset_dashboard.FundingStream")
+def remember_funding_stream_phases(sender, instance, **kwargs):
+    # The links to the phases are gone by post_delete
+    instance.summary_phase_ids = list(instance.phase_set.values_list("id", flat=True))
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.FundingStream")
+def refresh_summary_for_funding_stream(sender, instance, **kwargs):
+    if kwargs["signal"] == post_delete:
+        phase_ids = getattr(instance, "summary_phase_ids", [])
+    else:
+        phase_ids = instance.phase_set.values_list("id", flat=True)
+
+    refresh_phase_summaries(phase_ids)
+
+
+@receiver(m2m_changed, sender=Phase.funding_streams.through)
+def refresh_summary_for_phase_funding(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Handle changes to Phase.funding_streams from either side of the relation.
+    When it's changed from a FundingStream, i.e., reverse is True, pk_set holds
+    phase IDs, except when the relation is cleared.
+    """
+    if not reverse:
+        phase_ids = [instance.pk]
+    elif action == "pre_clear":
+        remember_funding_stream_phases(sender, instance)
+        return
+    elif action == "post_clear":
+        phase_ids = getattr(instance, "summary_phase_ids", [])
+    else:
+        phase_ids = pk_set or []
+
+    if action.startswith("post_"):
+        refresh_phase_summaries(phase_ids)
+
+
+@receiver(post_save, sender="asset_dashboard.Project")
+def refresh_summary_names_for_project(sender, instance, **kwargs):
+    PhaseSummary.refresh_names([instance.pk])
+
+
+@receiver(pre_delete, sender="asset_dashboard.Section")
+@receiver(pre_delete, sender="asset_dashboard.ProjectCategory")
+def remember_owned_projects(sender, instance, **kwargs):
+    # Projects are detached from the section or category by post_delete
+    instance.summary_project_ids = list(instance.project_set.values_list("id", flat=True))
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.Section")
+@receiver([post_save, post_delete], sender="asset_dashboard.ProjectCategory")
+def refresh_summary_names_for_owner(sender, instance, **kwargs):
+    if kwargs["signal"] == post_delete:
+        project_ids = getattr(instance, "summary_project_ids", [])
+    else:
+        project_ids = list(instance.project_set.values_list("id", flat=True))
+
+    PhaseSummary.refresh_names(project_ids)
+
+
+@receiver([post_save, post_delete], sender="asset_dashboard.ScoreWeights")
+def clear_score_weights_cache(sender, **kwargs):
+    ScoreWeights.clear_cache()
+
+    # As in invalidate_planner(), bump again on commit, in case another worker
+    # read the previously committed weights in the meantime. The planner payload
+    # is built from ScoreWeights.load(), so bump its version after this one, or
+    # a worker could rebuild it from a copy of the weights that is about to go.
+    score_weights_data_version.bump()
+    transaction.on_commit(score_weights_data_version.bump)
+    transaction.on_commit(planner_data_version.bump)
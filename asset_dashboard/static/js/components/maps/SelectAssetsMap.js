@@ -24,7 +24,8 @@ function AssetTypeOptions() {
     {value: 'trails', label: 'Trails'},
     {value: 'points_of_interest', label: 'Points of Interest'},
     {value: 'picnic_groves', label: 'Picnic Groves'},
-    {value: 'parking_lots', label: 'Parking Lots'}
+    {value: 'parking_lots', label: 'Parking Lots'},
+    {value: 'all', label: 'All Asset Types'}
   ]
 
   return options.map(option => {
@@ -44,6 +45,7 @@ function SelectAssetsMap(props) {
   const [ajaxMessage, setAjaxMessage] = useSessionstorageState('ajaxMessage', null)
   const [multipleFeatures, setMultipleFeatures] = useState(null)
   const [singleFeature, setSingleFeature] = useState(null)
+  const [suggestions, setSuggestions] = useState([])
 
   useEffect(() => {
     if (props?.existing_assets) {
@@ -78,7 +80,7 @@ function SelectAssetsMap(props) {
         if (!existingIDs.includes(feature.properties.identifier.toString())) {
           return {
             'asset_id': feature['properties']['identifier'],
-            'asset_type': searchAssetType,
+            'asset_type': feature.properties.asset_type || searchAssetType,
             'asset_name': feature['properties']['name'],
             'geom': feature['geometry'],
             'phase': phaseId
@@ -132,6 +134,41 @@ function SelectAssetsMap(props) {
     })
   }
 
+  // Suggest asset names as they're typed. Suggestions don't include
+  // geometries, so they're cheap enough to fetch after each keystroke.
+  useEffect(() => {
+    if (searchText.length == 0) {
+      setSuggestions([])
+      return
+    }
+
+    const controller = new AbortController()
+
+    const timeout = setTimeout(() => {
+      const url = `/assets/suggest/?` + new URLSearchParams({
+        'prefix': searchText,
+        'asset_type': searchAssetType
+      })
+
+      fetch(url, {
+        headers: {'Accept': 'application/json'},
+        mode: 'same-origin',
+        signal: controller.signal
+      }).then((response) => response.json())
+      .then((data) => setSuggestions(data.suggestions))
+      .catch(error => {
+        if (error.name != 'AbortError') {
+          console.error('error', error)
+        }
+      })
+    }, 150)
+
+    return () => {
+      clearTimeout(timeout)
+      controller.abort()
+    }
+  }, [searchText, searchAssetType])
+
   function searchAssets() {
     setIsLoading(true)
 
@@ -159,6 +196,10 @@ function SelectAssetsMap(props) {
 
       if (data.features.length == 0) {
         setAjaxMessage({text: 'No assets found with search query.', tag: 'info'})
+      } else if (data.partial) {
+        setAjaxMessage({text: `Searching ${data.timed_out.join(', ').replaceAll('_', ' ')} took too long. Showing the other matching assets.`, tag: 'info'})
+      } else if (data.next) {
+        setAjaxMessage({text: `Showing the first ${data.features.length} matching assets. Refine your search to find others.`, tag: 'info'})
       }
 
       setSearchGeoms(data)
@@ -261,7 +302,13 @@ function SelectAssetsMap(props) {
                   value={searchText}
                   className='form-control'
                   aria-label='Search for assets'
-                  placeholder='Search for assets' />
+                  placeholder='Search for assets'
+                  list='asset-suggestions' />
+                <datalist id='asset-suggestions'>
+                  {suggestions.map(suggestion => {
+                    return <option value={suggestion.name} key={`${suggestion.asset_type}-${suggestion.identifier}-${suggestion.name}`} />
+                  })}
+                </datalist>
               </div>
               <div className='row m-1'>
                 <select
@@ -5,6 +5,8 @@ $(document).ready(function() {
     var table = $('#project-list-table').DataTable({
         serverSide: true,
         ajax: 'projects/json/',
+        // searches are ordered by relevance until a column is sorted
+        order: [],
         columns: [
             {
                 name: 'id',
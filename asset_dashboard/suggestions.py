@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .cache import DataVersion
+from .models import Buildings, TrailsInfo, PoiInfo, PicnicGroves, ParkingLots
+
+
+# Bumped by the sync_asset_search_index command, so that every process
+# rebuilds its index of asset names on the next suggestion
+suggestion_data_version = DataVersion('asset-suggestions')
+
+# Changes made by this process, for cache backends that don't keep the shared
+# version, e.g., the DummyCache used in development.
+_local_generation = 0
+
+_index = {'key': None, 'expires': 0, 'index': None}
+_index_lock = threading.Lock()
+
+# Held by the thread rebuilding the index, while the others keep serving the
+# previous one
+_rebuild_lock = threading.Lock()
+
+
+class PrefixIndex:
+    """
+    A sorted list of the normalized names of assets, searched by prefix with
+    a binary search, so that a suggestion costs O(log n) plus the number of
+    suggestions, however many assets there are.
+
+    Whole names and the names starting at each later word, e.g., "woods
+    grove 5" and "grove 5" of "Schiller Woods Grove 5", are kept in separate
+    lists, so that names starting with the prefix are suggested first.
+    """
+
+    def __init__(self, entries):
+        """
+        entries is a list of (name, asset type, asset identifier) tuples.
+        """
+        names = []
+        words = []
+
+        for name, asset_type, asset_id in entries:
+            key = self.normalize(name) if name else ''
+
+            if not key:
+                continue
+
+            suggestion = (name, asset_type, asset_id)
+            names.append((key, suggestion))
+
+            start = key.find(' ')
+
+            while start != -1:
+                words.append((key[start + 1:], suggestion))
+                start = key.find(' ', start + 1)
+
+        self.names = sorted(names)
+        self.words = sorted(words)
+
+    @staticmethod
+    def normalize(value) -> str:
+        return ' '.join(str(value).lower().split())
+
+    @staticmethod
+    def matches(keys, prefix):
+        position = bisect_left(keys, (prefix,))
+
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            yield keys[position][1]
+            position += 1
+
+    def suggest(self, prefix, limit=10, asset_type=None) -> list:
+        """
+        Up to limit (name, asset type, asset identifier) tuples, of names starting with
+        the prefix, then of names with a later word starting with it, each in
+        alphabetical order.
+        """
+        prefix = self.normalize(prefix)
+        suggestions = []
+        seen = set()
+
+        if not prefix:
+            return suggestions
+
+        for keys in (self.names, self.words):
+            for suggestion in self.matches(keys, prefix):
+                if len(suggestions) == limit:
+                    return suggestions
+
+                if suggestion in seen or (asset_type and suggestion[1] != asset_type):
+                    continue
+
+                seen.add(suggestion)
+                suggestions.append(suggestion)
+
+        return suggestions
+
+
+def asset_names():
+    """
+    The name of every asset that can be searched for, by asset type, read
+    from the GIS database, with its identifier, i.e., the identifier that
+    asset searches and map tiles return for it.
+    """
+    for fpd_uid, name in Buildings.objects\
+            .filter(**dict(Buildings.Search.and_fields))\
+            .values_list('fpd_uid', 'building_name'):
+        yield name, 'buildings', fpd_uid
+
+    for trail_id, name in TrailsInfo.objects.values_list('id', 'trail_subsystem'):
+        yield name, 'trails', trail_id
+
+    points_of_interest = PoiInfo.objects.filter(**dict(PoiInfo.Search.and_fields))
+
+    for fpd_uid, name in points_of_interest.values_list('fpd_uid', 'nameid__name'):
+        yield name, 'points_of_interest', fpd_uid
+
+    # Parking lots are searched by the name of the point of interest they
+    # serve, so only suggest the points of interest with a parking lot
+    for fpd_uid, name in points_of_interest\
+            .filter(parking_info__lot_id__in=ParkingLots.objects.values('id'))\
+            .values_list('fpd_uid', 'nameid__name'):
+        yield name, 'parking_lots', fpd_uid
+
+    for fpd_uid, name, grove in PicnicGroves.objects.values_list('fpd_uid', 'poi_info__nameid__name', 'grove'):
+        yield f'{name} Grove {grove}' if name else f'Grove {grove}', 'picnic_groves', fpd_uid
+
+
+def get_suggestion_index() -> PrefixIndex:
+    """
+    Return this process' index of asset names. The index is rebuilt when the
+    asset search index is synced, and at least every SUGGESTION_INDEX_TIMEOUT
+    seconds, since the assets are maintained outside of this application.
+
+    One thread rebuilds the index while the others keep serving the previous
+    one. Threads only wait for the rebuild when there is no index yet.
+    """
+    key = (suggestion_data_version.get(), _local_generation)
+
+    def current():
+        with _index_lock:
+            if _index['key'] == key and time.monotonic() < _index['expires']:
+                return _index['index'], True
+
+            return _index['index'], False
+
+    index, is_current = current()
+
+    if is_current or not _rebuild_lock.acquire(blocking=index is None):
+        return index
+
+    try:
+        # Another thread may have rebuilt the index while we waited
+        index, is_current = current()
+
+        if is_current:
+            return index
+
+        index = PrefixIndex(asset_names())
+
+        with _index_lock:
+            _index.update(
+                key=key,
+                expires=time.monotonic() + settings.SUGGESTION_INDEX_TIMEOUT,
+                index=index,
+            )
+
+        return index
+    finally:
+        _rebuild_lock.release()
+
+
+def invalidate_suggestion_index():
+    global _local_generation
+
+    with _index_lock:
+        _local_generation += 1
+
+    suggestion_data_version.bump()
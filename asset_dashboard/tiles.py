@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.contrib.gis.db.models.functions import GeomOutputGeoFunc, Transform
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F
+
+from .cache import DataVersion
+from .models import Buildings, Trails, PointsOfInterest, PicnicGroves, ParkingLots, LocalAsset
+
+
+# Bumped by the receivers in signals.py whenever a LocalAsset changes. The GIS
+# layers are maintained outside of this application, so their tiles expire
+# after TILE_CACHE_TIMEOUT seconds instead.
+local_asset_tile_version = DataVersion('tiles:local-assets')
+gis_tile_version = DataVersion('tiles:gis')
+
+# Half the width of the Web Mercator world, in meters
+ORIGIN_SHIFT = 20037508.342789244
+
+# Tile coordinate space, and the margin around each tile that geometries are
+# clipped to, so that lines and polygons don't show seams at tile edges
+EXTENT = 4096
+BUFFER = 64
+
+MAX_ZOOM = 22
+
+
+class AsMVTGeom(GeomOutputGeoFunc):
+    """
+    Transform a Web Mercator geometry into the coordinate space of a tile,
+    clipped to the tile's bounds.
+    """
+    function = 'ST_AsMVTGeom'
+    geom_param_pos = (0, 1)
+
+
+class TileLayer:
+    """
+    A layer of vector tiles, i.e., the geometries of a model's rows, with the
+    given expressions, e.g., F("building_name"), as their properties.
+    """
+
+    def __init__(self, queryset, properties, version):
+        self.queryset = queryset
+        self.properties = properties
+        self.version = version
+
+    def features(self, bounds):
+        return self.queryset.filter(geom__bboverlaps=bounds).values(
+            **self.properties,
+            mvt_geom=AsMVTGeom(Transform('geom', 3857), bounds, EXTENT, BUFFER, True),
+        )
+
+    def render(self, name, z, x, y) -> bytes:
+        """
+        Build the tile, as a Mapbox Vector Tile, in the database.
+        """
+        features = self.features(tile_bounds(z, x, y))
+        sql, params = features.query.sql_with_params()
+
+        with connections[features.db].cursor() as cursor:
+            cursor.execute(
+                f'SELECT ST_AsMVT(tile, %s, {EXTENT}, %s) FROM ({sql}) AS tile',
+                [name, 'mvt_geom', *params]
+            )
+            (tile,) = cursor.fetchone()
+
+        return bytes(tile) if tile else b''
+
+
+LAYERS = {
+    'buildings': TileLayer(
+        Buildings.objects.filter(ownership='fpdcc', demolished='no'),
+        {'identifier': F('fpd_uid'), 'name': F('building_name')},
+        gis_tile_version,
+    ),
+    'trails': TileLayer(
+        Trails.objects.all(),
+        {'identifier': F('trail_info_id'), 'name': F('trail_info__trail_subsystem')},
+        gis_tile_version,
+    ),
+    'points_of_interest': TileLayer(
+        PointsOfInterest.objects.all(),
+        {'identifier': F('poi_info__fpd_uid'), 'name': F('poi_info__nameid__name')},
+        gis_tile_version,
+    ),
+    'picnic_groves': TileLayer(
+        PicnicGroves.objects.all(),
+        {'identifier': F('fpd_uid'), 'name': F('poi_info__nameid__name'), 'grove_number': F('grove')},
+        gis_tile_version,
+    ),
+    'parking_lots': TileLayer(
+        ParkingLots.objects.all(),
+        {'identifier': F('id'), 'name': F('name')},
+        gis_tile_version,
+    ),
+    'local_assets': TileLayer(
+        LocalAsset.objects.all(),
+        {
+            'identifier': F('asset_id'),
+            'name': F('asset_name'),
+            'asset_type': F('asset_model'),
+            'phase': F('phase_id'),
+        },
+        local_asset_tile_version,
+    ),
+}
+
+
+def tile_bounds(z, x, y) -> Polygon:
+    """
+    The Web Mercator bounds of a tile, as ST_TileEnvelope() computes them.
+    """
+    size = 2 * ORIGIN_SHIFT / 2 ** z
+
+    xmin = -ORIGIN_SHIFT + x * size
+    ymax = ORIGIN_SHIFT - y * size
+
+    bounds = Polygon.from_bbox((xmin, ymax - size, xmin + size, ymax))
+    bounds.srid = 3857
+
+    return bounds
+
+
+def is_valid_tile(z, x, y) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def get_tile(name, z, x, y) -> bytes:
+    """
+    Return a tile of the named layer, from the site cache if it was built
+    since the layer's data last changed.
+    """
+    layer = LAYERS[name]
+    version = layer.version.get()
+
+    if version is None:
+        return layer.render(name, z, x, y)
+
+    key = f'tile:{name}:{version}:{z}:{x}:{y}'
+    tile = cache.get(key)
+
+    if tile is None:
+        tile = layer.render(name, z, x, y)
+        cache.set(key, tile, timeout=settings.TILE_CACHE_TIMEOUT)
+
+    return tile
+
+
+def invalidate_local_asset_tiles():
+    # As invalidate_planner() does, bump again on commit, in case another
+    # worker cached a tile of the previously committed data in the meantime
+    local_asset_tile_version.bump()
+    transaction.on_commit(local_asset_tile_version.bump)
@@ -0,0 +1,181 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import cached_property
+from itertools import accumulate
+
+from .models import Phase, PhaseSummary
+
+
+class PortfolioTotals:
+    """
+    The budget rollups shown under the CIP planner, i.e., the budget impact,
+    funded and unfunded amounts, and the estimated cost, funded amount and
+    zone costs by fiscal year, plus the cut line of a budget cap.
+
+    Rows are (phase ID, funding stream ID) pairs, in portfolio order, as
+    stored by PortfolioPhase. As in the planner, every row counts its phase's
+    totals, so a phase planned with two funding streams is counted twice.
+
+    The totals of every phase are read in one query, then each rollup is
+    computed over columns of those values, so that a scenario, e.g., a
+    reordering or a lower budget cap, only slices the columns rather than
+    reading anything again.
+    """
+    UNKNOWN_YEAR = 'N/A'
+
+    def __init__(self, rows):
+        self.rows = [tuple(row) for row in rows]
+
+    @classmethod
+    def for_portfolio(cls, portfolio):
+        return cls(
+            portfolio.phases.order_by('rank').values_list('phase_id', 'phase_funding_stream_id')
+        )
+
+    @cached_property
+    def phase_totals(self) -> dict:
+        """
+        Map of phase ID to its (year, total budget, total funded amount,
+        funded amount by year, cost by zone), from its PhaseSummary.
+        """
+        phase_ids = {phase_id for phase_id, _ in self.rows}
+
+        rows = Phase.objects.filter(id__in=phase_ids).values_list(
+            'id',
+            'year',
+            'summary__total_budget',
+            'summary__total_funded_amount',
+            'summary__funded_by_year',
+            'summary__cost_by_zone',
+        )
+
+        phase_totals = {}
+        years = {}
+
+        for phase_id, year, total_budget, total_funded_amount, funded_by_year, cost_by_zone in rows:
+            years[phase_id] = year
+
+            if total_budget is not None:
+                phase_totals[phase_id] = (
+                    year, total_budget, total_funded_amount, funded_by_year, cost_by_zone
+                )
+
+        # Summarize any phase that doesn't have a summary yet
+        unsummarized = set(years) - set(phase_totals)
+
+        for summary in PhaseSummary.summarize(unsummarized) if unsummarized else []:
+            phase_totals[summary.phase_id] = (
+                years[summary.phase_id],
+                summary.total_budget,
+                summary.total_funded_amount,
+                summary.funded_by_year,
+                summary.cost_by_zone,
+            )
+
+        return phase_totals
+
+    @cached_property
+    def columns(self) -> dict:
+        """
+        The totals of each row, as one list per value. Rows of phases that
+        don't exist are skipped.
+        """
+        rows = [
+            self.phase_totals[phase_id] for phase_id, _ in self.rows
+            if phase_id in self.phase_totals
+        ]
+
+        years, budgets, funded_amounts, funded_by_year, cost_by_zone = zip(*rows) if rows else [()] * 5
+
+        return {
+            'year': list(years),
+            'budget': [Decimal(budget) for budget in budgets],
+            'funded_amount': [Decimal(amount) for amount in funded_amounts],
+            'funded_by_year': list(funded_by_year),
+            'cost_by_zone': list(cost_by_zone),
+        }
+
+    @cached_property
+    def cumulative_budget(self) -> list:
+        return list(accumulate(self.columns['budget']))
+
+    def totals(self, start=0, stop=None) -> dict:
+        """
+        Rollups of the rows from start up to, but not including, stop.
+        """
+        rows = slice(start, stop)
+
+        years = self.columns['year'][rows]
+        budgets = self.columns['budget'][rows]
+        budget_impact = sum(budgets, Decimal(0))
+        funded = sum(self.columns['funded_amount'][rows], Decimal(0))
+
+        estimated_cost_by_year = defaultdict(Decimal)
+
+        for year, budget in zip(years, budgets):
+            estimated_cost_by_year[year or self.UNKNOWN_YEAR] += budget
+
+        # Every planned year is listed, even if nothing is funded in it
+        funded_amount_by_year = {year: Decimal(0) for year in years if year is not None}
+
+        for funded_by_year in self.columns['funded_by_year'][rows]:
+            for year, amount in funded_by_year:
+                funded_amount_by_year[year] = funded_amount_by_year.get(year, Decimal(0)) + Decimal(amount)
+
+        zone_cost_by_year = defaultdict(lambda: defaultdict(float))
+
+        for year, cost_by_zone in zip(years, self.columns['cost_by_zone'][rows]):
+            for zone_name, cost in cost_by_zone.items():
+                zone_cost_by_year[year or self.UNKNOWN_YEAR][zone_name] += cost
+
+        return {
+            'budget_impact': budget_impact,
+            'funded': funded,
+            'unfunded': budget_impact - funded,
+            'estimated_cost_by_year': dict(estimated_cost_by_year),
+            'funded_amount_by_year': funded_amount_by_year,
+            'zone_cost_by_year': {
+                year: dict(zone_costs) for year, zone_costs in zone_cost_by_year.items()
+            },
+        }
+
+    def cut_line(self, budget_cap) -> int:
+        """
+        The number of leading rows whose combined budget fits within the cap.
+        """
+        return next(
+            (position for position, total in enumerate(self.cumulative_budget) if total > budget_cap),
+            len(self.cumulative_budget)
+        )
+
+    def scenario(self, budget_cap=None) -> dict:
+        """
+        The totals of every row, and, given a budget cap, where the cut line
+        falls and the totals on either side of it.
+        """
+        scenario = self.totals()
+
+        if budget_cap is None:
+            scenario['cut_line'] = None
+            return scenario
+
+        position = self.cut_line(budget_cap)
+        budget_within_cap = self.cumulative_budget[position - 1] if position else Decimal(0)
+
+        rows = [
+            {'phase': phase_id, 'phase_funding_stream': funding_stream_id}
+            for phase_id, funding_stream_id in self.rows
+            if phase_id in self.phase_totals
+        ]
+
+        scenario['cut_line'] = {
+            'budget_cap': budget_cap,
+            'position': position,
+            'remaining_budget': budget_cap - budget_within_cap,
+            'phases_above': rows[:position],
+            'phases_below': rows[position:],
+            'above': self.totals(stop=position),
+            'below': self.totals(start=position),
+        }
+
+        return scenario
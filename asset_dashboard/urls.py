@@ -20,7 +20,8 @@ from rest_framework import routers
 
 from asset_dashboard.endpoints import PortfolioViewSet, UserViewSet, \
     PortfolioPhaseViewSet, PhaseViewSet, ProjectViewSet, AssetViewSet, LocalAssetViewSet, \
-    PromotePhaseView, CountywideView, FundingStreamView
+    PromotePhaseView, CountywideView, FundingStreamView, PlannerPhaseView, GISJobStatusView, \
+    TileView
 from asset_dashboard.views import ProjectListView, CipPlannerView, ProjectCreateView, \
                                     ProjectUpdateView, ProjectListJson, ProjectDeleteView, \
                                     ProjectsByDistrictListView, ProjectsByDistrictListJson, \
@@ -49,12 +50,15 @@ urlpatterns = [
     path('projects/phases/delete/<int:pk>/', PhaseDeleteView.as_view(), name='delete-phase'),
     path('projects/phases/<int:pk>/funding/delete/', FundingStreamDeleteView.as_view(), name='delete-funding'),
     path('projects/phases/edit/<int:pk>/assets/', AssetAddEditView.as_view(), name='create-update-assets'),
+    path('projects/phases/<int:pk>/gis-status/', GISJobStatusView.as_view(), name='phase-gis-status'),
     path('projects/phases/promote/assets/', PromotePhaseView.as_view(), name='promote-assets-phase'),
     path('projects/phases/assets/countywide/', CountywideView.as_view(), name='countywide'),
     path('projects/phases/fundingstream/', FundingStreamView.as_view(), name='create-update-funding'),
     path('projects/districts/', ProjectsByDistrictListView.as_view(), name='projects-by-district'),
     path('projects/districts/json/', ProjectsByDistrictListJson.as_view(), name='projects-district-json'),
     path('cip-planner/', CipPlannerView.as_view(), name='cip-planner'),
+    path('planner/phases/', PlannerPhaseView.as_view(), name='planner-phases'),
+    path('tiles/<str:layer>/<int:z>/<int:x>/<int:y>.mvt', TileView.as_view(), name='tiles'),
     path('accounts/login/', auth_views.LoginView.as_view(), name='login'),
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('', include(router.urls)),
@@ -1,5 +1,4 @@
 import json
-import re
 from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -13,10 +12,11 @@ from django.views.generic import TemplateView, ListView, CreateView, UpdateView,
 from django_datatables_view.base_datatable_view import BaseDatatableView
 
 from .models import HouseDistrict, LocalAsset, Project, ProjectCategory, ProjectScore, \
-    Section, SenateDistrict, CommissionerDistrict, Phase, FundingStream
+    Section, SenateDistrict, CommissionerDistrict, Phase, FundingStream, GISJob
 from .forms import ProjectForm, ProjectScoreForm, ProjectCategoryForm, \
     FundingStreamForm, PhaseForm
 from .serializers import PortfolioSerializer, LocalAssetReadSerializer
+from .planner import get_planner_payload
 
 
 class CipPlannerView(LoginRequiredMixin, TemplateView):
@@ -37,49 +37,8 @@ class CipPlannerView(LoginRequiredMixin, TemplateView):
             ).data
             selected_portfolio = portfolios[0]
 
-        phases = Phase.objects.all().select_related('project').prefetch_related('funding_streams')
-
-        project_phases = []
-        for phase in phases:
-            funding_streams = phase.funding_streams.all()
-
-            section = phase.project.section_owner.name \
-                if phase.project.section_owner else ''
-            category = phase.project.category.name \
-                if phase.project.category else ''
-
-            project_phases.append({
-                'pk': phase.id,
-                'phase': phase.get_phase_type_display(),
-                'total_budget': phase.total_budget,
-                'funded_amount': phase.total_funded_amount,
-                'funded_amount_by_year': phase.funded_amount_by_year,
-                'funding_streams': list(funding_streams.values()) if funding_streams else [],
-                'phase_year': phase.year,
-                'estimated_bid_quarter': phase.estimated_bid_quarter,
-                'phase_status': phase.status,
-                'phase_type': phase.get_phase_type_display(),
-                'name': phase.project.name,
-                'description': phase.project.description,
-                'notes': phase.project.notes,
-                'section': section,
-                'category': category,
-                'total_score': phase.project.projectscore.total_score,
-                'project_manager': phase.project.project_manager,
-                'countywide': phase.project.countywide,
-                'zones': list(phase.project.zones.all().values('name')),
-                'cost_by_zone': phase.cost_by_zone,
-                'house_districts': list(phase.project.house_districts.all().values('name')),
-                'senate_districts': list(phase.project.senate_districts.all().values('name')),
-                'commissioner_districts': list(phase.project.commissioner_districts.all().values('name')),
-                'assets': LocalAsset.group_assets_by_type(phase.localasset_set.all().values('asset_id', 'asset_model')),
-                'project_id': phase.project.id,
-                'project_status': phase.project.get_status_display(),
-                'project_requester': phase.project.get_requester_display(),
-            })
-
         context['props'] = {
-            'projects': json.dumps(project_phases, cls=DjangoJSONEncoder),
+            'projects': get_planner_payload(),
             'portfolios': portfolios,
             'selectedPortfolio': selected_portfolio,
             'userId': self.request.user.id,
@@ -128,7 +87,7 @@ class ProjectListJson(LoginRequiredMixin, BaseDatatableView):
         category = self.request.GET.get('columns[4][search][value]', None)
 
         if search:
-            qs = qs.filter(Q(id__startswith=search) | Q(name__icontains=search) | Q(description__icontains=search) | Q(project_manager__icontains=search))
+            qs = qs.search(search)
 
         if section:
             qs = qs.filter(section_owner__name=section)
@@ -138,6 +97,21 @@ class ProjectListJson(LoginRequiredMixin, BaseDatatableView):
 
         return qs
 
+    def ordering(self, qs):
+        """
+        Order by the columns the user sorted on, if any. Otherwise, order
+        search results by relevance, and everything else by ID. Ranking
+        happens here, after the filtered count, so that counting doesn't
+        rank every match.
+        """
+        if 'order[0][column]' in self.request.GET:
+            return super().ordering(qs)
+
+        if search := self.request.GET.get('search[value]', None):
+            return qs.ranked(search)
+
+        return qs.order_by('id')
+
 
 class ProjectCreateView(LoginRequiredMixin, CreateView):
     template_name = 'asset_dashboard/partials/forms/add_project_modal_form.html'
@@ -189,11 +163,11 @@ class ProjectUpdateView(LoginRequiredMixin, UpdateView):
             context['score_form'] = ProjectScoreForm(request_data, instance=self.object.projectscore)
             context['category_form'] = ProjectCategoryForm(request_data, instance=self.object.category)
         else:
-            context['total_score'] = ProjectScore.objects.get(project=self.object).total_score
+            context['total_score'] = self.object.projectscore.total_score
             context['score_form'] = ProjectScoreForm(instance=self.object.projectscore)
             context['category_form'] = ProjectCategoryForm(instance=self.object.category)
 
-            context['phases'] = Phase.objects.annotate().filter(project=self.kwargs['pk']).order_by('sequence')
+            context['phases'] = Phase.objects.select_related('summary').filter(project=self.kwargs['pk']).order_by('sequence')
 
             assets = LocalAsset.objects.filter(phase__project=self.object)
 
@@ -271,6 +245,9 @@ class PhaseUpdateView(LoginRequiredMixin, UpdateView):
 
         context['project'] = self.object.project
 
+        job = GISJob.latest_for_phase(self.object.pk)
+        context['gis_recalculating'] = job is not None and job.in_progress
+
         context['props'] = {
             'phase_id': self.object.pk,
             'is_countywide': self.object.project.countywide
@@ -393,53 +370,56 @@ class ProjectsByDistrictListJson(LoginRequiredMixin, BaseDatatableView):
     order_columns = ['name', 'description']
     max_display_length = 500
 
-    def filter_queryset(self, qs):
-        senate_district = self.request.GET.get('columns[2][search][value]', None)
-        house_district = self.request.GET.get('columns[3][search][value]', None)
-        commissioner_district = self.request.GET.get('columns[4][search][value]', None)
+    # The district relation that each filtered column searches
+    district_columns = {
+        2: 'senate_districts',
+        3: 'house_districts',
+        4: 'commissioner_districts',
+    }
+
+    def get_initial_queryset(self):
+        return Project.objects.only(
+            'id',
+            'name',
+            'description',
+            'senate_district_label',
+            'house_district_label',
+            'commissioner_district_label',
+        )
 
+    def filter_queryset(self, qs):
+        """
+        Filter to the projects in any of the chosen districts, with one lookup
+        of the indexed district IDs of each project per district type, rather
+        than joining each district relation.
+        """
         search_filter = Q()
 
-        if senate_district:
-            search_filter |= Q(**{'senate_districts__name': senate_district})
+        for column, relation in self.district_columns.items():
+            if name := self.request.GET.get(f'columns[{column}][search][value]', None):
+                district_model = Project._meta.get_field(relation).related_model
+                ids_column, _ = Project.DISTRICT_RELATIONS[relation]
 
-        if house_district:
-            search_filter |= Q(**{'house_districts__name': house_district})
+                district_ids = list(district_model.objects.filter(name=name).values_list('id', flat=True))
 
-        if commissioner_district:
-            search_filter |= Q(**{'commissioner_districts__name': commissioner_district})
+                search_filter |= Q(**{f'{ids_column}__overlap': district_ids})
 
-        return qs.filter(search_filter).distinct()
+        return qs.filter(search_filter)
 
     def prepare_results(self, qs):
         # prepare list with output column data
         # queryset is already paginated here
-        json_data = []
-
-        for item in qs:
-            senate_districts = self.format_district_names(item.senate_districts)
-            house_districts = self.format_district_names(item.house_districts)
-            commissioner_districts = self.format_district_names(item.commissioner_districts)
-
-            json_data.append([
+        return [
+            [
                 escape(item.name),
                 escape(item.description),
-                escape(senate_districts),
-                escape(house_districts),
-                escape(commissioner_districts),
+                escape(item.senate_district_label),
+                escape(item.house_district_label),
+                escape(item.commissioner_district_label),
                 item.id
-            ])
-
-        return json_data
-
-    def format_district_names(self, districts):
-        """Parses a queryset of districts into something consumable by the table library."""
-
-        # create a string with names separated by commma
-        district_names = ', '.join([d.name for d in districts.all()])
-
-        # only return the district's number and comma/space between numbers
-        return re.sub('[^0-9, ]', '', district_names)
+            ]
+            for item in qs
+        ]
 
 
 def pong(request):
@@ -5,8 +5,11 @@ set -euo pipefail
 
 python manage.py collectstatic --noinput
 python manage.py migrate --noinput
+python manage.py rebuild_phase_summaries
 python manage.py createcachetable && python manage.py clear_cache
 make districts
+python manage.py sync_disinvested_areas
+python manage.py sync_asset_search_index
 
 if [ `psql ${DATABASE_URL} -tAX -c "SELECT COUNT(*) FROM auth_user"` -eq "0" ]; then
     python manage.py loaddata asset_dashboard/fixtures/data.json
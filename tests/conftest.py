@@ -13,6 +13,7 @@ from django.contrib.gis.geos import GEOSGeometry
 from rest_framework.test import APIRequestFactory
 
 from asset_dashboard import models
+from asset_dashboard.boundaries import invalidate_boundary_index
 
 
 @pytest.fixture(scope='session')
@@ -81,6 +82,50 @@ def django_db_setup(django_db_blocker, request):
         request.addfinalizer(teardown_fpdcc)
 
 
+@pytest.fixture(autouse=True)
+def clear_score_weights_cache():
+    """
+    Rolling back a test's transaction doesn't send the signals that clear the
+    cached score weights, so clear them between tests.
+    """
+    models.ScoreWeights.clear_cache()
+
+    yield
+
+    models.ScoreWeights.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_boundary_index():
+    """
+    Rolling back a test's transaction doesn't send the signals that rebuild
+    the boundary index, so rebuild it for each test.
+    """
+    invalidate_boundary_index()
+
+    yield
+
+    invalidate_boundary_index()
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    """
+    Swap the DummyCache used in development for one that keeps values.
+    """
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'test_cache',
+        }
+    }
+
+    yield
+
+    from django.core.cache import cache
+    cache.clear()
+
+
 @pytest.fixture
 def section_owner():
     """
@@ -259,11 +304,15 @@ def socio_economic_zones():
 
     geo_feature = zone['features'][0]
 
-    return models.SocioEconomicZones.objects.create(
+    socio_economic_zone = models.SocioEconomicZones.objects.create(
         displaygro='Both',
         geom=GEOSGeometry(json.dumps(geo_feature['geometry']))
     )
 
+    models.DisinvestedArea.sync()
+
+    return socio_economic_zone
+
 
 @pytest.fixture
 def trails_geojson():
@@ -327,3 +376,59 @@ def phase_assets():
                 )
 
     return PhaseAssetsFactory()
+
+
+@pytest.fixture
+def points_of_interest():
+    """
+    Creates points of interest, each with a parking entrance and a picnic
+    grove, named "Grove 1", "Grove 2", etc.
+    """
+    class PointsOfInterestFactory:
+        def build(self, count, **kwargs):
+            pois = []
+
+            for index in range(1, count + 1):
+                geom = GEOSGeometry('POINT (1150000 1900000)', srid=3435)
+
+                name = models.Names.objects.create(id=index, name=f'Grove {index}')
+                entrance = models.ParkingEntrance.objects.create(id=index, geom=geom)
+                parking_info = models.ParkingEntranceInfo.objects.create(
+                    id=index,
+                    parking_entrance=entrance,
+                    lot_id=index,
+                    multi_entrance='no',
+                    private_lot='no',
+                    trailaccess='no',
+                    entrance_closed='no',
+                )
+                poi = models.PoiInfo.objects.create(
+                    id=index,
+                    point_type='picnic grove',
+                    nameid=name,
+                    parking_info=parking_info,
+                    parking_connection=parking_info,
+                    pointsofinterest_id=index,
+                    fpd_uid=index,
+                    poi_info_id_group=index,
+                    maintenance_div='Palos',
+                )
+                models.PointsOfInterest.objects.create(id=index, geom=geom, poi_info=poi)
+                models.PicnicGroves.objects.create(
+                    id=index,
+                    poi_info=poi,
+                    geom=geom,
+                    grove=index,
+                    fpd_uid=str(index),
+                    division='Palos',
+                    large_capacity='no',
+                    grove_type='shelter',
+                    bathroom_type='portable',
+                    accessible=1,
+                )
+
+                pois.append(poi)
+
+            return pois
+
+    return PointsOfInterestFactory()
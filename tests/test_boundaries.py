@@ -0,0 +1,107 @@
+import json
+import random
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry, GeometryCollection
+
+from asset_dashboard.boundaries import EnvelopeIndex, get_boundary_index
+from asset_dashboard.models import Zone, HouseDistrict, SenateDistrict, CommissionerDistrict, \
+    ProjectScore
+from asset_dashboard.signals import ProjectGISProcessor
+
+
+@pytest.fixture
+def phase_a_geoms():
+    with open('tests/geojson/phase_a_assets.geojson') as f:
+        assets_geojson = json.load(f)
+
+    geoms = [GEOSGeometry(json.dumps(feature['geometry'])) for feature in assets_geojson['features']]
+
+    for geom in geoms:
+        geom.transform(3435)
+
+    return geoms
+
+
+def test_envelope_index_query():
+    rng = random.Random(0)
+
+    def extent():
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        return (x, y, x + rng.uniform(0, 50), y + rng.uniform(0, 50))
+
+    items = [(extent(), index) for index in range(500)]
+    index = EnvelopeIndex(items)
+
+    assert EnvelopeIndex([]).query((0, 0, 1, 1)) == []
+
+    for _ in range(100):
+        query = extent()
+
+        assert sorted(index.query(query)) == [
+            item for item_extent, item in items if EnvelopeIndex.overlaps(item_extent, query)
+        ]
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_boundary_index_matches_database(zones, districts, socio_economic_zones, phase_a_geoms):
+    index = get_boundary_index()
+    phase_geoms = GeometryCollection(phase_a_geoms, srid=3435)
+
+    database_intersections = Zone.get_intersections(phase_geoms)
+
+    for zone_id, (intersects, area) in index.zones.intersections(phase_geoms).items():
+        database_intersects, database_area = database_intersections.pop(zone_id)
+
+        assert intersects == database_intersects
+        assert area == pytest.approx(database_area, rel=1e-6)
+
+    assert database_intersections == {}
+
+    for attribute, model in [
+        ('house_districts', HouseDistrict),
+        ('senate_districts', SenateDistrict),
+        ('commissioner_districts', CommissionerDistrict),
+    ]:
+        assert sorted(index.districts[attribute].intersecting(phase_geoms)) == sorted(
+            model.objects.filter(boundary__intersects=phase_geoms).values_list('id', flat=True)
+        )
+
+    assert index.disinvested_area(phase_a_geoms) == pytest.approx(
+        ProjectScore.calculate_disinvested_area(phase_a_geoms), rel=1e-6
+    )
+
+
+@pytest.mark.django_db
+def test_boundary_index_invalidation(zones, settings, django_assert_num_queries):
+    index = get_boundary_index()
+    zone_ids = set(index.zones.geometries)
+
+    # Repeated lookups reuse the loaded boundaries
+    with django_assert_num_queries(0):
+        assert get_boundary_index() is index
+        assert set(get_boundary_index().zones.geometries) == zone_ids
+
+    zone = Zone.objects.first()
+    new_zone = Zone.objects.create(name='New zone', boundary=zone.boundary)
+
+    assert set(get_boundary_index().zones.geometries) == zone_ids | {new_zone.id}
+
+    settings.BOUNDARY_INDEX = False
+
+    assert get_boundary_index() is None
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_boundary_index_recompute_matches_database(
+    project, phase_assets, zones, districts, socio_economic_zones, score_weights, settings
+):
+    settings.INCREMENTAL_GIS = False
+
+    prj = project.build()
+    phase = prj.phases.get()
+    phase_assets.build(phase)
+
+    settings.BOUNDARY_INDEX = False
+
+    assert ProjectGISProcessor(phase=phase).find_inconsistencies() == []
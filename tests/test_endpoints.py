@@ -1,10 +1,26 @@
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from pprint import pprint
+from urllib.parse import parse_qs, urlparse
 import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import force_authenticate
 
-from asset_dashboard.endpoints import LocalAssetViewSet, AssetViewSet, PromotePhaseView, CountywideView, FundingStreamView
-from asset_dashboard.models import LocalAsset, Phase, PhaseZoneDistribution, Project
+from asset_dashboard.endpoints import LocalAssetViewSet, AssetViewSet, PromotePhaseView, CountywideView, FundingStreamView, \
+    PlannerPhaseView, PortfolioViewSet, PortfolioPhaseViewSet
+from asset_dashboard.models import LocalAsset, Phase, PhaseZoneDistribution, Project, Portfolio, \
+    PortfolioPhase, FundingStream, AssetSearchIndex, PicnicGroves, \
+    PoiInfo, Names
+from asset_dashboard.serializers import LocalAssetReadSerializer
+from asset_dashboard.signals import ProjectGISProcessor
+from asset_dashboard import suggestions
+from asset_dashboard.suggestions import invalidate_suggestion_index, get_suggestion_index
 
 
 @pytest.mark.django_db
@@ -205,4 +221,819 @@ def test_funding_stream_view_invalid_input(api, project, user):
 
     funding = phase.funding_streams.filter(year=1019, budget=30000, source_type='grants_fees_other')
 
-    assert funding.count() == 0
\ No newline at end of file
+    assert funding.count() == 0
+
+
+def test_planner_phases_unauthenticated(api):
+    request = api.get('/planner/phases/')
+
+    response = PlannerPhaseView.as_view()(request)
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_planner_phases_paginated(api, project, score_weights, user):
+    projects = [project.build(name=f'Project {index}') for index in range(3)]
+
+    request = api.get('/planner/phases/', {'page_size': 2})
+    force_authenticate(request, user=user)
+
+    response = PlannerPhaseView.as_view()(request)
+
+    assert response.status_code == 200
+    assert [row['name'] for row in response.data['results']] == ['Project 0', 'Project 1']
+
+    next_page = response.data['next']
+    assert next_page
+
+    request = api.get(next_page)
+    force_authenticate(request, user=user)
+
+    response = PlannerPhaseView.as_view()(request)
+
+    assert [row['project_id'] for row in response.data['results']] == [projects[2].id]
+    assert response.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_planner_phases_filtered(api, project, score_weights, user):
+    prj = project.build()
+    project.build(name='Another project')
+
+    Phase.objects.filter(project=prj).update(status='complete', year=2024)
+
+    request = api.get('/planner/phases/', {'status': 'complete', 'year': 2024})
+    force_authenticate(request, user=user)
+
+    response = PlannerPhaseView.as_view()(request)
+
+    assert [row['project_id'] for row in response.data['results']] == [prj.id]
+
+    request = api.get('/planner/phases/', {'year': 'next year'})
+    force_authenticate(request, user=user)
+
+    response = PlannerPhaseView.as_view()(request)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_planner_phases_ndjson(api, project, score_weights, user):
+    for index in range(3):
+        project.build(name=f'Project {index}')
+
+    request = api.get('/planner/phases/', {'format': 'ndjson'})
+    force_authenticate(request, user=user)
+
+    response = PlannerPhaseView.as_view()(request)
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+    lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+    assert [json.loads(line)['name'] for line in lines] == ['Project 0', 'Project 1', 'Project 2']
+
+
+@pytest.fixture
+def bulk_asset_request_body(trails_geojson, project):
+    phase = project.build().phases.get()
+
+    return [
+        {
+            'asset_id': feature['properties']['identifier'],
+            'asset_type': 'trails',
+            'asset_name': feature['properties']['name'],
+            'geom': feature['geometry'],
+            'phase': phase.id
+        }
+        for feature in trails_geojson['features']
+    ]
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_bulk_create_local_assets(
+    api, bulk_asset_request_body, user, zones, districts, socio_economic_zones, score_weights, monkeypatch
+):
+    rebuilds = []
+    rebuild = ProjectGISProcessor.rebuild
+
+    def count_rebuild(self):
+        rebuilds.append(self.phase.id)
+        return rebuild(self)
+
+    monkeypatch.setattr(ProjectGISProcessor, 'rebuild', count_rebuild)
+
+    request = api.post(
+        '/local-assets/',
+        json.dumps(bulk_asset_request_body),
+        content_type='application/json'
+    )
+
+    force_authenticate(request, user=user)
+
+    response = LocalAssetViewSet.as_view({'post': 'create'})(request)
+
+    assert response.status_code == 201
+    assert response['Server-Timing'].startswith('gis;')
+
+    phase = Phase.objects.get(id=bulk_asset_request_body[0]['phase'])
+
+    # The GIS measurements are computed once for the whole list
+    assert rebuilds == [phase.id]
+    assert LocalAsset.objects.filter(phase=phase).count() == len(bulk_asset_request_body)
+    assert ProjectGISProcessor(phase=phase).find_inconsistencies() == []
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_bulk_delete_local_assets(
+    api, bulk_asset_request_body, user, zones, districts, socio_economic_zones, score_weights
+):
+    request = api.post(
+        '/local-assets/',
+        json.dumps(bulk_asset_request_body),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+    LocalAssetViewSet.as_view({'post': 'create'})(request)
+
+    phase = Phase.objects.get(id=bulk_asset_request_body[0]['phase'])
+    asset_ids = list(LocalAsset.objects.filter(phase=phase).values_list('id', flat=True))
+
+    request = api.post(
+        '/local-assets/bulk-delete/',
+        json.dumps({'ids': asset_ids[1:]}),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = LocalAssetViewSet.as_view({'post': 'bulk_delete'})(request)
+
+    assert response.status_code == 200
+    assert response.data['deleted'] == len(asset_ids) - 1
+
+    # The assets are deleted in one statement, without being read first
+    asset_queries = [query['sql'] for query in queries if LocalAsset._meta.db_table in query['sql']]
+    assert len([sql for sql in asset_queries if sql.startswith('DELETE')]) == 1
+    assert not any(sql.startswith(f'SELECT "{LocalAsset._meta.db_table}"."id"') for sql in asset_queries)
+    assert 'gis_recompute_ms' in response.data
+    assert ProjectGISProcessor(phase=phase).find_inconsistencies() == []
+
+    request = api.post(
+        '/local-assets/bulk-delete/',
+        json.dumps({'ids': asset_ids[:1]}),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+
+    LocalAssetViewSet.as_view({'post': 'bulk_delete'})(request)
+
+    assert not PhaseZoneDistribution.objects.filter(phase=phase).exists()
+
+    for ids in ([True], ['1'], 1, None):
+        request = api.post(
+            '/local-assets/bulk-delete/',
+            json.dumps({'ids': ids}),
+            content_type='application/json'
+        )
+        force_authenticate(request, user=user)
+
+        assert LocalAssetViewSet.as_view({'post': 'bulk_delete'})(request).status_code == 400
+
+
+@pytest.fixture
+def portfolio_phases(project):
+    return [project.build(name=f'Project {index}').phases.get() for index in range(5)]
+
+
+def portfolio_sequence(portfolio_id):
+    return list(
+        PortfolioPhase.objects.filter(portfolio_id=portfolio_id)
+                              .order_by('sequence')
+                              .values_list('phase', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_update_portfolio(api, user, portfolio_phases):
+    request = api.post(
+        '/portfolios/',
+        json.dumps({
+            'name': 'My portfolio',
+            'user': user.id,
+            'phases': [
+                {'phase': phase.id, 'sequence': index, 'phase_funding_stream': None}
+                for index, phase in enumerate(portfolio_phases, start=1)
+            ],
+        }),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+
+    response = PortfolioViewSet.as_view({'post': 'create'})(request)
+
+    assert response.status_code == 201
+
+    portfolio_id = response.data['id']
+    ranks = dict(PortfolioPhase.objects.values_list('phase', 'rank'))
+
+    # Drag the last phase to the top, and drop the second phase
+    first, second, *rest, last = portfolio_phases
+    reordered = [last, first, *rest]
+
+    request = api.patch(
+        f'/portfolios/{portfolio_id}/',
+        json.dumps({
+            'phases': [
+                {'phase': phase.id, 'sequence': index, 'phase_funding_stream': None}
+                for index, phase in enumerate(reordered, start=1)
+            ],
+        }),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = PortfolioViewSet.as_view({'patch': 'partial_update'})(request, pk=portfolio_id)
+
+    assert response.status_code == 200
+    assert [phase['phase'] for phase in response.data['phases']] == [phase.id for phase in reordered]
+    assert portfolio_sequence(portfolio_id) == [phase.id for phase in reordered]
+
+    # One read of the portfolio's phases, then an update and a delete
+    writes = [
+        query for query in queries
+        if PortfolioPhase._meta.db_table in query['sql'] and not query['sql'].startswith('SELECT')
+    ]
+    assert len(writes) == 2
+
+    # Only the dragged phase was re-ranked
+    changed = [
+        phase for phase, rank in PortfolioPhase.objects.values_list('phase', 'rank')
+        if ranks[phase] != rank
+    ]
+    assert changed == [last.id]
+
+
+@pytest.mark.django_db
+def test_update_portfolio_moved_phases(api, user, portfolio_phases):
+    portfolio = Portfolio.objects.create(name='My portfolio', user=user)
+
+    for phase in portfolio_phases[:4]:
+        PortfolioPhase.objects.create(portfolio=portfolio, phase=phase)
+
+    request = api.patch(
+        f'/portfolios/{portfolio.id}/',
+        json.dumps({
+            'moved_phases': [
+                {'phase': portfolio_phases[3].id, 'sequence': 1},
+                {'phase': portfolio_phases[4].id, 'sequence': 3},
+            ],
+        }),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+
+    response = PortfolioViewSet.as_view({'patch': 'partial_update'})(request, pk=portfolio.id)
+
+    assert response.status_code == 200
+    assert portfolio_sequence(portfolio.id) == [
+        portfolio_phases[3].id,
+        portfolio_phases[0].id,
+        portfolio_phases[4].id,
+        portfolio_phases[1].id,
+        portfolio_phases[2].id,
+    ]
+
+    request = api.patch(
+        f'/portfolios/{portfolio.id}/',
+        json.dumps({'moved_phases': [{'phase': portfolio_phases[0].id}]}),
+        content_type='application/json'
+    )
+    force_authenticate(request, user=user)
+
+    response = PortfolioViewSet.as_view({'patch': 'partial_update'})(request, pk=portfolio.id)
+
+    assert response.status_code == 400
+
+    # A phase can't be moved to two places at once
+    for field in ('moved_phases', 'phases'):
+        request = api.patch(
+            f'/portfolios/{portfolio.id}/',
+            json.dumps({
+                field: [
+                    {'phase': portfolio_phases[0].id, 'sequence': 1},
+                    {'phase': portfolio_phases[0].id, 'sequence': 2},
+                ],
+            }),
+            content_type='application/json'
+        )
+        force_authenticate(request, user=user)
+
+        response = PortfolioViewSet.as_view({'patch': 'partial_update'})(request, pk=portfolio.id)
+
+        assert response.status_code == 400
+
+    assert len(portfolio_sequence(portfolio.id)) == 5
+
+
+@pytest.mark.django_db
+def test_list_portfolios(api, user, portfolio_phases, django_assert_num_queries):
+    portfolios = [Portfolio.objects.create(name=f'Portfolio {index}', user=user) for index in range(2)]
+
+    for portfolio in portfolios:
+        for phase in portfolio_phases[:3]:
+            PortfolioPhase.objects.create(portfolio=portfolio, phase=phase)
+
+    moved = PortfolioPhase.objects.get(portfolio=portfolios[1], phase=portfolio_phases[2])
+    moved.sequence = 1
+    moved.save()
+
+    request = api.get('/portfolios/', format='json')
+    force_authenticate(request, user)
+
+    # The portfolios, then all of their phases at once
+    with django_assert_num_queries(2):
+        response = PortfolioViewSet.as_view({'get': 'list'})(request)
+
+    assert response.status_code == 200
+    assert [
+        [(phase['phase'], phase['sequence']) for phase in portfolio['phases']]
+        for portfolio in response.data['results']
+    ] == [
+        [(portfolio_phases[0].id, 1), (portfolio_phases[1].id, 2), (portfolio_phases[2].id, 3)],
+        [(portfolio_phases[2].id, 1), (portfolio_phases[0].id, 2), (portfolio_phases[1].id, 3)],
+    ]
+
+
+@pytest.mark.django_db
+def test_list_portfolio_phases_in_rank_order(api, user, portfolio_phases):
+    portfolio = Portfolio.objects.create(name='My portfolio', user=user)
+
+    for phase in portfolio_phases[:4]:
+        PortfolioPhase.objects.create(portfolio=portfolio, phase=phase)
+
+    # Move the last phase added to the top
+    moved = PortfolioPhase.objects.get(phase=portfolio_phases[3])
+    moved.sequence = 1
+    moved.save()
+
+    def list_phases(**params):
+        request = api.get('/portfolio-phases/', {'portfolio': portfolio.id, **params}, format='json')
+        force_authenticate(request, user)
+
+        return PortfolioPhaseViewSet.as_view({'get': 'list'})(request).data
+
+    page = list_phases(page_size=3)
+    seen = [phase['phase'] for phase in page['results']]
+
+    while page['next']:
+        cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+        page = list_phases(page_size=3, cursor=cursor)
+        seen += [phase['phase'] for phase in page['results']]
+
+    assert seen == portfolio_sequence(portfolio.id)
+    assert seen[0] == portfolio_phases[3].id
+
+
+@pytest.mark.django_db
+def test_portfolio_totals(api, user, portfolio_phases):
+    portfolio = Portfolio.objects.create(name='My portfolio', user=user)
+    first, second, third = portfolio_phases[:3]
+
+    for phase, year, budget, funding_secured in [
+        (first, 2023, 1000, True),
+        (second, 2024, 2000, False),
+        (third, None, 500, True),
+    ]:
+        phase.year = year
+        phase.save()
+        phase.funding_streams.set([
+            FundingStream.objects.create(budget=budget, year=2023, funding_secured=funding_secured)
+        ])
+        PortfolioPhase.objects.create(portfolio=portfolio, phase=phase)
+
+    def get_totals(method='get', **data):
+        if method == 'get':
+            request = api.get(f'/portfolios/{portfolio.id}/totals/', data)
+        else:
+            request = api.post(
+                f'/portfolios/{portfolio.id}/totals/',
+                json.dumps(data),
+                content_type='application/json'
+            )
+        force_authenticate(request, user=user)
+
+        return PortfolioViewSet.as_view({method: 'totals'})(request, pk=portfolio.id)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = get_totals()
+
+    assert response.status_code == 200
+
+    # The portfolio, its phases, and their summaries
+    assert len(queries) == 3
+
+    assert response.data['budget_impact'] == 3500
+    assert response.data['funded'] == 1500
+    assert response.data['unfunded'] == 2000
+    assert response.data['estimated_cost_by_year'] == {2023: 1000, 2024: 2000, 'N/A': 500}
+    assert response.data['funded_amount_by_year'] == {2023: 1500, 2024: 0}
+    assert response.data['cut_line'] is None
+
+    response = get_totals(budget_cap=3200)
+    cut_line = response.data['cut_line']
+
+    assert cut_line['position'] == 2
+    assert cut_line['remaining_budget'] == 200
+    assert [phase['phase'] for phase in cut_line['phases_below']] == [third.id]
+    assert cut_line['above']['budget_impact'] == 3000
+    assert cut_line['below']['budget_impact'] == 500
+
+    # A hypothetical ordering moves the line without saving anything
+    response = get_totals(
+        method='post',
+        phases=[{'phase': phase.id} for phase in [third, second, first]],
+        budget_cap=3200,
+    )
+    cut_line = response.data['cut_line']
+
+    assert cut_line['position'] == 2
+    assert [phase['phase'] for phase in cut_line['phases_below']] == [first.id]
+    assert cut_line['above']['funded'] == 500
+
+    response = get_totals(method='post', phases=[{'phase': 0}])
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=['fp_postgis', 'default'])
+@pytest.mark.parametrize('asset_type', ['points_of_interest', 'parking_lots', 'picnic_groves'])
+def test_list_assets_query_count(api, user, points_of_interest, asset_type, django_assert_num_queries):
+    def search():
+        request = api.get('/assets/', {'q': 'Grove', 'asset_type': asset_type}, format='json')
+        force_authenticate(request, user)
+
+        return AssetViewSet.as_view({'get': 'list'})(request)
+
+    points_of_interest.build(5)
+
+    # Geometries and names are read with the assets, not once per asset
+    with django_assert_num_queries(1, connection=connections['fp_postgis']):
+        response = search()
+
+    assert response.status_code == 200
+
+    features = response.data['features']
+
+    assert sorted(feature['properties']['name'] for feature in features) == [
+        f'Grove {index}' for index in range(1, 6)
+    ]
+
+    if asset_type == 'parking_lots':
+        # The test database has no parking lots to join
+        assert all(feature['geometry'] is None for feature in features)
+    else:
+        assert all(json.loads(feature['geometry'])['type'] == 'Point' for feature in features)
+
+
+@pytest.mark.django_db(databases=['fp_postgis', 'default'])
+def test_search_assets_index(api, user, points_of_interest, django_assert_num_queries):
+    def search(**params):
+        request = api.get('/assets/', {'asset_type': 'picnic_groves', **params}, format='json')
+        force_authenticate(request, user)
+
+        response = AssetViewSet.as_view({'get': 'list'})(request)
+        response.render()
+
+        return json.loads(response.content)
+
+    points_of_interest.build(5)
+
+    unindexed = search(q='Grove')['features']
+
+    assert AssetSearchIndex.sync(PicnicGroves) == 5
+    assert AssetSearchIndex.objects.filter(asset_model='PicnicGroves', bbox__isnull=False).count() == 5
+
+    # The indexed search returns what searching the GIS database did
+    with django_assert_num_queries(1, connection=connections['fp_postgis']):
+        indexed = search(q='Grove')['features']
+
+    assert indexed == unindexed
+
+    # Searches ignore case and repeated whitespace, and match identifiers
+    assert [feature['properties']['name'] for feature in search(q='  gROVE   3')['features']] == ['Grove 3']
+    assert [feature['properties']['name'] for feature in search(q='4')['features']] == ['Grove 4']
+    assert search(q='Woods')['features'] == []
+
+    # Only the page of assets is read from the GIS database
+    page = search(q='Grove', page_size=2)
+    seen = [feature['id'] for feature in page['features']]
+
+    while page['next']:
+        cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+        page = search(q='Grove', page_size=2, cursor=cursor)
+        seen += [feature['id'] for feature in page['features']]
+
+    assert seen == [feature['id'] for feature in indexed]
+
+    # Once the last sync is too old to trust, the GIS database is searched
+    AssetSearchIndex.objects.update(synced_at=timezone.now() - timedelta(days=2))
+    AssetSearchIndex.objects.filter(asset_id=1).delete()
+
+    assert not AssetSearchIndex.is_synced(PicnicGroves)
+    assert search(q='Grove')['features'] == unindexed
+
+
+@pytest.mark.django_db(databases=['fp_postgis', 'default'])
+def test_suggest_assets(api, user, points_of_interest, django_assert_num_queries):
+    def suggest(**params):
+        request = api.get('/assets/suggest/', params, format='json')
+        force_authenticate(request, user)
+
+        return AssetViewSet.as_view({'get': 'suggest'})(request)
+
+    points_of_interest.build(3)
+    PoiInfo.objects.filter(id=2).update(fpd_uid=102)
+    PicnicGroves.objects.filter(id=2).update(fpd_uid='2-1')
+    invalidate_suggestion_index()
+
+    response = suggest(prefix='GROVE 2')
+
+    assert response.status_code == 200
+    # Assets are identified as searches and map tiles identify them, and the
+    # test database has no parking lots to suggest
+    assert response.data['suggestions'] == [
+        {'identifier': 102, 'asset_type': 'points_of_interest', 'name': 'Grove 2'},
+        {'identifier': '2-1', 'asset_type': 'picnic_groves', 'name': 'Grove 2 Grove 2'},
+    ]
+
+    # Once built, the index answers without querying either database
+    with django_assert_num_queries(0, connection=connections['fp_postgis']):
+        response = suggest(prefix='gro', asset_type='picnic_groves', limit=2)
+
+    assert [suggestion['name'] for suggestion in response.data['suggestions']] == [
+        'Grove 1 Grove 1', 'Grove 2 Grove 2'
+    ]
+
+    assert suggest(prefix='woods').data['suggestions'] == []
+    assert suggest(prefix='').data['suggestions'] == []
+    assert suggest(prefix='grove', limit=0).status_code == 400
+
+
+def test_suggestion_index_rebuild(monkeypatch):
+    started = threading.Event()
+    finish = threading.Event()
+    builds = []
+
+    def asset_names():
+        builds.append(None)
+
+        if len(builds) == 1:
+            return [('Grove 1', 'points_of_interest', 1)]
+
+        started.set()
+        assert finish.wait(5)
+
+        return [('Grove 2', 'points_of_interest', 2)]
+
+    monkeypatch.setattr(suggestions, 'asset_names', asset_names)
+    invalidate_suggestion_index()
+
+    def suggest():
+        return [name for name, _, _ in get_suggestion_index().suggest('grove')]
+
+    assert suggest() == ['Grove 1']
+
+    invalidate_suggestion_index()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        rebuilt = executor.submit(suggest)
+        assert started.wait(5)
+
+        # Other threads keep serving the previous index during the rebuild
+        assert suggest() == ['Grove 1']
+
+        finish.set()
+        assert rebuilt.result() == ['Grove 2']
+
+    assert suggest() == ['Grove 2']
+    assert len(builds) == 2
+
+
+@pytest.mark.django_db(databases=['fp_postgis', 'default'])
+def test_search_all_asset_types(api, user, settings, monkeypatch):
+    names = {
+        'buildings': ['Woods Grove Hall', 'Grove'],
+        'points_of_interest': ['Schiller Woods'],
+        'picnic_groves': ['Grove 1'],
+    }
+
+    # Each asset type is searched on its own thread and connection, which
+    # can't see the test's uncommitted rows, so the searches are faked
+    def search_asset_type(self, asset_type, query, limit):
+        if asset_type == 'trails':
+            time.sleep(1)
+
+        return [
+            {'type': 'Feature', 'geometry': None, 'properties': {'name': name, 'asset_type': asset_type}}
+            for name in names.get(asset_type, [])[:limit]
+        ]
+
+    monkeypatch.setattr(AssetViewSet, 'search_asset_type', search_asset_type)
+    settings.ALL_ASSET_SEARCH_TIMEOUT = 0.5
+
+    def search(**params):
+        request = api.get('/assets/', {'asset_type': 'all', **params}, format='json')
+        force_authenticate(request, user)
+
+        return AssetViewSet.as_view({'get': 'list'})(request)
+
+    response = search(q='grove')
+
+    assert response.status_code == 200
+    assert response.data['partial'] is True
+    assert response.data['timed_out'] == ['trails']
+
+    # Exact matches first, then matches of the start of a name, then of a word
+    assert [
+        (feature['properties']['asset_type'], feature['properties']['name'])
+        for feature in response.data['features']
+    ] == [
+        ('buildings', 'Grove'),
+        ('picnic_groves', 'Grove 1'),
+        ('buildings', 'Woods Grove Hall'),
+        ('points_of_interest', 'Schiller Woods'),
+    ]
+
+    assert len(search(q='grove', limit=1).data['features']) == 3
+    assert search(q='grove', limit=0).status_code == 400
+
+    # A search that waited for a free thread until the deadline isn't run
+    with pytest.raises(TimeoutError):
+        AssetViewSet().search_in_thread('buildings', 'grove', 1, time.monotonic())
+
+
+@pytest.mark.django_db(databases=['fp_postgis', 'default'], transaction=True)
+def test_search_all_asset_types_ranks_each_type(api, user, points_of_interest):
+    # The rows are committed, so that the search of each asset type, on its
+    # own thread and connection, can see them
+    points_of_interest.build(3)
+    Names.objects.filter(id=1).update(name='Schiller Woods Grove')
+    Names.objects.filter(id=3).update(name='Grove')
+
+    def search(**params):
+        request = api.get('/assets/', {'asset_type': 'all', **params}, format='json')
+        force_authenticate(request, user)
+
+        return AssetViewSet.as_view({'get': 'list'})(request)
+
+    def first_matches():
+        response = search(q='grove', limit=1)
+
+        assert response.status_code == 200
+        assert response.data['partial'] is False
+
+        return sorted(
+            (feature['properties']['asset_type'], feature['properties']['name'])
+            for feature in response.data['features']
+        )
+
+    # The exact match is returned, rather than the first asset that matches
+    expected = [
+        ('parking_lots', 'Grove'),
+        ('picnic_groves', 'Grove'),
+        ('points_of_interest', 'Grove'),
+    ]
+
+    assert first_matches() == expected
+
+    AssetSearchIndex.sync(PoiInfo)
+    AssetSearchIndex.sync(PicnicGroves)
+
+    assert first_matches() == expected
+
+
+@pytest.mark.django_db
+def test_list_local_assets_geojson(api, user, project, phase_assets, django_assert_num_queries):
+    phase = project.build().phases.get()
+    phase_assets.build(phase)
+
+    request = api.get('/local-assets/', format='json')
+    force_authenticate(request, user)
+
+    with django_assert_num_queries(1):
+        response = LocalAssetViewSet.as_view({'get': 'list'})(request)
+        response.render()
+
+    assert response.status_code == 200
+
+    features = json.loads(response.content)['features']
+    expected = LocalAssetReadSerializer(LocalAsset.objects.order_by('id'), many=True).data['features']
+
+    assert len(features) == len(expected) == LocalAsset.objects.count()
+
+    # The geometries encoded by the database match the ones encoded in Python
+    for feature, expected_feature in zip(sorted(features, key=lambda feature: feature['id']), expected):
+        assert feature['properties'] == json.loads(json.dumps(expected_feature['properties']))
+        assert GEOSGeometry(json.dumps(feature['geometry'])).equals_exact(
+            GEOSGeometry(json.dumps(expected_feature['geometry'])), tolerance=1e-7
+        )
+
+
+@pytest.mark.django_db
+def test_list_local_assets_zoom(api, user, project, trails_geojson):
+    phase = project.build().phases.get()
+
+    for feature in trails_geojson['features']:
+        LocalAsset.objects.create(phase=phase, geom=json.dumps(feature['geometry']), asset_model='trails')
+
+    def list_assets(**params):
+        request = api.get('/local-assets/', params, format='json')
+        force_authenticate(request, user)
+
+        response = LocalAssetViewSet.as_view({'get': 'list'})(request)
+        response.render()
+
+        return response
+
+    full = list_assets()
+    simplified = list_assets(zoom=10)
+
+    assert simplified.status_code == 200
+    assert len(simplified.content) < len(full.content)
+
+    full_features = json.loads(full.content)['features']
+    simplified_features = json.loads(simplified.content)['features']
+
+    # Simplified geometries stay within a pixel or so of the originals
+    degrees_per_pixel = 360 / (256 * 2 ** 10)
+
+    for feature, simplified_feature in zip(full_features, simplified_features):
+        geom = GEOSGeometry(json.dumps(feature['geometry']))
+        simplified_geom = GEOSGeometry(json.dumps(simplified_feature['geometry']))
+
+        assert geom.buffer(2 * degrees_per_pixel).contains(simplified_geom)
+
+    assert list_assets(zoom='far').status_code == 400
+    assert list_assets(zoom=30).status_code == 400
+
+    for tolerance in ('-1', 'nan', 'inf', '-inf'):
+        assert list_assets(tolerance=tolerance).status_code == 400
+
+
+@pytest.mark.django_db
+def test_list_local_assets_pages_and_fields(api, user, project, phase_assets):
+    phase = project.build().phases.get()
+    other_phase = project.build(name='Other project').phases.get()
+
+    phase_assets.build(phase)
+    phase_assets.build(other_phase)
+
+    def list_assets(**params):
+        request = api.get('/local-assets/', params, format='json')
+        force_authenticate(request, user)
+
+        response = LocalAssetViewSet.as_view({'get': 'list'})(request)
+        response.render()
+
+        return response
+
+    asset_ids = list(LocalAsset.objects.filter(phase=phase).order_by('id').values_list('id', flat=True))
+
+    # Follow the cursor through every page of the phase's assets
+    page = json.loads(list_assets(phase=phase.id, page_size=2).content)
+    seen = [feature['id'] for feature in page['features']]
+
+    assert page['type'] == 'FeatureCollection'
+    assert len(seen) == 2
+
+    while page['next']:
+        cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+        page = json.loads(list_assets(phase=phase.id, page_size=2, cursor=cursor).content)
+        seen += [feature['id'] for feature in page['features']]
+
+    assert seen == asset_ids
+
+    assert len(json.loads(list_assets(project=other_phase.project_id).content)['features']) == \
+        LocalAsset.objects.filter(phase=other_phase).count()
+
+    # Omitted fields are neither selected nor serialized
+    with CaptureQueriesContext(connection) as queries:
+        features = json.loads(list_assets(fields='asset_name').content)['features']
+
+    assert 'ST_AsGeoJSON' not in queries[0]['sql']
+    assert '"asset_model"' not in queries[0]['sql']
+    assert all(feature['geometry'] is None for feature in features)
+    assert all(list(feature['properties']) == ['asset_name'] for feature in features)
+
+    features = json.loads(list_assets(omit='geom,phase').content)['features']
+
+    assert all(feature['geometry'] is None for feature in features)
+    assert all('phase' not in feature['properties'] for feature in features)
+    assert all('asset_name' in feature['properties'] for feature in features)
+
+    assert list_assets(fields='unknown').status_code == 400
+    assert list_assets(phase='first').status_code == 400
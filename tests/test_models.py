@@ -1,10 +1,16 @@
 import json
 import pytest
-from django.db import IntegrityError
+from django.contrib.gis.geos import GEOSGeometry, GeometryCollection
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 
 from asset_dashboard.models import ScoreWeights, Portfolio, PortfolioPhase, \
     LocalAsset, SenateDistrict, Phase, PhaseZoneDistribution, FundingStream, Project, \
-    ProjectScore
+    ProjectScore, PhaseSummary, Zone, PhaseGeography, GISJob, DisinvestedArea, SocioEconomicZones, \
+    score_weights_data_version
+from asset_dashboard.signals import ProjectGISProcessor, suspend_gis_signals
 
 
 @pytest.mark.django_db
@@ -103,6 +109,67 @@ def test_sequenced_model(user, project):
     assert phase_c.sequence == 2
     assert phase_a.sequence == 3
 
+@pytest.mark.django_db
+def test_ranked_sequence(user, project, monkeypatch):
+    phases = [project.build(name=f'Project {index}').phases.get() for index in range(7)]
+
+    portfolio = Portfolio.objects.create(user=user)
+
+    for phase in phases[:4]:
+        PortfolioPhase.objects.create(portfolio=portfolio, phase=phase)
+
+    # Inserting in the middle of the sequence only writes the new instance
+    with CaptureQueriesContext(connection) as queries:
+        PortfolioPhase.objects.create(portfolio=portfolio, phase=phases[4], sequence=2)
+
+    writes = [query for query in queries if not query['sql'].startswith('SELECT')]
+    assert len(writes) == 1
+
+    def sequence():
+        return list(
+            PortfolioPhase.objects.filter(portfolio=portfolio)
+                                  .order_by('sequence')
+                                  .values_list('phase', 'sequence')
+        )
+
+    assert sequence() == [
+        (phases[0].id, 1), (phases[4].id, 2), (phases[1].id, 3), (phases[2].id, 4), (phases[3].id, 5)
+    ]
+
+    # Moving an instance only writes that instance
+    portfolio_phase = PortfolioPhase.objects.get(portfolio=portfolio, phase=phases[3])
+    portfolio_phase.sequence = 1
+    portfolio_phase.save()
+
+    assert [phase for phase, _ in sequence()] == [
+        phases[3].id, phases[0].id, phases[4].id, phases[1].id, phases[2].id
+    ]
+
+    # Once there's no room between neighbors, the sequence is renumbered
+    monkeypatch.setattr(PortfolioPhase, 'RANK_GAP', 2)
+    PortfolioPhase.compact(PortfolioPhase.objects.filter(portfolio=portfolio))
+
+    PortfolioPhase.objects.create(portfolio=portfolio, phase=phases[5], sequence=3)
+    PortfolioPhase.objects.create(portfolio=portfolio, phase=phases[6], sequence=3)
+
+    assert [phase for phase, _ in sequence()] == [
+        phases[3].id, phases[0].id, phases[6].id, phases[5].id, phases[4].id, phases[1].id, phases[2].id
+    ]
+    assert [sequence for _, sequence in sequence()] == [1, 2, 3, 4, 5, 6, 7]
+
+    # Numbering whole sequences at once gives the same positions
+    other_portfolio = Portfolio.objects.create(user=user)
+    PortfolioPhase.objects.create(portfolio=other_portfolio, phase=phases[0])
+
+    assert list(
+        PortfolioPhase.objects.with_whole_sequences()
+                              .filter(portfolio=portfolio)
+                              .order_by('sequence')
+                              .values_list('phase', 'sequence')
+    ) == sequence()
+    assert PortfolioPhase.objects.with_whole_sequences().get(portfolio=other_portfolio).sequence == 1
+
+
 @pytest.mark.django_db(databases=['default', 'fp_postgis'])
 def test_local_asset_signal(project, districts, trails_geojson, socio_economic_zones):
     senate_districts = SenateDistrict.objects.all()
@@ -271,3 +338,437 @@ def test_project_delete(project, phase_assets, zones, socio_economic_zones, dist
             LocalAsset.objects.get(id=asset_id)
 
 
+@pytest.mark.django_db
+def test_phase_summary_signals(project, zones):
+    prj = project.build()
+    phase = prj.phases.get()
+
+    # Summaries are created with the phase
+    assert phase.summary.total_budget == 0
+    assert phase.summary.project_name == prj.name
+
+    funded = FundingStream.objects.create(budget=1000, year=2023, funding_secured=True)
+    unfunded = FundingStream.objects.create(budget=500, year=2024, funding_secured=False)
+    phase.funding_streams.add(funded, unfunded)
+
+    zone = Zone.objects.first()
+    PhaseZoneDistribution.objects.create(phase=phase, zone=zone, zone_distribution_proportion=0.5)
+
+    summary = PhaseSummary.objects.get(phase=phase)
+
+    assert summary.total_budget == phase.total_budget == 1500
+    assert summary.total_funded_amount == phase.total_funded_amount == 1000
+    assert summary.funded_amount_by_year == phase.funded_amount_by_year == {2023: 1000}
+    assert summary.cost_by_zone == phase.cost_by_zone == {zone.name: 750.0}
+    assert summary.funded_by_zone == phase.funded_by_zone == {zone.name: 500.0}
+
+    unfunded.funding_secured = True
+    unfunded.save()
+
+    assert PhaseSummary.objects.get(phase=phase).total_funded_amount == 1500
+
+    funded.delete()
+
+    assert PhaseSummary.objects.get(phase=phase).total_budget == 500
+
+    unfunded.phase_set.clear()
+
+    assert PhaseSummary.objects.get(phase=phase).total_budget == 0
+
+    prj.name = 'Renamed project'
+    prj.save()
+
+    assert PhaseSummary.objects.get(phase=phase).project_name == 'Renamed project'
+
+    prj.section_owner.delete()
+
+    assert PhaseSummary.objects.get(phase=phase).section_name == ''
+
+    # Deleting the phase takes its summary with it
+    phase.delete()
+
+    assert not PhaseSummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_phase_summaries(project):
+    prj = project.build()
+    phase = prj.phases.get()
+
+    phase.funding_streams.add(
+        FundingStream.objects.create(budget=1000, year=2023, funding_secured=True)
+    )
+
+    PhaseSummary.objects.all().delete()
+
+    call_command('rebuild_phase_summaries')
+
+    summary = PhaseSummary.objects.get(phase=phase)
+
+    assert summary.total_budget == 1000
+    assert summary.funded_amount_by_year == {2023: 1000}
+    assert summary.section_name == prj.section_owner.name
+
+
+@pytest.mark.django_db
+def test_project_score_with_total_score(project, score_weights):
+    prj = project.build()
+
+    score = prj.projectscore
+    score.core_mission_score = 3
+    score.ease_score = 5
+    score.social_equity_score = None
+    score.save()
+
+    annotated = ProjectScore.objects.with_total_score().get(id=score.id)
+
+    assert annotated.weighted_total_score == pytest.approx(score.total_score)
+
+    phase = Phase.objects.annotate(
+        score=ProjectScore.total_score_expression('project__projectscore__')
+    ).get(project=prj)
+
+    assert phase.score == pytest.approx(score.total_score)
+
+    ScoreWeights.objects.all().delete()
+
+    assert ProjectScore.objects.with_total_score().get(id=score.id).weighted_total_score is None
+
+
+@pytest.mark.django_db
+def test_score_weights_load(score_weights, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert ScoreWeights.load() == score_weights
+        assert ScoreWeights.load() == score_weights
+
+    # Saving the weights clears the cached copy
+    score_weights.ease_score = 0.1
+    score_weights.save()
+
+    with django_assert_num_queries(1):
+        assert ScoreWeights.load().ease_score == 0.1
+
+
+@pytest.mark.django_db
+def test_score_weights_load_other_process(
+    score_weights, locmem_cache, django_assert_num_queries
+):
+    assert ScoreWeights.load() == score_weights
+
+    # Another process saves the weights, which bumps the shared data version
+    # but can't clear this process' copy
+    ScoreWeights.objects.filter(pk=score_weights.pk).update(ease_score=0.1)
+    score_weights_data_version.bump()
+
+    with django_assert_num_queries(1):
+        assert ScoreWeights.load().ease_score == 0.1
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_incremental_gis_matches_full_recompute(
+    project, zones, districts, signs_geojson, trails_geojson, socio_economic_zones, score_weights
+):
+    prj = project.build()
+    phase = prj.phases.get()
+
+    for feature in signs_geojson['features'] + trails_geojson['features']:
+        LocalAsset.objects.create(phase=phase, geom=json.dumps(feature['geometry']))
+
+        assert ProjectGISProcessor(phase=phase).find_inconsistencies() == []
+
+    for asset in LocalAsset.objects.filter(phase=phase).order_by('-id')[:5]:
+        asset.delete()
+
+        assert ProjectGISProcessor(phase=phase).find_inconsistencies() == []
+
+    LocalAsset.objects.filter(phase=phase).delete()
+
+    assert not PhaseGeography.objects.filter(phase=phase).exists()
+
+
+@pytest.mark.django_db
+def test_zone_get_intersections(zones, django_assert_num_queries):
+    with open('tests/geojson/phase_a_assets.geojson') as f:
+        assets_geojson = json.load(f)
+
+    geoms = GeometryCollection(
+        [GEOSGeometry(json.dumps(feature['geometry'])) for feature in assets_geojson['features']],
+        srid=4326
+    )
+    geoms.transform(3435)
+
+    with django_assert_num_queries(1):
+        intersections = Zone.get_intersections(geoms)
+
+    assert set(intersections) == set(Zone.objects.values_list('id', flat=True))
+
+    for zone in Zone.objects.all():
+        intersects, area = intersections[zone.id]
+
+        assert intersects == zone.boundary.intersects(geoms)
+        assert area == pytest.approx(zone.boundary.intersection(geoms).area, rel=1e-6)
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_check_gis_consistency(project, zones, districts, signs_geojson, socio_economic_zones, score_weights):
+    prj = project.build()
+    phase = prj.phases.get()
+
+    for feature in signs_geojson['features']:
+        LocalAsset.objects.create(phase=phase, geom=json.dumps(feature['geometry']))
+
+    call_command('check_gis_consistency')
+
+    PhaseGeography.objects.filter(phase=phase).update(area=0)
+
+    with pytest.raises(CommandError):
+        call_command('check_gis_consistency', phase=[phase.id])
+
+    call_command('check_gis_consistency', fix=True)
+    call_command('check_gis_consistency')
+
+
+@pytest.mark.django_db
+def test_project_assign_boundaries(
+    project, zones, districts, signs_geojson, trails_geojson, settings, django_assert_num_queries
+):
+    prj = project.build()
+    other_prj = project.build(name='Another project')
+
+    first_phase = prj.phases.get()
+    second_phase = Phase.objects.create(project=prj, phase_type='construction', status='ongoing')
+
+    with suspend_gis_signals():
+        for feature in signs_geojson['features']:
+            LocalAsset.objects.create(phase=first_phase, geom=json.dumps(feature['geometry']))
+
+        for feature in trails_geojson['features']:
+            LocalAsset.objects.create(phase=second_phase, geom=json.dumps(feature['geometry']))
+
+    other_prj.zones.set(Zone.objects.all())
+
+    with CaptureQueriesContext(connection) as queries:
+        assert Project.assign_boundaries([prj.id, other_prj.id]) > 0
+
+    # The projects aren't saved
+    assert not any(
+        query['sql'].startswith(f'UPDATE "{Project._meta.db_table}"') for query in queries
+    )
+
+    assets = LocalAsset.objects.filter(phase__project=prj)
+
+    for attribute in Project.BOUNDARY_RELATIONS:
+        model = Project._meta.get_field(attribute).related_model
+        expected = model.objects.filter(
+            id__in=[
+                boundary.id for asset in assets
+                for boundary in model.objects.filter(
+                    boundary__dwithin=(asset.geom, settings.GEOM_BUFFER)
+                )
+            ]
+        )
+
+        assert expected.exists()
+        assert set(getattr(prj, attribute).all()) == set(expected)
+        assert not getattr(other_prj, attribute).exists()
+
+    # Nothing changed, so there's only a spatial join and a read of the
+    # through table for each relation
+    with django_assert_num_queries(len(Project.BOUNDARY_RELATIONS) * 2):
+        assert Project.assign_boundaries([prj.id, other_prj.id]) == 0
+
+
+@pytest.mark.django_db
+def test_recompute_project_geography(project, zones, signs_geojson, capsys):
+    prj = project.build()
+    phase = prj.phases.get()
+
+    with suspend_gis_signals():
+        for feature in signs_geojson['features']:
+            LocalAsset.objects.create(phase=phase, geom=json.dumps(feature['geometry']))
+
+    project.build(name='Another project')
+
+    call_command('recompute_project_geography', batch_size=1)
+
+    assert prj.zones.exists()
+    assert 'Successfully recomputed 2 projects' in capsys.readouterr().out
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_disinvested_area_matches_geos(socio_economic_zones, trails_geojson, signs_geojson, django_assert_num_queries):
+    # Read the area back in the database's projection
+    socio_economic_zones.refresh_from_db()
+
+    pieces = DisinvestedArea.objects.all()
+
+    assert pieces.count() > 1
+    assert all(len(piece.geom.coords[0]) <= DisinvestedArea.MAX_VERTICES for piece in pieces)
+    assert sum(piece.geom.area for piece in pieces) == pytest.approx(socio_economic_zones.geom.area)
+
+    with open('tests/geojson/phase_a_assets.geojson') as f:
+        assets_geojson = json.load(f)
+
+    geoms = []
+
+    for feature in assets_geojson['features'] + trails_geojson['features'] + signs_geojson['features']:
+        geom = GEOSGeometry(json.dumps(feature['geometry']))
+        geom.transform(3435)
+        geoms.append(geom)
+
+    # The area as it was measured in GEOS, against the whole disinvested area
+    expected = sum(
+        socio_economic_zones.geom.intersection(
+            geom.buffer(ProjectScore.DISINVESTED_AREA_BUFFER)
+        ).area
+        for geom in geoms
+    )
+
+    assert expected > 0
+
+    with django_assert_num_queries(1):
+        assert ProjectScore.calculate_disinvested_area(geoms) == pytest.approx(expected, rel=1e-9)
+
+    assert ProjectScore.calculate_disinvested_area([None]) == 0
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_sync_disinvested_areas_without_source(socio_economic_zones, capsys):
+    pieces = DisinvestedArea.objects.count()
+    assert pieces > 0
+
+    SocioEconomicZones.objects.all().delete()
+
+    # A warning, rather than an error, so that the release doesn't fail
+    call_command('sync_disinvested_areas')
+
+    assert "No 'Both' area in SocioEconomicZones" in capsys.readouterr().err
+
+    # The pieces copied before are kept
+    assert DisinvestedArea.objects.count() == pieces
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_recompute_before_sync_disinvested_areas(
+    project, zones, districts, trails_geojson, signs_geojson, socio_economic_zones, score_weights
+):
+    phase = project.build().phases.get()
+
+    with open('tests/geojson/phase_a_assets.geojson') as f:
+        assets_geojson = json.load(f)
+
+    with suspend_gis_signals():
+        for feature in assets_geojson['features'] + trails_geojson['features'] + signs_geojson['features']:
+            LocalAsset.objects.create(phase=phase, geom=json.dumps(feature['geometry']))
+
+    def social_equity_score():
+        ProjectGISProcessor(phase=phase).rebuild()
+
+        return ProjectScore.objects.get(project=phase.project).social_equity_score
+
+    synced_score = social_equity_score()
+
+    assert synced_score > 0
+
+    # Until sync_disinvested_areas runs, e.g., right after migrating, the
+    # score is measured against the GIS database
+    DisinvestedArea.objects.all().delete()
+
+    assert social_equity_score() == pytest.approx(synced_score)
+
+    # With neither, the score isn't silently saved as 0
+    SocioEconomicZones.objects.all().delete()
+
+    with pytest.raises(SocioEconomicZones.DoesNotExist):
+        social_equity_score()
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_gis_job_queue(
+    project, zones, districts, signs_geojson, socio_economic_zones, score_weights, settings
+):
+    settings.GIS_JOB_QUEUE = True
+    settings.INCREMENTAL_GIS = False
+
+    prj = project.build()
+    phase = prj.phases.get()
+
+    for feature in signs_geojson['features']:
+        LocalAsset.objects.create(phase=phase, geom=json.dumps(feature['geometry']))
+
+    # Saving each asset queued a recompute, and they collapsed into one job
+    (job,) = GISJob.objects.all()
+    assert job.phase_id == phase.id
+    assert job.status == 'pending'
+    assert not PhaseZoneDistribution.objects.filter(phase=phase).exists()
+
+    call_command('run_gis_worker', once=True)
+
+    job.refresh_from_db()
+    assert job.status == 'complete'
+    assert ProjectGISProcessor(phase=phase).find_inconsistencies() == []
+
+
+@pytest.mark.django_db(databases=['default', 'fp_postgis'])
+def test_gis_job_queue_during_running_job(
+    project, zones, districts, signs_geojson, socio_economic_zones, score_weights, settings
+):
+    settings.GIS_JOB_QUEUE = True
+    settings.INCREMENTAL_GIS = True
+
+    phase = project.build().phases.get()
+    features = signs_geojson['features']
+
+    LocalAsset.objects.create(phase=phase, geom=json.dumps(features[0]['geometry']))
+
+    # A worker starts recomputing the phase from the assets it has now
+    job = GISJob.claim()
+    assert job.status == 'running'
+
+    # Changes made meanwhile, incremental or not, are queued rather than
+    # written inline, so that the running job can't overwrite them
+    added = LocalAsset.objects.create(phase=phase, geom=json.dumps(features[1]['geometry']))
+
+    (pending,) = GISJob.objects.filter(status='pending')
+    assert pending.phase_id == phase.id
+    assert not PhaseZoneDistribution.objects.filter(phase=phase).exists()
+
+    added.delete()
+    LocalAsset.objects.filter(phase=phase).get().delete()
+
+    assert GISJob.objects.filter(status='pending', phase_id=phase.id).count() == 1
+    assert not PhaseZoneDistribution.objects.filter(phase=phase).exists()
+
+
+@pytest.mark.django_db
+def test_gis_job_retries(project, monkeypatch):
+    phase = project.build().phases.get()
+
+    def fail(self):
+        raise ValueError('Bad geometry')
+
+    monkeypatch.setattr(ProjectGISProcessor, 'rebuild', fail)
+
+    GISJob.enqueue(phase.id)
+    GISJob.enqueue(phase.id)
+
+    (job,) = GISJob.objects.all()
+
+    call_command('run_gis_worker', once=True)
+    job.refresh_from_db()
+
+    assert job.status == 'pending'
+    assert job.attempts == 1
+    assert 'Bad geometry' in job.error
+
+    # The retry isn't due yet
+    assert GISJob.claim() is None
+
+    for _ in range(GISJob.MAX_ATTEMPTS - 1):
+        GISJob.objects.update(run_after=job.created_at)
+        call_command('run_gis_worker', once=True)
+
+    job.refresh_from_db()
+
+    assert job.status == 'failed'
+    assert job.attempts == GISJob.MAX_ATTEMPTS
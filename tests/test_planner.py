@@ -0,0 +1,123 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from asset_dashboard.models import Phase, PhaseZoneDistribution, FundingStream, Zone
+from asset_dashboard.planner import PlannerPayload, get_planner_payload
+
+
+@pytest.mark.django_db
+def test_planner_payload_query_count_is_constant(project, zones, score_weights):
+    def build_phase(**kwargs):
+        prj = project.build(**kwargs)
+        phase = prj.phases.get()
+
+        prj.zones.set(Zone.objects.all())
+
+        for zone in Zone.objects.all():
+            PhaseZoneDistribution.objects.create(
+                phase=phase, zone=zone, zone_distribution_proportion=0.5
+            )
+
+    build_phase()
+
+    with CaptureQueriesContext(connection) as one_phase:
+        assert len(PlannerPayload().build()) == 1
+
+    for index in range(10):
+        build_phase(name=f'Project {index}')
+
+    with CaptureQueriesContext(connection) as many_phases:
+        assert len(PlannerPayload().build()) == 11
+
+    assert len(many_phases) == len(one_phase)
+
+
+@pytest.mark.django_db
+def test_planner_payload_matches_phase(project, zones, score_weights):
+    prj = project.build(project_manager='Sylvia')
+    phase = prj.phases.get()
+
+    phase.funding_streams.add(
+        FundingStream.objects.create(budget=250000, year=2023, funding_secured=True),
+        FundingStream.objects.create(budget=100000, year=2024, funding_secured=False),
+    )
+
+    for zone in Zone.objects.all():
+        PhaseZoneDistribution.objects.create(
+            phase=phase, zone=zone, zone_distribution_proportion=0.25
+        )
+
+    prj.zones.set(Zone.objects.all())
+
+    (row,) = PlannerPayload().build()
+
+    assert row['pk'] == phase.pk
+    assert row['total_budget'] == phase.total_budget
+    assert row['funded_amount'] == phase.total_funded_amount
+    assert row['funded_amount_by_year'] == phase.funded_amount_by_year
+    assert row['cost_by_zone'] == phase.cost_by_zone
+    assert row['total_score'] == prj.projectscore.total_score
+    assert row['project_manager'] == 'Sylvia'
+    assert row['section'] == prj.section_owner.name
+    assert row['category'] == prj.category.name
+
+    assert sorted(row['funding_streams'], key=lambda stream: stream['id']) == \
+        sorted(phase.funding_streams.values(), key=lambda stream: stream['id'])
+
+    assert sorted(zone['name'] for zone in row['zones']) == \
+        sorted(zone.name for zone in Zone.objects.all())
+
+    assert row['house_districts'] == []
+    assert row['assets'] == {}
+
+
+@pytest.mark.django_db
+def test_planner_payload_filters_phases(project, score_weights):
+    project.build()
+    prj = project.build(name='Another project')
+
+    payload = PlannerPayload(Phase.objects.filter(project=prj)).build()
+
+    assert [row['project_id'] for row in payload] == [prj.id]
+
+
+@pytest.mark.django_db
+def test_planner_payload_cache(project, score_weights, locmem_cache):
+    prj = project.build()
+
+    payload = get_planner_payload()
+    assert json.loads(payload)[0]['name'] == prj.name
+
+    # A cache hit doesn't touch the database
+    with CaptureQueriesContext(connection) as cached:
+        assert get_planner_payload() == payload
+
+    assert len(cached) == 0
+
+    # Changes to the underlying rows invalidate the cached payload
+    prj.name = 'Renamed project'
+    prj.save()
+
+    assert json.loads(get_planner_payload())[0]['name'] == 'Renamed project'
+
+    phase = prj.phases.get()
+    phase.funding_streams.add(
+        FundingStream.objects.create(budget=1000, year=2023, funding_secured=True)
+    )
+
+    assert float(json.loads(get_planner_payload())[0]['total_budget']) == 1000
+
+
+@pytest.mark.django_db
+def test_planner_payload_without_cache(project, score_weights):
+    prj = project.build()
+
+    assert json.loads(get_planner_payload())[0]['name'] == prj.name
+
+    prj.name = 'Renamed project'
+    prj.save()
+
+    assert json.loads(get_planner_payload())[0]['name'] == 'Renamed project'
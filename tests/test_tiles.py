@@ -0,0 +1,68 @@
+import json
+import math
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection
+from rest_framework.test import force_authenticate
+
+from asset_dashboard.endpoints import TileView
+from asset_dashboard.models import LocalAsset
+from asset_dashboard.tiles import tile_bounds
+
+
+def tile_for(point, z):
+    """
+    The x and y of the tile containing a longitude and latitude.
+    """
+    lon, lat = point
+    n = 2 ** z
+
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+
+    return x, y
+
+
+@pytest.mark.django_db
+def test_tile_bounds():
+    with connection.cursor() as cursor:
+        for z, x, y in [(0, 0, 0), (8, 65, 95), (14, 4202, 6091)]:
+            cursor.execute('SELECT ST_AsText(ST_TileEnvelope(%s, %s, %s))', [z, x, y])
+            (envelope,) = cursor.fetchone()
+
+            expected = GEOSGeometry(envelope).extent
+
+            assert tile_bounds(z, x, y).extent == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.django_db
+def test_local_asset_tiles(api, user, project, trails_geojson):
+    phase = project.build().phases.get()
+    feature = trails_geojson['features'][0]
+
+    LocalAsset.objects.create(
+        phase=phase, geom=json.dumps(feature['geometry']), asset_model='trails', asset_name='Trail'
+    )
+
+    def get_tile(layer, z, x, y):
+        request = api.get(f'/tiles/{layer}/{z}/{x}/{y}.mvt')
+        force_authenticate(request, user)
+
+        return TileView.as_view()(request, layer=layer, z=z, x=x, y=y)
+
+    point = GEOSGeometry(json.dumps(feature['geometry'])).centroid.coords
+    x, y = tile_for(point, 10)
+
+    response = get_tile('local_assets', 10, x, y)
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/vnd.mapbox-vector-tile'
+    assert b'local_assets' in response.content
+    assert b'Trail' in response.content
+
+    # Tiles without assets are empty
+    assert get_tile('local_assets', 10, 0, 0).content == b''
+
+    assert get_tile('unknown', 10, x, y).status_code == 404
+    assert get_tile('local_assets', 10, 2 ** 10, y).status_code == 404
@@ -1,7 +1,10 @@
 import pytest
 from django.urls import reverse
-from asset_dashboard.models import Project, ProjectScore, ProjectCategory, User, Phase
+from asset_dashboard.models import Project, ProjectScore, ProjectCategory, User, Phase, \
+    SenateDistrict, HouseDistrict, CommissionerDistrict
+from django.db import connection
 from django.forms.models import model_to_dict
+from django.test.utils import CaptureQueriesContext
 import json
 from django.utils.html import escape
 
@@ -97,6 +100,107 @@ def test_project_list_json(client, project_list, user):
     assert len(response_body['data']) == 0
 
 
+@pytest.mark.django_db
+def test_project_list_json_search(client, project, user):
+    client.force_login(user=user)
+
+    reconstruction = project.build(
+        name='Trail Reconstruction', description='Regrade the trail.', project_manager='Sylvia'
+    )
+    bridge = project.build(
+        name='Bridge Repair', description='Reconstruct the bridge deck.', project_manager='Reconnie Smith'
+    )
+    project.build(name='Parking Lot Resurfacing', description='Repave the lot.')
+
+    def search(text):
+        response = client.get(reverse('project-list-json'), {'draw': 1, 'search[value]': text})
+        assert response.status_code == 200
+
+        return json.loads(response.content)
+
+    # Words are matched by prefix, and ranked by where they appear: name,
+    # then project manager, then description
+    response = search('recon')
+
+    assert response['recordsFiltered'] == 2
+    assert [row[0] for row in response['data']] == [str(reconstruction.id), str(bridge.id)]
+
+    # Parts of words in a name, and ID prefixes, are matched too
+    assert [row[1] for row in search('struct')['data']] == ['Trail Reconstruction']
+    assert str(bridge.id) in [row[0] for row in search(str(bridge.id))['data']]
+
+    assert search('trail bridge')['recordsFiltered'] == 0
+    assert search('?!')['recordsFiltered'] == 0
+
+    # The search column is kept up to date on updates that don't save models
+    Project.objects.filter(id=bridge.id).update(description='Replace the culvert.')
+
+    assert [row[1] for row in search('culvert')['data']] == ['Bridge Repair']
+    assert search('deck')['recordsFiltered'] == 0
+
+
+@pytest.mark.django_db
+def test_projects_by_district_json(client, project, districts, user):
+    client.force_login(user=user)
+
+    first = project.build(name='First project')
+    second = project.build(name='Second project')
+    project.build(name='Project without districts')
+
+    district_1, district_2 = SenateDistrict.objects.order_by('id')
+
+    first.senate_districts.set([district_1, district_2])
+    first.house_districts.add(HouseDistrict.objects.get(name='District 2'))
+    second.senate_districts.add(district_2)
+    second.commissioner_districts.add(CommissionerDistrict.objects.get(name='District 1'))
+
+    def list_projects(**filters):
+        params = {'draw': 1, 'order[0][column]': 0, 'order[0][dir]': 'asc'}
+        params.update({f'columns[{column}][search][value]': name for column, name in filters.items()})
+
+        response = client.get(reverse('projects-district-json'), params)
+        assert response.status_code == 200
+
+        return json.loads(response.content)['data']
+
+    # Labels are read from the projects, rather than queried for each row
+    with CaptureQueriesContext(connection) as queries:
+        rows = list_projects()
+
+    assert not any('district"' in query['sql'] or 'districts"' in query['sql'] for query in queries)
+
+    assert [row[:5] for row in rows] == [
+        ['First project', 'Fixing trail erosion.', ' 1,  2', ' 2', ''],
+        ['Project without districts', 'Fixing trail erosion.', '', '', ''],
+        ['Second project', 'Fixing trail erosion.', ' 2', '', ' 1'],
+    ]
+
+    assert [row[0] for row in list_projects(**{2: 'District 1'})] == ['First project']
+    assert [row[0] for row in list_projects(**{2: 'District 2'})] == ['First project', 'Second project']
+
+    # Filters of different district types match projects in any of them
+    assert [row[0] for row in list_projects(**{3: 'District 2', 4: 'District 1'})] == [
+        'First project', 'Second project'
+    ]
+    assert list_projects(**{2: 'District 3'}) == []
+
+    # Changing a project's districts, or a district, relabels the project
+    first.senate_districts.remove(district_1)
+    district_2.name = 'District 12'
+    district_2.save()
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+
+    assert first.senate_district_ids == [district_2.id]
+    assert (first.senate_district_label, second.senate_district_label) == (' 12', ' 12')
+
+    district_2.delete()
+    second.refresh_from_db()
+
+    assert (second.senate_district_ids, second.senate_district_label) == ([], '')
+
+
 @pytest.mark.django_db
 def test_add_project_view(client, section_owner, project_category, user):
     client.force_login(user=user)